@@ -0,0 +1,9 @@
+"""Offline benchmarks for the calendar, inventory, reports and booking hot paths.
+
+Run against a throwaway test database filled by ``generate_load_data``::
+
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks --sizes small,medium
+    python -m benchmarks --sizes small --baseline benchmarks/baseline.json   # MySQL local
+
+See ``python -m benchmarks --help`` for the options.
+"""
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Mide las rutas críticas sobre una base de datos de prueba llena con generate_load_data.",
+    )
+    parser.add_argument("--sizes", default="small", help="Tamaños separados por coma: small, medium, large")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--only", default="", help="Prefijos de casos separados por coma, p. ej. create:,reports:")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON con los resultados")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda los resultados como nueva línea base")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "salones_cra.settings")
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .runner import SIZES, compare, run
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        sys.exit(f"Tamaños desconocidos: {', '.join(unknown)}")
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        report = run(
+            sizes, seed=args.seed, iterations=args.iterations,
+            only=[prefix for prefix in args.only.split(",") if prefix],
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+    if args.output:
+        args.output.write_text(payload, encoding="utf-8")
+    if args.update_baseline:
+        args.baseline.write_text(payload, encoding="utf-8")
+        print(f"Línea base actualizada: {args.baseline}")
+        return 0
+
+    errors = [
+        f"{size} {name}: {result['error']}"
+        for size, cases in report["results"].items()
+        for name, result in cases.items()
+        if "error" in result
+    ]
+    regressions = []
+    if args.baseline.exists():
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+    else:
+        print(f"No hay línea base en {args.baseline}; usa --update-baseline para crearla.")
+    for line in errors:
+        print(f"ERROR {line}")
+    for line in regressions:
+        print(f"REGRESIÓN {line}")
+    if args.baseline.exists() and not errors and not regressions:
+        print("Sin regresiones respecto de la línea base.")
+    return 1 if errors or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
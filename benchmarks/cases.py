@@ -0,0 +1,148 @@
+"""The requests each benchmark times, built against the dataset of the current size."""
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.urls import reverse
+from django.utils import timezone
+
+from booking.availability import find_free_slots
+from booking.dateutils import max_reservation_date
+from booking.models import Course, Reservation, RoomInventory, Subject, TeacherProfile
+
+BENCH_ADMIN = "bench_admin"
+
+
+@dataclass
+class Case:
+    name: str
+    role: str
+    method: str
+    url: str
+    data: Optional[dict] = None
+    json: bool = False
+    # Status codes that mean the request took the intended path.
+    expected: tuple = (200,)
+    # Writes run inside a rolled back transaction so every iteration sees the same data.
+    writes: bool = False
+
+
+class Fixtures:
+    """Users and slots the cases point at, picked from the generated data."""
+
+    def __init__(self):
+        User = get_user_model()
+        self.today = timezone.localdate()
+        self.admin, _ = User.objects.get_or_create(username=BENCH_ADMIN, defaults={"is_staff": True})
+        self.admin.groups.add(Group.objects.get_or_create(name="AdminBiblioteca")[0])
+        # The busiest generated teacher, so "my reservations" pages are as long as they get.
+        self.teacher = (
+            User.objects.filter(username__startswith="carga_")
+            .order_by("username")
+            .first()
+        )
+        profile = TeacherProfile.objects.filter(user=self.teacher).first()
+        courses = profile.courses.all() if profile and profile.courses.exists() else Course.objects.all()
+        subjects = profile.subjects.all() if profile and profile.subjects.exists() else Subject.objects.all()
+        self.course = courses.order_by("order", "name").first()
+        self.subject = subjects.order_by("name").first()
+
+        window_end = max_reservation_date(self.today)
+        slots = find_free_slots(start_date=self.today + timedelta(days=1), end_date=window_end, limit=None)
+        self.free_slot = slots[0] if slots else None
+        self.taken = (
+            Reservation.objects.filter(date__gt=self.today, date__lte=window_end)
+            .order_by("date", "start_time", "id")
+            .first()
+        )
+        stock = (
+            RoomInventory.objects.filter(room_id=self.free_slot["room_id"]).order_by("material__name").first()
+            if self.free_slot else None
+        )
+        self.short_stock = (stock.material_id, stock.quantity + 1) if stock else None
+        self.report_range = {
+            "start_date": (self.today - timedelta(days=90)).isoformat(),
+            "end_date": self.today.isoformat(),
+        }
+
+    def form(self, slot, **overrides):
+        data = {
+            "room": slot["room_id"],
+            "date": slot["date"].isoformat(),
+            "start_time": slot["start_time"].strftime("%H:%M"),
+            "end_time": slot["end_time"].strftime("%H:%M"),
+            "course": self.course.id if self.course else "",
+            "subject": self.subject.id if self.subject else "",
+        }
+        data.update(overrides)
+        return data
+
+    def slot_of(self, reservation):
+        return {
+            "room_id": reservation.room_id,
+            "date": reservation.date,
+            "start_time": reservation.start_time,
+            "end_time": reservation.end_time,
+        }
+
+    def weekday_before_today(self):
+        day = self.today - timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day
+
+    def next_saturday(self):
+        return self.today + timedelta(days=(5 - self.today.weekday()) % 7 or 7)
+
+
+def build_cases(fixtures):
+    """Return the cases that make sense for the data at hand; paths without a fixture are skipped."""
+    redirect = (302,)
+    cases = [
+        Case("calendar:monthly", "teacher", "get", reverse("reservation_monthly")),
+        Case("inventory:list", "admin", "get", reverse("inventory_list")),
+        Case("reports:view", "admin", "get", reverse("reports"), data=fixtures.report_range),
+        Case("reports:export_pdf", "admin", "get", reverse("export_reports_pdf"), data=fixtures.report_range),
+        Case("reports:export_excel", "admin", "get", reverse("export_reports_excel"), data=fixtures.report_range),
+        Case("api:reservations_list:admin", "admin", "get", "/api/reservations/"),
+        Case("api:reservations_list:teacher", "teacher", "get", "/api/reservations/"),
+        Case("api:availability", "teacher", "get", "/api/availability/", data={
+            "start_date": fixtures.today.isoformat(),
+            "end_date": (fixtures.today + timedelta(days=14)).isoformat(),
+            "block_count": 2,
+        }),
+    ]
+
+    create_url = reverse("reservation_create")
+    slot = fixtures.free_slot
+    if slot:
+        cases += [
+            Case("create:ok", "teacher", "post", create_url, data=fixtures.form(slot), expected=redirect, writes=True),
+            Case("create:api_ok", "teacher", "post", "/api/reservations/", json=True, expected=(201,), writes=True, data={
+                "room": slot["room_id"],
+                "date": slot["date"].isoformat(),
+                "start_time": slot["start_time"].isoformat(),
+                "end_time": slot["end_time"].isoformat(),
+                "items": [],
+            }),
+            Case("create:rejected_past", "teacher", "post", create_url, expected=redirect, writes=True,
+                 data=fixtures.form(slot, date=fixtures.weekday_before_today().isoformat())),
+            Case("create:rejected_weekend", "teacher", "post", create_url, expected=redirect, writes=True,
+                 data=fixtures.form(slot, date=fixtures.next_saturday().isoformat())),
+            Case("create:rejected_hours", "teacher", "post", create_url, expected=redirect, writes=True,
+                 data=fixtures.form(slot, start_time="18:00", end_time="18:45")),
+        ]
+        if fixtures.short_stock:
+            material_id, quantity = fixtures.short_stock
+            cases.append(Case(
+                "create:rejected_stock", "teacher", "post", create_url, expected=redirect, writes=True,
+                data=fixtures.form(slot, **{f"qty_{material_id}": quantity}),
+            ))
+    if fixtures.taken:
+        cases.append(Case(
+            "create:rejected_conflict", "teacher", "post", create_url, expected=redirect, writes=True,
+            data=fixtures.form(fixtures.slot_of(fixtures.taken)),
+        ))
+    return cases
@@ -0,0 +1,167 @@
+"""Connection overhead: a new connection per request against persistent and pooled ones.
+
+Each simulated request runs ``SELECT 1`` from several threads at once, the way
+a threaded server or the sync workers of an ASGI server would::
+
+    python -m benchmarks.connections --requests 500 --threads 8      # MySQL local
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.connections
+
+Only the ``default`` database is touched and nothing is written.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.connections",
+        description="Compara abrir una conexión por solicitud con conexiones persistentes y con el pool.",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="Solicitudes simuladas por escenario")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=0, help="Conexiones del pool (por defecto, DB_POOL_SIZE o --threads)")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON con los resultados")
+    return parser.parse_args(argv)
+
+
+def _select_one(raw):
+    cursor = raw.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _drive(requests, threads, handle):
+    """Run ``handle(state)`` ``requests`` times across ``threads`` threads; return per-request seconds."""
+    pending = iter(range(requests))
+    pending_lock = threading.Lock()
+    timings = []
+    timings_lock = threading.Lock()
+    gate = threading.Barrier(threads)
+
+    def worker():
+        state = {}
+        gate.wait()
+        try:
+            while True:
+                with pending_lock:
+                    if next(pending, None) is None:
+                        return
+                started = time.perf_counter()
+                handle(state)
+                with timings_lock:
+                    timings.append(time.perf_counter() - started)
+        finally:
+            if state.get("raw") is not None:
+                state["raw"].close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return timings
+
+
+def run(*, requests, threads, pool_size):
+    from django.db import connection
+
+    from booking.db.pool import ConnectionPool
+
+    from .runner import percentile
+
+    params = connection.get_connection_params()
+    opened = []
+
+    def connect():
+        raw = connection.get_new_connection(params)
+        opened.append(1)
+        return raw
+
+    def per_request(state):
+        raw = connect()
+        try:
+            _select_one(raw)
+        finally:
+            raw.close()
+
+    health_checks = connection.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    def persistent(state):
+        # What CONN_MAX_AGE does: one connection per thread, pinged once per request with health checks on.
+        if state.get("raw") is None:
+            state["raw"] = connect()
+        if health_checks and hasattr(state["raw"], "ping"):
+            state["raw"].ping()
+        _select_one(state["raw"])
+
+    pool = ConnectionPool(connect, size=pool_size, timeout=30)
+
+    def pooled(state):
+        raw = pool.acquire()
+        try:
+            _select_one(raw)
+        finally:
+            pool.release(raw)
+
+    scenarios = {"conexión nueva": per_request, "persistente": persistent, "pool": pooled}
+    results = {}
+    for name, handle in scenarios.items():
+        opened.clear()
+        started = time.perf_counter()
+        timings = _drive(requests, threads, handle)
+        wall = time.perf_counter() - started
+        results[name] = {
+            "requests_per_s": round(len(timings) / wall, 1),
+            "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+            "connections_opened": len(opened),
+        }
+    pool.close()
+    return {
+        "meta": {
+            "engine": connection.settings_dict["ENGINE"],
+            "requests": requests,
+            "threads": threads,
+            "pool_size": pool_size,
+            "health_checks": health_checks,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "salones_cra.settings")
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+
+    threads = max(args.threads, 1)
+    pool_size = args.pool_size or getattr(settings, "DB_POOL_SIZE", 0) or threads
+    report = run(requests=args.requests, threads=threads, pool_size=pool_size)
+
+    meta = report["meta"]
+    print(f"{meta['engine']}: {meta['requests']} solicitudes, {meta['threads']} hilos, pool de {meta['pool_size']}")
+    print(f"{'escenario':<16} {'sol/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'conexiones':>11}")
+    for name, row in report["results"].items():
+        print(
+            f"{name:<16} {row['requests_per_s']:>9.1f} {row['p50_ms']:>9.3f} "
+            f"{row['p95_ms']:>9.3f} {row['connections_opened']:>11}"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
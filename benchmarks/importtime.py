@@ -0,0 +1,84 @@
+"""Import-time budget: how long a worker takes to load Django and the URLconf.
+
+Runs a fresh interpreter under ``python -X importtime``, so nothing cached by
+this process skews the numbers::
+
+    python -m benchmarks.importtime
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.importtime --budget-ms 800
+
+Fails when the total goes over the budget or when a module that should only
+load on demand (reportlab, openpyxl) is imported at startup.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Loaded only by the export views, through booking.exports.
+LAZY_MODULES = ("reportlab", "openpyxl")
+STARTUP = "import django; django.setup(); import salones_cra.urls"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.importtime",
+        description="Mide el tiempo de importación al arrancar un worker y verifica el presupuesto.",
+    )
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Máximo de ms para cargar Django y las URLs")
+    parser.add_argument("--top", type=int, default=15, help="Paquetes más lentos a mostrar")
+    return parser.parse_args(argv)
+
+
+def measure_imports(statement=STARTUP):
+    """Return ``{module: (self_us, cumulative_us, depth)}`` for a fresh interpreter running ``statement``."""
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "salones_cra.settings")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2)
+    return modules
+
+
+def check_budget(modules, *, budget_ms):
+    """Return the problems found: lazy modules loaded eagerly and a total over budget."""
+    loaded = {name.split(".")[0] for name in modules}
+    problems = [
+        f"{name} se importa al arrancar; debe cargarse solo al exportar"
+        for name in LAZY_MODULES
+        if name in loaded
+    ]
+    total_ms = sum(self_us for self_us, _, _ in modules.values()) / 1000
+    if total_ms > budget_ms:
+        problems.append(f"La importación tarda {total_ms:.0f} ms, sobre el presupuesto de {budget_ms:.0f} ms")
+    return problems
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modules = measure_imports()
+    total_ms = sum(self_us for self_us, _, _ in modules.values()) / 1000
+    print(f"{len(modules)} módulos importados en {total_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    top_level = sorted(
+        ((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 0),
+        reverse=True,
+    )
+    for cumulative, name in top_level[:args.top]:
+        print(f"{cumulative / 1000:>9.1f} ms  {name}")
+    problems = check_budget(modules, budget_ms=args.budget_ms)
+    for problem in problems:
+        print(f"ERROR {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Fill a throwaway database, time every case and compare the numbers with a baseline."""
+import io
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .cases import Fixtures, build_cases
+
+SIZES = {
+    "small": {"rooms": 3, "materials": 6, "teachers": 50, "reservations": 2_000},
+    "medium": {"rooms": 10, "materials": 12, "teachers": 500, "reservations": 20_000},
+    "large": {"rooms": 20, "materials": 12, "teachers": 2_000, "reservations": 200_000},
+}
+
+# A case regresses when its median grows past both limits, or it issues more queries.
+REGRESSION_FACTOR = 1.25
+REGRESSION_FLOOR_MS = 5.0
+
+
+def load_dataset(size, *, seed):
+    call_command(
+        "generate_load_data", purge=True, seed=seed, anchor_date=timezone.localdate().isoformat(),
+        stdout=io.StringIO(), **SIZES[size],
+    )
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _send(client, case):
+    if case.method == "get":
+        return client.get(case.url, case.data or {})
+    if case.json:
+        return client.post(case.url, case.data, content_type="application/json")
+    return client.post(case.url, case.data)
+
+
+def _call(client, case):
+    if not case.writes:
+        return _send(client, case)
+    with transaction.atomic():
+        response = _send(client, case)
+        transaction.set_rollback(True)
+    return response
+
+
+def measure(client, case, *, iterations, warmup=1):
+    """Time ``iterations`` runs, then count queries and peak memory on one extra run."""
+    for _ in range(warmup):
+        _call(client, case)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _call(client, case)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = _call(client, case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "iterations": iterations,
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "queries": len(queries),
+        "peak_kb": round(peak / 1024, 1),
+        "status": response.status_code,
+    }
+    if response.status_code not in case.expected:
+        result["error"] = f"status {response.status_code}, se esperaba {', '.join(map(str, case.expected))}"
+    return result
+
+
+def run_size(size, *, seed, iterations, only=None, log=print):
+    load_dataset(size, seed=seed)
+    fixtures = Fixtures()
+    clients = {"admin": Client(), "teacher": Client()}
+    clients["admin"].force_login(fixtures.admin)
+    clients["teacher"].force_login(fixtures.teacher)
+
+    results = {}
+    for case in build_cases(fixtures):
+        if only and not any(case.name.startswith(prefix) for prefix in only):
+            continue
+        results[case.name] = measure(clients[case.role], case, iterations=iterations)
+        log(format_row(size, case.name, results[case.name]))
+    return results
+
+
+def run(sizes, *, seed, iterations, only=None, log=print):
+    return {
+        "meta": {
+            "created": timezone.now().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "seed": seed,
+            "iterations": iterations,
+        },
+        "results": {size: run_size(size, seed=seed, iterations=iterations, only=only, log=log) for size in sizes},
+    }
+
+
+def format_row(size, name, result):
+    row = (
+        f"{size:<7} {name:<34} median {result['median_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+        f"{result['queries']:>4} consultas  {result['peak_kb']:>9.1f} KB"
+    )
+    if "error" in result:
+        row += f"  ERROR: {result['error']}"
+    return row
+
+
+def compare(current, baseline):
+    """Return one message per case that got slower or chattier than in ``baseline``.
+
+    Timings are only compared when both runs used the same database engine.
+    """
+    regressions = []
+    same_engine = baseline.get("meta", {}).get("database") == current["meta"]["database"]
+    for size, cases in current["results"].items():
+        for name, result in cases.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if not previous:
+                continue
+            slower = same_engine and (
+                result["median_ms"] > previous["median_ms"] * REGRESSION_FACTOR
+                and result["median_ms"] - previous["median_ms"] > REGRESSION_FLOOR_MS
+            )
+            if slower:
+                regressions.append(
+                    f"{size} {name}: mediana {previous['median_ms']} → {result['median_ms']} ms"
+                )
+            if result["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{size} {name}: consultas {previous['queries']} → {result['queries']}"
+                )
+    return regressions
@@ -0,0 +1,9 @@
+"""Project settings on SQLite so the benchmarks run without a MySQL server."""
+from salones_cra.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "bench.sqlite3",  # noqa: F405
+    }
+}
@@ -0,0 +1,100 @@
+"""Cold start and resident memory of a fresh worker.
+
+Each scenario runs in a new interpreter, several times, and reports the median
+time to get ready and the RSS afterwards::
+
+    python -m benchmarks.startup --runs 5
+    DJANGO_SETTINGS_MODULE=benchmarks.settings_sqlite python -m benchmarks.startup
+
+``arranque`` is what every worker pays: Django plus the URLconf. ``todas las
+vistas`` additionally imports every view module and the export libraries, as
+the old single ``booking/views.py`` did; the difference is what the lazy
+routes in ``salones_cra/urls.py`` save in workers that only serve the calendar
+and reservations.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .importtime import STARTUP
+
+_PROBE = """
+import json, resource, time
+started = time.perf_counter()
+{statement}
+elapsed_ms = (time.perf_counter() - started) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open('/proc/self/status') as status:
+        rss_kb = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+except OSError:
+    pass
+import sys
+print(json.dumps({{"ms": elapsed_ms, "rss_kb": rss_kb, "modules": len(sys.modules)}}))
+"""
+
+ALL_VIEWS = (
+    STARTUP
+    + "; import booking.views.blackouts, booking.views.inventory, booking.views.users, booking.views.reports"
+    + "; import booking.exports.pdf, booking.exports.excel"
+)
+SCENARIOS = {"arranque": STARTUP, "todas las vistas": ALL_VIEWS}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Mide el arranque en frío y la memoria residente de un worker nuevo.",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Intérpretes por escenario")
+    parser.add_argument("--output", default=None, help="Archivo JSON con los resultados")
+    return parser.parse_args(argv)
+
+
+def probe(statement):
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "salones_cra.settings")
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(statement=statement.replace("; ", "\n"))],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs):
+    results = {}
+    for name, statement in SCENARIOS.items():
+        samples = [probe(statement) for _ in range(max(runs, 1))]
+        results[name] = {
+            "median_ms": round(statistics.median(sample["ms"] for sample in samples), 1),
+            "rss_mb": round(statistics.median(sample["rss_kb"] for sample in samples) / 1024, 1),
+            "modules": samples[-1]["modules"],
+        }
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.runs)
+    print(f"{'escenario':<18} {'ms':>8} {'RSS MB':>8} {'módulos':>8}")
+    for name, row in results.items():
+        print(f"{name:<18} {row['median_ms']:>8.1f} {row['rss_mb']:>8.1f} {row['modules']:>8}")
+    base, full = results["arranque"], results["todas las vistas"]
+    print(
+        f"Rutas diferidas: {full['median_ms'] - base['median_ms']:.0f} ms y "
+        f"{full['rss_mb'] - base['rss_mb']:.1f} MB menos por worker hasta el primer uso"
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
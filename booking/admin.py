@@ -1,11 +1,15 @@
 from django.contrib import admin
-from .models import Room, Material, RoomInventory, Reservation, ReservationItem, Blackout, Subject, TeacherRole, Course, TeacherProfile
+from .models import Room, Material, RoomInventory, Reservation, ReservationItem, RoomBlockClaim, MaterialBlockUsage, ReservationHold, IdempotencyRecord, Blackout, Subject, TeacherRole, Course, TeacherProfile
 
 admin.site.register(Room)
 admin.site.register(Material)
 admin.site.register(RoomInventory)
 admin.site.register(Reservation)
 admin.site.register(ReservationItem)
+admin.site.register(RoomBlockClaim)
+admin.site.register(MaterialBlockUsage)
+admin.site.register(ReservationHold)
+admin.site.register(IdempotencyRecord)
 admin.site.register(Blackout)
 
 admin.site.register(Subject)
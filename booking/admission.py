@@ -0,0 +1,154 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """A booking could not enter the locking path; carries its queue position."""
+
+    def __init__(self, message, *, position, retry_after):
+        super().__init__(message)
+        self.position = position
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded FIFO gate in front of the booking transactions of one process.
+
+    At most ``max_active`` bookings run at the same time; the rest wait in
+    arrival order for up to ``wait_timeout`` seconds. Requests that do not fit
+    in the queue, that time out, or whose user already has ``per_user``
+    bookings in flight are rejected right away with their position so the
+    client can come back instead of piling up on the database locks.
+    """
+
+    def __init__(self, *, max_active=4, max_waiting=50, per_user=1, wait_timeout=2.0):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.per_user = per_user
+        self.wait_timeout = wait_timeout
+        self.stats = Counter()
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = deque()
+        self._in_flight = Counter()
+        self._avg_service = 0.2
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_active=getattr(settings, 'BOOKING_ADMISSION_ACTIVE', 4),
+            max_waiting=getattr(settings, 'BOOKING_ADMISSION_QUEUE', 50),
+            per_user=getattr(settings, 'BOOKING_ADMISSION_PER_USER', 1),
+            wait_timeout=getattr(settings, 'BOOKING_ADMISSION_WAIT', 2.0),
+        )
+
+    @contextmanager
+    def admit(self, user_key):
+        self._enter(user_key)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._leave(user_key, time.monotonic() - started)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'active': self._active,
+                'waiting': len(self._waiting),
+                'avg_service_seconds': round(self._avg_service, 4),
+                **self.stats,
+            }
+
+    def _retry_after(self, position):
+        slots = max(self.max_active, 1)
+        return max(1, math.ceil(position * self._avg_service / slots))
+
+    def _reject(self, reason, message, position):
+        self.stats[reason] += 1
+        logger.info("Booking admission rejected (%s) at position %s", reason, position)
+        raise AdmissionRejected(message, position=position, retry_after=self._retry_after(position))
+
+    def _enter(self, user_key):
+        with self._cond:
+            if self._in_flight[user_key] >= self.per_user:
+                self._reject(
+                    'rejected_user',
+                    "Ya tienes una reserva en proceso; espera a que termine antes de enviar otra.",
+                    len(self._waiting),
+                )
+            if not self._waiting and self._active < self.max_active:
+                self._active += 1
+                self._in_flight[user_key] += 1
+                self.stats['admitted'] += 1
+                return
+            if len(self._waiting) >= self.max_waiting:
+                self._reject(
+                    'rejected_full',
+                    "Hay demasiadas reservas en curso; intenta nuevamente en unos segundos.",
+                    len(self._waiting) + 1,
+                )
+
+            ticket = object()
+            self._waiting.append(ticket)
+            self._in_flight[user_key] += 1
+            self.stats['queued'] += 1
+            deadline = time.monotonic() + self.wait_timeout
+            while self._waiting[0] is not ticket or self._active >= self.max_active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    position = self._waiting.index(ticket) + 1
+                    self._waiting.remove(ticket)
+                    self._release_user(user_key)
+                    self._cond.notify_all()
+                    self._reject(
+                        'rejected_timeout',
+                        f"Tu reserva está en cola (posición {position}); intenta nuevamente en unos segundos.",
+                        position,
+                    )
+                self._cond.wait(remaining)
+            self._waiting.popleft()
+            self._active += 1
+            self.stats['admitted'] += 1
+            self._cond.notify_all()
+
+    def _leave(self, user_key, elapsed):
+        with self._cond:
+            self._active -= 1
+            self._release_user(user_key)
+            self._avg_service = 0.8 * self._avg_service + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def _release_user(self, user_key):
+        self._in_flight[user_key] -= 1
+        if self._in_flight[user_key] <= 0:
+            del self._in_flight[user_key]
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_booking_admission():
+    """Return the process-wide admission controller, built from settings on first use."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController.from_settings()
+    return _controller
+
+
+def reset_booking_admission():
+    """Drop the current controller so the next booking rebuilds it from settings."""
+    global _controller
+    with _controller_lock:
+        _controller = None
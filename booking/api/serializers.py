@@ -1,11 +1,11 @@
-import datetime as _dt
-from django.db import transaction, models
 from django.utils import timezone
-from rest_framework import serializers
+from rest_framework import serializers, exceptions
 from django.contrib.auth import get_user_model
-from booking.models import Room, Material, RoomInventory, Reservation, ReservationItem, Blackout
-from booking.services import get_reserved_material_quantity
-from booking.dateutils import max_reservation_date
+from booking.models import Room, Material, RoomInventory, Reservation, ReservationItem, ReservationHold, Blackout
+from booking.services import (
+    BookingConflict, BookingBusy, BookingInvalid, BookingService, check_booking_rules, place_hold,
+)
+from booking.availability import suggest_alternatives
 
 User = get_user_model()
 
@@ -40,8 +40,20 @@ class UserMiniSerializer(serializers.ModelSerializer):
         model = User
         fields = ["id","username","email"]
 
-def _dt_join(d, t):
-    return _dt.datetime.combine(d, t)
+class BookingBusyError(exceptions.APIException):
+    status_code = 503
+    default_detail = "Hay demasiadas reservas simultáneas; intenta nuevamente en unos segundos."
+    default_code = "booking_busy"
+
+class BookingQueuedError(exceptions.APIException):
+    status_code = 503
+    default_detail = "Hay demasiadas reservas en curso; intenta nuevamente en unos segundos."
+    default_code = "booking_queued"
+
+    def __init__(self, rejection):
+        super().__init__({"detail": str(rejection)})
+        self.detail["position"] = rejection.position
+        self.wait = rejection.retry_after
 
 class ReservationSerializer(serializers.ModelSerializer):
     items = ReservationItemSerializer(many=True)
@@ -52,66 +64,34 @@ class ReservationSerializer(serializers.ModelSerializer):
         fields = ["id","room","date","start_time","end_time","items","inventory_released","user"]
         read_only_fields = ["inventory_released","user"]
 
-    def validate(self, attrs):
-        room = attrs.get("room", getattr(self.instance, "room", None))
-        date = attrs.get("date", getattr(self.instance, "date", None))
-        start = attrs.get("start_time", getattr(self.instance, "start_time", None))
-        end = attrs.get("end_time", getattr(self.instance, "end_time", None))
-        today = timezone.localdate()
-        if date and date < today:
-            raise serializers.ValidationError("La fecha de la reserva debe ser igual o posterior a hoy.")
-        if date:
-            max_allowed = max_reservation_date(today)
-            if date > max_allowed:
-                raise serializers.ValidationError("Las reservas solo se permiten hasta con 1 mes de anticipacion.")
-        if start and end and start >= end:
-            raise serializers.ValidationError("La hora de inicio debe ser menor que la de término.")
-        # L-V 08:00–18:00
-        if date and (date.weekday() > 4):
-            raise serializers.ValidationError("Solo se permiten reservas de lunes a viernes.")
-        if start and end:
-            if not (_dt.time(8,0) <= start < _dt.time(18,0) and _dt.time(8,0) < end <= _dt.time(18,0)):
-                raise serializers.ValidationError("Horario permitido: 08:00 a 18:00.")
-        # Choque con reservas existentes
-        qs = Reservation.objects.filter(room=room, date=date, start_time__lt=end, end_time__gt=start)
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
-            raise serializers.ValidationError("El salón ya está ocupado en ese horario.")
-        # Choque con blackouts (global o por salón)
-        start_dt = _dt_join(date, start); end_dt = _dt_join(date, end)
-        blackout_exists = Blackout.objects.filter(
-            models.Q(room__isnull=True) | models.Q(room=room),
-            start_datetime__lt=end_dt,
-            end_datetime__gt=start_dt
-        ).exists()
-        if blackout_exists:
-            raise serializers.ValidationError("Existe un bloqueo de agenda en ese horario (feriado/reunión).")
-        return attrs
-
-    def create(self, validated_data):
+    def _service(self):
         request = self.context.get("request")
-        items_data = validated_data.pop("items", [])
-        room = validated_data["room"]
-        date = validated_data["date"]
-        start = validated_data["start_time"]
-        end = validated_data["end_time"]
-        material_map = self._aggregate_items(items_data)
-        with transaction.atomic():
-            self._validate_materials_for_slot(
-                room=room,
-                date=date,
-                start=start,
-                end=end,
-                material_quantities=material_map,
-            )
-            reservation = Reservation.objects.create(
-                user=(request.user if request and request.user.is_authenticated else None),
-                **validated_data
-            )
-            for material, qty in material_map.items():
-                ReservationItem.objects.create(reservation=reservation, material=material, quantity=qty)
-        return reservation
+        user = request.user if request and request.user.is_authenticated else None
+        return BookingService(user)
+
+    def _conflict_error(self, message, attrs=None, *, room=None, date=None, start=None, end=None,
+                        material_quantities=None, exclude_reservation_id=None):
+        """Build a booking rejection that carries the nearest feasible alternatives."""
+        attrs = attrs or {}
+        room = room or attrs.get("room", getattr(self.instance, "room", None))
+        date = date or attrs.get("date", getattr(self.instance, "date", None))
+        start = start or attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end = end or attrs.get("end_time", getattr(self.instance, "end_time", None))
+        if material_quantities is None:
+            material_quantities = self._aggregate_items(attrs.get("items", []))
+        alternatives = suggest_alternatives(
+            room_id=room.id,
+            date_value=date,
+            start_time=start,
+            end_time=end,
+            materials={material.id: qty for material, qty in material_quantities.items()},
+            exclude_reservation_id=exclude_reservation_id or getattr(self.instance, "pk", None),
+            hold_owner_id=getattr(getattr(self.context.get("request"), "user", None), "id", None),
+        )
+        return serializers.ValidationError({
+            "non_field_errors": [message],
+            "alternatives": AlternativeSlotSerializer(alternatives, many=True).data,
+        })
 
     def _aggregate_items(self, items_data):
         material_map = {}
@@ -120,55 +100,121 @@ class ReservationSerializer(serializers.ModelSerializer):
             material_map[material] = material_map.get(material, 0) + item["quantity"]
         return material_map
 
-    def _validate_materials_for_slot(self, *, room, date, start, end, material_quantities, exclude_reservation_id=None):
-        for material, qty in material_quantities.items():
-            try:
-                inventory = RoomInventory.objects.select_for_update().get(room=room, material=material)
-            except RoomInventory.DoesNotExist:
-                raise serializers.ValidationError(f"No hay inventario configurado para {material.name} en salón {room.code}.")
-            reserved_overlap = get_reserved_material_quantity(
-                room=room,
-                material_id=material.id,
-                date=date,
-                start_time=start,
-                end_time=end,
-                exclude_reservation_id=exclude_reservation_id,
-            )
-            if reserved_overlap + qty > inventory.quantity:
-                raise serializers.ValidationError(f"Sin stock suficiente de {material.name} en salón {room.code}.")
+    def _run(self, operation, attrs, material_map):
+        try:
+            return operation()
+        except BookingBusy as exc:
+            raise BookingBusyError(str(exc))
+        except BookingInvalid as exc:
+            raise serializers.ValidationError(str(exc))
+        except BookingConflict as exc:
+            raise self._conflict_error(str(exc), attrs, material_quantities=material_map)
+
+    def create(self, validated_data):
+        items_data = validated_data.pop("items", [])
+        material_map = self._aggregate_items(items_data)
+        return self._run(
+            lambda: self._service().create(materials=material_map, **validated_data),
+            validated_data,
+            material_map,
+        )
 
     def update(self, instance, validated_data):
-        new_items = validated_data.pop("items", None)
-        new_room = validated_data.get("room", instance.room)
-        new_date = validated_data.get("date", instance.date)
-        new_start = validated_data.get("start_time", instance.start_time)
-        new_end = validated_data.get("end_time", instance.end_time)
-        exists = Reservation.objects.filter(room=new_room, date=new_date, start_time__lt=new_end, end_time__gt=new_start).exclude(pk=instance.pk).exists()
-        if exists:
-            raise serializers.ValidationError("El salón ya está ocupado en ese horario.")
-        with transaction.atomic():
-            if new_items is not None:
-                material_map = self._aggregate_items(new_items)
-            else:
-                material_map = {}
-                for item in instance.items.all():
-                    material_map[item.material] = material_map.get(item.material, 0) + item.quantity
-            self._validate_materials_for_slot(
-                room=new_room,
-                date=new_date,
-                start=new_start,
-                end=new_end,
-                material_quantities=material_map,
-                exclude_reservation_id=instance.pk,
+        items_data = validated_data.pop("items", None)
+        if items_data is None:
+            material_map = None
+            current_materials = {item.material: item.quantity for item in instance.items.select_related("material")}
+        else:
+            material_map = current_materials = self._aggregate_items(items_data)
+        return self._run(
+            lambda: self._service().update(instance, materials=material_map, **validated_data),
+            validated_data,
+            current_materials,
+        )
+
+class AvailabilitySearchSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=4), required=False)
+    block_count = serializers.IntegerField(min_value=1, max_value=12, default=1)
+    rooms = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    materials = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        help_text="Materiales requeridos con formato <material_id>:<cantidad>.",
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_materials(self, value):
+        materials = {}
+        for entry in value:
+            material_id, _, quantity = entry.partition(":")
+            try:
+                material_id = int(material_id)
+                quantity = int(quantity)
+            except ValueError:
+                raise serializers.ValidationError("Usa el formato <material_id>:<cantidad>.")
+            if quantity < 1:
+                raise serializers.ValidationError("Las cantidades de materiales deben ser mayores a cero.")
+            materials[material_id] = materials.get(material_id, 0) + quantity
+        return materials
+
+    def validate(self, attrs):
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError("La fecha de inicio no puede ser posterior a la fecha de término.")
+        return attrs
+
+class AvailableSlotSerializer(serializers.Serializer):
+    room_id = serializers.IntegerField()
+    room_code = serializers.CharField()
+    date = serializers.DateField()
+    block_indexes = serializers.ListField(child=serializers.IntegerField())
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    label = serializers.CharField()
+
+class AlternativeSlotSerializer(AvailableSlotSerializer):
+    kind = serializers.CharField()
+    kind_label = serializers.CharField()
+
+class ReservationHoldSerializer(serializers.ModelSerializer):
+    items = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField(min_value=0)),
+        write_only=True,
+        required=False,
+        help_text="Materiales a retener: [{\"material_id\": 1, \"quantity\": 2}].",
+    )
+
+    class Meta:
+        model = ReservationHold
+        fields = ["id", "room", "date", "start_time", "end_time", "items", "materials", "expires_at"]
+        read_only_fields = ["materials", "expires_at"]
+
+    def validate(self, attrs):
+        try:
+            check_booking_rules(attrs["date"], attrs["start_time"], attrs["end_time"], timezone.localdate())
+        except BookingInvalid as exc:
+            raise serializers.ValidationError(str(exc))
+        materials = {}
+        for item in attrs.pop("items", []):
+            if "material_id" not in item:
+                raise serializers.ValidationError({"items": "Cada material requiere material_id."})
+            materials[item["material_id"]] = materials.get(item["material_id"], 0) + item.get("quantity", 0)
+        attrs["materials"] = materials
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return place_hold(
+                user=self.context["request"].user,
+                room=validated_data["room"],
+                date=validated_data["date"],
+                start_time=validated_data["start_time"],
+                end_time=validated_data["end_time"],
+                material_quantities=validated_data["materials"],
             )
-            if new_items is not None:
-                instance.items.all().delete()
-                for material, qty in material_map.items():
-                    ReservationItem.objects.create(reservation=instance, material=material, quantity=qty)
-            for k, v in validated_data.items():
-                setattr(instance, k, v)
-            instance.save()
-        return instance
+        except (BookingInvalid, BookingConflict) as exc:
+            raise serializers.ValidationError({"non_field_errors": [str(exc)]})
 
 class BlackoutSerializer(serializers.ModelSerializer):
     class Meta:
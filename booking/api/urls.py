@@ -2,7 +2,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from .viewsets import RoomViewSet, MaterialViewSet, RoomInventoryViewSet, ReservationViewSet, BlackoutViewSet
+from .viewsets import (
+    RoomViewSet, MaterialViewSet, RoomInventoryViewSet, ReservationViewSet, BlackoutViewSet, AvailabilityViewSet,
+    ReservationHoldViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"rooms", RoomViewSet, basename="room")
@@ -10,6 +13,8 @@ router.register(r"materials", MaterialViewSet, basename="material")
 router.register(r"inventory", RoomInventoryViewSet, basename="inventory")
 router.register(r"reservations", ReservationViewSet, basename="reservation")
 router.register(r"blackouts", BlackoutViewSet, basename="blackout")
+router.register(r"availability", AvailabilityViewSet, basename="availability")
+router.register(r"holds", ReservationHoldViewSet, basename="hold")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,24 +1,40 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, mixins
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from booking.models import Room, Material, RoomInventory, Reservation, Blackout
-from booking.services import release_overdue_reservations
-from .serializers import RoomSerializer, MaterialSerializer, RoomInventorySerializer, ReservationSerializer, BlackoutSerializer
+from django.contrib.auth import get_user_model
+from django.utils.decorators import method_decorator
+from booking.models import Room, Material, RoomInventory, Reservation, ReservationHold, Blackout
+from booking.services import release_overdue_reservations, expire_holds, BookingBusy, BookingService
+from booking.availability import find_free_slots
+from booking.conditional import conditional_on
+from booking.admission import AdmissionRejected, get_booking_admission
+from booking.idempotency import (
+    API_RESERVATION_CREATE, IDEMPOTENCY_KEY_MAX_LENGTH, abandon_idempotent, begin_idempotent, finish_idempotent,
+    request_fingerprint,
+)
+from .serializers import (
+    RoomSerializer, MaterialSerializer, RoomInventorySerializer, ReservationSerializer, BlackoutSerializer,
+    AvailabilitySearchSerializer, AvailableSlotSerializer, BookingBusyError, BookingQueuedError,
+    ReservationHoldSerializer,
+)
 from .permissions import IsOwnerOrReadOnly
-from django.db import transaction
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import status, exceptions
+from drf_spectacular.utils import extend_schema
 
+@method_decorator(conditional_on(Room), name="list")
 class RoomViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Room.objects.all().order_by("code")
     serializer_class = RoomSerializer
     permission_classes = [AllowAny]
 
+@method_decorator(conditional_on(Material), name="list")
 class MaterialViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Material.objects.all().order_by("name")
     serializer_class = MaterialSerializer
     permission_classes = [AllowAny]
 
+@method_decorator(conditional_on(RoomInventory, Room, Material, before=release_overdue_reservations), name="list")
 class RoomInventoryViewSet(viewsets.ModelViewSet):
     queryset = RoomInventory.objects.select_related("room","material").all()
     serializer_class = RoomInventorySerializer
@@ -26,29 +42,37 @@ class RoomInventoryViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["room","material"]
 
-    def list(self, request, *args, **kwargs):
-        release_overdue_reservations()
-        return super().list(request, *args, **kwargs)
-
+@method_decorator(
+    conditional_on(Reservation, Material, get_user_model(), before=release_overdue_reservations), name="list",
+)
 class ReservationViewSet(viewsets.ModelViewSet):
     serializer_class = ReservationSerializer
 
     def get_queryset(self):
         """Filter reservations based on user role - teachers see only their own, admins see all"""
-        release_overdue_reservations()
+        if self.action != "list":
+            # list releases them ahead of its ETag (see conditional_on).
+            release_overdue_reservations()
+        # Items, their materials and the owner are serialized for every row.
+        reservations = (
+            Reservation.objects
+            .select_related("user")
+            .prefetch_related("items__material")
+            .order_by("date", "start_time", "id")
+        )
         if self.request.user.is_authenticated:
             # Check if user is admin (staff or AdminBiblioteca group)
             if self.request.user.is_staff or self.request.user.groups.filter(name='AdminBiblioteca').exists():
                 # Admins can see all reservations
-                return Reservation.objects.prefetch_related("items").all()
+                return reservations
             else:
                 # Teachers (Docente group) and other users see only their own reservations
-                return Reservation.objects.filter(user=self.request.user).prefetch_related("items").all()
+                return reservations.filter(user=self.request.user)
         else:
             # Anonymous users see no reservations for list/retrieve, but can still create
             if self.action in ["list", "retrieve"]:
                 return Reservation.objects.none()
-            return Reservation.objects.prefetch_related("items").all()
+            return reservations
 
     def get_permissions(self):
         if self.action in ["list","retrieve"]:
@@ -61,13 +85,80 @@ class ReservationViewSet(viewsets.ModelViewSet):
     filterset_fields = {"room":["exact"], "date":["exact","gte","lte","range"]}
     ordering_fields = ["date","start_time","end_time"]
 
+    def _admitted(self, save):
+        try:
+            with get_booking_admission().admit(self.request.user.pk):
+                save()
+        except AdmissionRejected as exc:
+            raise BookingQueuedError(exc)
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key", "").strip()
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {"detail": f"Idempotency-Key admite hasta {IDEMPOTENCY_KEY_MAX_LENGTH} caracteres."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request.data)
+        record, replay = begin_idempotent(
+            user=request.user, scope=API_RESERVATION_CREATE, key=key, fingerprint=fingerprint,
+        )
+        if replay is not None:
+            if replay.fingerprint != fingerprint:
+                return Response(
+                    {"detail": "Esta Idempotency-Key ya se usó con otra solicitud."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if replay.status_code is None:
+                return Response(
+                    {"detail": "La solicitud original aún se está procesando."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return Response(replay.response_body, status=replay.status_code, headers={"Idempotent-Replayed": "true"})
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(exc)
+        except Exception:
+            abandon_idempotent(record)
+            raise
+        if response.status_code >= 500:
+            # Busy/queued answers are meant to be retried with the same key.
+            abandon_idempotent(record)
+        else:
+            finish_idempotent(record, response.status_code, response.data)
+        return response
+
+    def perform_create(self, serializer):
+        self._admitted(serializer.save)
+
+    def perform_update(self, serializer):
+        self._admitted(serializer.save)
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        with transaction.atomic():
-            instance.release_inventory(items=instance.items.select_related("material"))
-            instance.delete()
+        try:
+            BookingService(request.user).cancel(instance)
+        except BookingBusy as exc:
+            raise BookingBusyError(str(exc))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+class ReservationHoldViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.DestroyModelMixin,
+                             viewsets.GenericViewSet):
+    """Tentative holds placed while a reservation form is open; one per teacher."""
+    serializer_class = ReservationHoldSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        expire_holds()
+        return ReservationHold.objects.filter(user=self.request.user).order_by("-created_at")
+
+@method_decorator(conditional_on(Blackout, Room), name="list")
 class BlackoutViewSet(viewsets.ModelViewSet):
     # Only show administrative blackouts, not reservation-generated ones
     queryset = Blackout.objects.select_related("room").exclude(
@@ -75,3 +166,27 @@ class BlackoutViewSet(viewsets.ModelViewSet):
     ).all()
     serializer_class = BlackoutSerializer
     permission_classes = [IsAdminUser]
+
+class AvailabilityViewSet(viewsets.ViewSet):
+    """Search free (room, date, block) slots without submitting a reservation."""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(parameters=[AvailabilitySearchSerializer], responses=AvailableSlotSerializer(many=True))
+    def list(self, request):
+        params = AvailabilitySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        slots = find_free_slots(
+            start_date=data["start_date"],
+            end_date=data["end_date"],
+            weekdays=data.get("weekdays"),
+            block_count=data["block_count"],
+            room_ids=data.get("rooms"),
+            materials=data.get("materials"),
+            limit=data["limit"],
+            hold_owner_id=request.user.id,
+        )
+        return Response({
+            "count": len(slots),
+            "results": AvailableSlotSerializer(slots, many=True).data,
+        })
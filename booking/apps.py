@@ -1,4 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
 class BookingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "booking"
+
+    def ready(self):
+        from .caching import REFERENCE_MODELS, bump_generation_on_change
+        from .conditional import ETAG_MODELS
+        from .models import Blackout
+        from .monthgrid import CALENDAR_MODELS
+
+        for model in dict.fromkeys(REFERENCE_MODELS + CALENDAR_MODELS + ETAG_MODELS):
+            post_save.connect(bump_generation_on_change, sender=model, dispatch_uid=f"refcache-save-{model.__name__}")
+            if model is not Blackout:  # see Blackout.delete
+                post_delete.connect(bump_generation_on_change, sender=model, dispatch_uid=f"refcache-delete-{model.__name__}")
@@ -0,0 +1,341 @@
+import datetime as _dt
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .caching import cached_rooms
+from .dateutils import get_blocks_for_weekday, max_reservation_date
+from .models import RoomInventory, Reservation, ReservationItem, ReservationHold, Blackout
+
+RESERVATION_BLACKOUT_PREFIX = 'Reserva de'
+
+CONFLICT_RESERVED = 'reserved'
+CONFLICT_HELD = 'held'
+CONFLICT_BLACKOUT = 'blackout'
+CONFLICT_NO_INVENTORY = 'no_inventory'
+CONFLICT_STOCK = 'stock'
+
+CONFLICT_MESSAGES = {
+    CONFLICT_RESERVED: 'El salón ya está ocupado en ese horario.',
+    CONFLICT_HELD: 'Ese horario está retenido temporalmente por otro docente.',
+    CONFLICT_BLACKOUT: 'Existe un bloqueo de agenda en ese horario (feriado/reunión).',
+    CONFLICT_NO_INVENTORY: 'El salón no tiene inventario configurado para uno de los materiales.',
+    CONFLICT_STOCK: 'No hay stock suficiente de materiales en ese horario.',
+}
+
+
+def _to_local_naive(value):
+    if timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def _overlaps(start_a, end_a, start_b, end_b):
+    return start_a < end_b and end_a > start_b
+
+
+def _daterange(start_date, end_date):
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += _dt.timedelta(days=1)
+
+
+class AvailabilityIndex:
+    """Room, block and material availability for a date window, computed in memory.
+
+    Everything is fetched by ``load`` with a fixed number of bulk queries, so callers
+    can probe as many (room, date, block) combinations as they need without going
+    back to the database.
+    """
+
+    def __init__(self, *, start_date, end_date, rooms, inventory, reservations, reservation_items, blackouts, holds=()):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.rooms = list(rooms)
+        self.rooms_by_id = {room.id: room for room in self.rooms}
+        # (room_id, material_id) -> configured quantity
+        self.inventory = dict(inventory)
+        # (room_id, date) -> [(start_time, end_time)]
+        self._reserved = defaultdict(list)
+        # (room_id, material_id, date, block_index) -> reserved quantity
+        self._usage = defaultdict(int)
+        # (room_id | None, date) -> [(start_time, end_time)]
+        self._blackouts = defaultdict(list)
+        # (room_id, date) -> [(start_time, end_time)] held by other teachers
+        self._held = defaultdict(list)
+
+        slots_by_reservation = {}
+        for reservation_id, room_id, date_value, start, end in reservations:
+            self._reserved[(room_id, date_value)].append((start, end))
+            slots_by_reservation[reservation_id] = (room_id, date_value, start, end)
+
+        for reservation_id, material_id, quantity in reservation_items:
+            slot = slots_by_reservation.get(reservation_id)
+            if slot is None:
+                continue
+            room_id, date_value, start, end = slot
+            for block in self.blocks_for(date_value):
+                if _overlaps(block['start_time'], block['end_time'], start, end):
+                    self._usage[(room_id, material_id, date_value, block['index'])] += quantity
+
+        for room_id, start_dt, end_dt in blackouts:
+            start_dt = _to_local_naive(start_dt)
+            end_dt = _to_local_naive(end_dt)
+            first = max(start_dt.date(), start_date)
+            last = min(end_dt.date(), end_date)
+            for day in _daterange(first, last):
+                day_start = start_dt.time() if day == start_dt.date() else _dt.time.min
+                day_end = end_dt.time() if day == end_dt.date() else _dt.time.max
+                if day_end > day_start:
+                    self._blackouts[(room_id, day)].append((day_start, day_end))
+
+        for room_id, date_value, start, end in holds:
+            self._held[(room_id, date_value)].append((start, end))
+
+    @classmethod
+    def load(cls, start_date, end_date, *, exclude_reservation_id=None, hold_owner_id=None, now=None):
+        """Build an index for ``[start_date, end_date]`` from one bulk load.
+
+        Active holds count as occupied unless they belong to ``hold_owner_id``.
+        """
+        reservations_qs = Reservation.objects.filter(date__gte=start_date, date__lte=end_date)
+        items_qs = ReservationItem.objects.filter(
+            reservation__date__gte=start_date,
+            reservation__date__lte=end_date,
+        )
+        if exclude_reservation_id:
+            reservations_qs = reservations_qs.exclude(pk=exclude_reservation_id)
+            items_qs = items_qs.exclude(reservation_id=exclude_reservation_id)
+
+        window_start = _dt.datetime.combine(start_date, _dt.time.min)
+        window_end = _dt.datetime.combine(end_date + _dt.timedelta(days=1), _dt.time.min)
+        if timezone.is_naive(window_start):
+            window_start = timezone.make_aware(window_start)
+            window_end = timezone.make_aware(window_end)
+        blackouts_qs = (
+            Blackout.objects
+            .filter(start_datetime__lt=window_end, end_datetime__gt=window_start)
+            .exclude(reason__startswith=RESERVATION_BLACKOUT_PREFIX)
+        )
+        holds_qs = ReservationHold.objects.filter(
+            date__gte=start_date, date__lte=end_date, expires_at__gt=now or timezone.now(),
+        )
+        if hold_owner_id:
+            holds_qs = holds_qs.exclude(user_id=hold_owner_id)
+
+        return cls(
+            start_date=start_date,
+            end_date=end_date,
+            rooms=cached_rooms(),
+            inventory={
+                (room_id, material_id): quantity
+                for room_id, material_id, quantity
+                in RoomInventory.objects.values_list('room_id', 'material_id', 'quantity')
+            },
+            reservations=reservations_qs.values_list('id', 'room_id', 'date', 'start_time', 'end_time'),
+            reservation_items=items_qs.values_list('reservation_id', 'material_id', 'quantity'),
+            blackouts=blackouts_qs.values_list('room_id', 'start_datetime', 'end_datetime'),
+            holds=holds_qs.values_list('room_id', 'date', 'start_time', 'end_time'),
+        )
+
+    @staticmethod
+    def blocks_for(date_value):
+        return get_blocks_for_weekday(date_value.weekday())
+
+    def covers(self, date_value):
+        return self.start_date <= date_value <= self.end_date
+
+    def range_conflict(self, room_id, date_value, start_time, end_time):
+        """Return why ``room_id`` cannot be used in the time range, or ``None``."""
+        for scope in (None, room_id):
+            for blk_start, blk_end in self._blackouts.get((scope, date_value), ()):
+                if _overlaps(blk_start, blk_end, start_time, end_time):
+                    return CONFLICT_BLACKOUT
+        for res_start, res_end in self._reserved.get((room_id, date_value), ()):
+            if _overlaps(res_start, res_end, start_time, end_time):
+                return CONFLICT_RESERVED
+        for held_start, held_end in self._held.get((room_id, date_value), ()):
+            if _overlaps(held_start, held_end, start_time, end_time):
+                return CONFLICT_HELD
+        return None
+
+    def available_quantity(self, room_id, material_id, date_value, block_index):
+        """Return the free units of a material in a block, or ``None`` without inventory."""
+        capacity = self.inventory.get((room_id, material_id))
+        if capacity is None:
+            return None
+        used = self._usage.get((room_id, material_id, date_value, block_index), 0)
+        return max(capacity - used, 0)
+
+    def material_headroom(self, room_id, date_value, block_indexes, materials):
+        """Return the smallest spare fraction across requested materials, or a conflict code."""
+        headroom = 1.0
+        for material_id, quantity in (materials or {}).items():
+            capacity = self.inventory.get((room_id, material_id))
+            if capacity is None:
+                return CONFLICT_NO_INVENTORY
+            for block_index in block_indexes:
+                available = self.available_quantity(room_id, material_id, date_value, block_index)
+                if available < quantity:
+                    return CONFLICT_STOCK
+                if capacity:
+                    headroom = min(headroom, (available - quantity) / capacity)
+        return headroom
+
+    def slot_conflict(self, room_id, date_value, blocks, materials=None):
+        """Return the first conflict code for booking ``blocks`` in a room, or ``None``."""
+        for block in blocks:
+            reason = self.range_conflict(room_id, date_value, block['start_time'], block['end_time'])
+            if reason:
+                return reason
+        headroom = self.material_headroom(room_id, date_value, [b['index'] for b in blocks], materials)
+        if isinstance(headroom, str):
+            return headroom
+        return None
+
+    def build_slot(self, room, date_value, blocks):
+        first, last = blocks[0], blocks[-1]
+        if first['index'] == last['index']:
+            label = first['label']
+        else:
+            label = f"Bloques {first['index']}-{last['index']}"
+        return {
+            'room_id': room.id,
+            'room_code': room.code,
+            'date': date_value,
+            'block_indexes': [block['index'] for block in blocks],
+            'start_time': first['start_time'],
+            'end_time': last['end_time'],
+            'label': label,
+        }
+
+    def free_slots(self, *, weekdays=None, block_count=1, room_ids=None, materials=None, not_before=None):
+        """Return every free run of ``block_count`` consecutive blocks, best ranked first.
+
+        Slots are ranked by date, then starting block, then by how much material
+        stock they leave free, so the least contended room wins ties.
+        """
+        rooms = [room for room in self.rooms if not room_ids or room.id in room_ids]
+        ranked = []
+        for date_value in _daterange(self.start_date, self.end_date):
+            if weekdays is not None and date_value.weekday() not in weekdays:
+                continue
+            day_blocks = self.blocks_for(date_value)
+            if not_before is not None:
+                day_blocks = [
+                    block for block in day_blocks
+                    if _dt.datetime.combine(date_value, block['start_time']) > not_before
+                ]
+            for offset in range(len(day_blocks) - block_count + 1):
+                run = day_blocks[offset:offset + block_count]
+                if run[-1]['index'] - run[0]['index'] != block_count - 1:
+                    continue
+                for room in rooms:
+                    if any(self.range_conflict(room.id, date_value, b['start_time'], b['end_time']) for b in run):
+                        continue
+                    headroom = self.material_headroom(room.id, date_value, [b['index'] for b in run], materials)
+                    if isinstance(headroom, str):
+                        continue
+                    slot = self.build_slot(room, date_value, run)
+                    ranked.append(((date_value, run[0]['index'], -headroom, room.code), slot))
+        ranked.sort(key=lambda entry: entry[0])
+        return [slot for _, slot in ranked]
+
+
+def find_free_slots(*, start_date, end_date, weekdays=None, block_count=1, room_ids=None, materials=None, limit=20,
+                    hold_owner_id=None, now=None):
+    """Search bookable slots inside the reservation window using a single bulk load."""
+    current = timezone.localtime(now) if now else timezone.localtime()
+    today = current.date()
+    start_date = max(start_date, today)
+    end_date = min(end_date, max_reservation_date(today))
+    if start_date > end_date:
+        return []
+
+    index = AvailabilityIndex.load(start_date, end_date, hold_owner_id=hold_owner_id, now=now)
+    slots = index.free_slots(
+        weekdays=set(weekdays) if weekdays else None,
+        block_count=block_count,
+        room_ids=set(room_ids) if room_ids else None,
+        materials=materials,
+        not_before=current.replace(tzinfo=None),
+    )
+    return slots[:limit]
+
+
+ALTERNATIVE_OTHER_ROOM = 'other_room'
+ALTERNATIVE_ADJACENT_BLOCK = 'adjacent_block'
+ALTERNATIVE_OTHER_DAY = 'other_day'
+
+ALTERNATIVE_LABELS = {
+    ALTERNATIVE_OTHER_ROOM: 'Otro salón, mismo bloque',
+    ALTERNATIVE_ADJACENT_BLOCK: 'Bloque adyacente',
+    ALTERNATIVE_OTHER_DAY: 'Mismo bloque, otro día',
+}
+
+
+def suggest_alternatives(*, room_id, date_value, start_time, end_time, materials=None,
+                         exclude_reservation_id=None, hold_owner_id=None, days_ahead=5, limit=6, now=None):
+    """Return the nearest feasible slots around a rejected booking request.
+
+    Candidates are other rooms in the same blocks, the same room one block earlier
+    or later, and the same blocks on the following days. All of them are checked
+    against one ``AvailabilityIndex`` built for the surrounding window.
+    """
+    current = timezone.localtime(now) if now else timezone.localtime()
+    today = current.date()
+    window_start = max(date_value, today)
+    window_end = min(date_value + _dt.timedelta(days=days_ahead), max_reservation_date(today))
+    if window_start > window_end:
+        return []
+
+    index = AvailabilityIndex.load(
+        window_start, window_end,
+        exclude_reservation_id=exclude_reservation_id, hold_owner_id=hold_owner_id, now=now,
+    )
+    not_before = current.replace(tzinfo=None)
+
+    def blocks_matching(day, indexes):
+        by_index = {block['index']: block for block in index.blocks_for(day)}
+        if not indexes or any(idx not in by_index for idx in indexes):
+            return []
+        return [by_index[idx] for idx in indexes]
+
+    requested_indexes = [
+        block['index'] for block in index.blocks_for(date_value)
+        if _overlaps(block['start_time'], block['end_time'], start_time, end_time)
+    ]
+    candidates = []
+    if index.covers(date_value) and requested_indexes:
+        for room in index.rooms:
+            if room.id != room_id:
+                candidates.append((ALTERNATIVE_OTHER_ROOM, room, date_value, requested_indexes))
+        room = index.rooms_by_id.get(room_id)
+        if room is not None:
+            for shift in (-1, 1):
+                shifted = [idx + shift for idx in requested_indexes]
+                candidates.append((ALTERNATIVE_ADJACENT_BLOCK, room, date_value, shifted))
+
+    room = index.rooms_by_id.get(room_id)
+    if room is not None and requested_indexes:
+        for day in _daterange(date_value + _dt.timedelta(days=1), window_end):
+            if day >= window_start:
+                candidates.append((ALTERNATIVE_OTHER_DAY, room, day, requested_indexes))
+
+    alternatives = []
+    for kind, candidate_room, day, indexes in candidates:
+        blocks = blocks_matching(day, indexes)
+        if not blocks:
+            continue
+        if _dt.datetime.combine(day, blocks[0]['start_time']) <= not_before:
+            continue
+        if index.slot_conflict(candidate_room.id, day, blocks, materials):
+            continue
+        slot = index.build_slot(candidate_room, day, blocks)
+        slot['kind'] = kind
+        slot['kind_label'] = ALTERNATIVE_LABELS[kind]
+        alternatives.append(slot)
+        if len(alternatives) >= limit:
+            break
+    return alternatives
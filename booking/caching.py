@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Course, Material, Room, Subject, TeacherRole
+
+# Reference models cached by the helpers below; saves and deletes bump their generation (see BookingConfig.ready).
+REFERENCE_MODELS = (Room, Material, Course, Subject, TeacherRole)
+
+_GENERATION_PREFIX = 'booking:gen:'
+_ENTRY_PREFIX = 'booking:ref:'
+_MISSING = object()
+
+
+def _generation_key(model):
+    return f'{_GENERATION_PREFIX}{model._meta.label_lower}'
+
+
+def _fresh_generation():
+    # Seeded from the clock rather than 1, so a counter lost from the cache never
+    # comes back at a value whose entries are still cached somewhere.
+    return time.time_ns() // 1000
+
+
+def model_generations(models):
+    """Current generation of each model, read from the shared cache in one round trip."""
+    keys = [_generation_key(model) for model in models]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _fresh_generation(), timeout=None)
+        found.update(cache.get_many(missing))
+    return tuple(found.get(key, 0) for key in keys)
+
+
+def bump_generation(model):
+    """Invalidate every cached entry built from ``model``, in this process and in every other worker."""
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), timeout=None)
+
+
+def bump_generation_on_change(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return  # Every login saves the user; nothing cached shows last_login.
+    # Bump now for this transaction and again after commit, so a worker that rebuilt
+    # the entry from pre-commit rows in between does not keep it.
+    bump_generation(sender)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_generation(sender))
+
+
+class ReferenceCache:
+    """Two-tier cache for rarely changing reference data.
+
+    A small LRU in this process sits in front of Django's cache. Keys embed the
+    generation of every model an entry was built from, so a save anywhere makes
+    the old entries unreachable in all workers that share the cache backend,
+    without deleting anything. Values are shared between requests and threads:
+    treat them as read-only.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self.stats = Counter()
+
+    def get_or_build(self, name, models, build, *, timeout=None):
+        if transaction.get_connection().in_atomic_block:
+            # Rows read inside a transaction may never be committed; do not share them.
+            self.stats['bypass'] += 1
+            return build()
+        key = f"{_ENTRY_PREFIX}{name}:{'.'.join(map(str, model_generations(models)))}"
+        with self._lock:
+            value = self._local.get(key, _MISSING)
+            if value is not _MISSING:
+                self._local.move_to_end(key)
+                self.stats['local_hits'] += 1
+                return value
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            cache.set(key, value, timeout if timeout is not None else getattr(settings, 'REFERENCE_CACHE_TIMEOUT', 3600))
+            self.stats['misses'] += 1
+        else:
+            self.stats['shared_hits'] += 1
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Forget the entries held by this process; the shared tier is left alone."""
+        with self._lock:
+            self._local.clear()
+            self.stats.clear()
+
+
+REFERENCE_CACHE = ReferenceCache(maxsize=getattr(settings, 'REFERENCE_CACHE_LRU_SIZE', 256))
+
+
+def cached_rooms():
+    return REFERENCE_CACHE.get_or_build('rooms', (Room,), lambda: list(Room.objects.order_by('code')))
+
+
+def cached_materials():
+    return REFERENCE_CACHE.get_or_build('materials', (Material,), lambda: list(Material.objects.order_by('name')))
+
+
+def cached_registration_metadata():
+    from .services import build_registration_metadata
+
+    return REFERENCE_CACHE.get_or_build(
+        'registration_metadata', (Course, Subject, TeacherRole), build_registration_metadata,
+    )
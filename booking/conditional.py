@@ -0,0 +1,62 @@
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .caching import model_generations
+from .models import Notification, RoomInventory
+
+# Models only ETags depend on; their saves and deletes bump a generation too (see BookingConfig.ready).
+ETAG_MODELS = (Notification, RoomInventory)
+
+
+def data_version_etag(request, models):
+    """ETag for a page built from ``models``, as ``request.user`` sees it today.
+
+    The version stamp is the change generation of each model (see booking.caching),
+    so computing it runs no SQL. Returns None, which disables the 304, while flash
+    messages are waiting to be shown.
+    """
+    if len(get_messages(request)):
+        return None
+    user = getattr(request, 'user', None)
+    parts = [
+        request.get_full_path(),
+        str(user.pk) if user is not None and user.is_authenticated else '-',
+        timezone.localdate().isoformat(),
+        *map(str, model_generations(models)),
+    ]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+
+def conditional_on(*models, before=None):
+    """Answer GET/HEAD with 304 Not Modified, before the view runs, while ``models`` are unchanged.
+
+    ``before`` is called ahead of the ETag for upkeep the view would otherwise do
+    first (releasing finished reservations), so a 304 still runs it and the ETag
+    reflects its changes. Responses are marked ``private, no-cache``: browsers keep
+    them but revalidate every time, and shared caches do not store one user's page
+    for another.
+    """
+
+    def etag(request, *args, **kwargs):
+        if before is not None:
+            before()
+        return data_version_etag(request, models)
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,30 @@
 import calendar
-from datetime import date
+from datetime import date, time
+
+
+BASE_DAY_BLOCKS = (
+    ('08:00', '08:45'),
+    ('08:45', '09:30'),
+    ('09:50', '10:35'),
+    ('10:35', '11:20'),
+    ('11:35', '12:20'),
+    ('12:20', '13:05'),
+    ('13:05', '13:50'),
+    ('13:50', '14:35'),
+    ('14:35', '15:20'),
+    ('15:20', '16:05'),
+    ('16:05', '16:50'),
+)
+THURSDAY_BLOCKS = BASE_DAY_BLOCKS + (('17:00', '18:00'),)
+FRIDAY_BLOCKS = BASE_DAY_BLOCKS[:6]
+
+WEEKDAY_BLOCK_SCHEDULE = {
+    calendar.MONDAY: BASE_DAY_BLOCKS,
+    calendar.TUESDAY: BASE_DAY_BLOCKS,
+    calendar.WEDNESDAY: BASE_DAY_BLOCKS,
+    calendar.THURSDAY: THURSDAY_BLOCKS,
+    calendar.FRIDAY: FRIDAY_BLOCKS,
+}
 
 
 def max_reservation_date(base_date: date) -> date:
@@ -17,3 +42,43 @@ def max_reservation_date(base_date: date) -> date:
     last_day = calendar.monthrange(target_year, target_month)[1]
     target_day = min(base_date.day, last_day)
     return date(target_year, target_month, target_day)
+
+
+def _build_blocks(blocks):
+    return tuple(
+        {
+            'index': idx,
+            'label': f'Bloque {idx}',
+            'start_str': start_str,
+            'end_str': end_str,
+            'start_time': time.fromisoformat(start_str),
+            'end_time': time.fromisoformat(end_str),
+        }
+        for idx, (start_str, end_str) in enumerate(blocks, start=1)
+    )
+
+
+# Parsed once at import; get_blocks_for_weekday hands out copies.
+_BLOCKS_BY_WEEKDAY = {weekday: _build_blocks(blocks) for weekday, blocks in WEEKDAY_BLOCK_SCHEDULE.items()}
+
+
+def get_blocks_for_weekday(weekday_index):
+    return [dict(block) for block in _BLOCKS_BY_WEEKDAY.get(weekday_index, ())]
+
+
+def block_indexes_for_range(date_value: date, start_time: time, end_time: time):
+    """Return the indexes of the blocks of ``date_value`` overlapped by a time range."""
+    return [
+        block['index']
+        for block in get_blocks_for_weekday(date_value.weekday())
+        if block['start_time'] < end_time and block['end_time'] > start_time
+    ]
+
+
+def is_block_aligned(date_value: date, start_time: time, end_time: time) -> bool:
+    """Return True when a time range starts and ends exactly on block boundaries."""
+    blocks = [
+        block for block in get_blocks_for_weekday(date_value.weekday())
+        if block['start_time'] < end_time and block['end_time'] > start_time
+    ]
+    return bool(blocks) and blocks[0]['start_time'] == start_time and blocks[-1]['end_time'] == end_time
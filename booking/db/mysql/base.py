@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db.backends.mysql import base as mysql
+
+from ..pool import get_pool
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    """MySQL backend that borrows its connections from a bounded per-process pool.
+
+    Meant for ``CONN_MAX_AGE = 0``: Django closes the connection when each
+    request finishes and that close hands it back to the pool, so threads of a
+    threaded server and the sync workers of an ASGI server share at most
+    ``DB_POOL_SIZE`` warm connections instead of opening one per request or
+    keeping one per thread forever.
+    """
+
+    _pool = None
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        self._pool = get_pool(
+            (self.alias, conn_params.get('database')),
+            lambda: connect(conn_params),
+            size=getattr(settings, 'DB_POOL_SIZE', 10),
+            timeout=getattr(settings, 'DB_POOL_TIMEOUT', 5.0),
+            recycle=getattr(settings, 'DB_POOL_RECYCLE', 1800),
+            ping_after=getattr(settings, 'DB_POOL_PING_AFTER', 30),
+        )
+        return self._pool.acquire()
+
+    def _close(self):
+        if self.connection is None or self._pool is None:
+            return super()._close()
+        # A connection that raised a database error may be in any state; do not lend it again.
+        with self.wrap_database_errors:
+            self._pool.release(self.connection, discard=self.errors_occurred)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Every connection of the pool stayed checked out for longer than the wait allowed."""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created', 'returned')
+
+    def __init__(self, connection, now):
+        self.connection = connection
+        self.created = now
+        self.returned = now
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of raw DB-API connections.
+
+    At most ``size`` connections exist at once, idle or checked out; a caller
+    that finds none free waits up to ``timeout`` seconds. Idle connections are
+    pinged before being handed out when they sat unused for ``ping_after``
+    seconds, and closed instead of reused once older than ``recycle`` seconds
+    so the server's ``wait_timeout`` never bites first.
+    """
+
+    def __init__(self, connect, *, size, timeout=5.0, recycle=1800, ping_after=30, clock=time.monotonic):
+        self.connect = connect
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.clock = clock
+        self._idle = deque()
+        self._checked_out = {}
+        self._opening = 0
+        self._cond = threading.Condition()
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'waits': 0, 'timeouts': 0}
+
+    def acquire(self):
+        deadline = self.clock() + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                if self._idle:
+                    entry = self._idle.pop()
+                    self._checked_out[id(entry.connection)] = entry
+                elif len(self._checked_out) + self._opening < self.size:
+                    entry = None
+                    self._opening += 1
+                else:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(f"No hay conexiones libres: {self.size} en uso por más de {self.timeout}s")
+                    if not waited:
+                        self.stats['waits'] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                    continue
+            if entry is None:
+                return self._open()
+            if self._healthy(entry):
+                with self._cond:
+                    self.stats['reused'] += 1
+                return entry.connection
+            # Stale or dead: drop it and go round again, which opens a fresh one.
+            self._discard(entry.connection)
+
+    def _open(self):
+        # Connecting happens outside the lock; ``_opening`` keeps the slot reserved meanwhile.
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opening -= 1
+            self._checked_out[id(connection)] = _Entry(connection, self.clock())
+            self.stats['created'] += 1
+        return connection
+
+    def _healthy(self, entry):
+        now = self.clock()
+        if now - entry.created >= self.recycle:
+            return False
+        ping = getattr(entry.connection, 'ping', None)
+        if ping is None or now - entry.returned < self.ping_after:
+            return True
+        try:
+            ping()
+        except Exception:
+            return False
+        return True
+
+    def release(self, connection, *, discard=False):
+        """Hand ``connection`` back; ``discard`` closes it, e.g. after a database error."""
+        if not discard:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            entry = self._checked_out.get(id(connection))
+            if entry is None:
+                return
+            entry.returned = self.clock()
+            if not discard and entry.returned - entry.created < self.recycle:
+                del self._checked_out[id(connection)]
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._discard(connection)
+
+    def _discard(self, connection):
+        with self._cond:
+            self._checked_out.pop(id(connection), None)
+            self.stats['discarded'] += 1
+            self._cond.notify()
+        _close_quietly(connection)
+
+    def close(self):
+        """Close every idle connection; checked-out ones close when released."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            _close_quietly(entry.connection)
+
+    def status(self):
+        with self._cond:
+            return {'size': self.size, 'idle': len(self._idle), 'in_use': len(self._checked_out), **self.stats}
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, **options):
+    """Return the process-wide pool for a database alias, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(connect, **options)
+        return pool
+
+
+def pool_status():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.status() for alias, pool in pools.items()}
@@ -0,0 +1,7 @@
+"""PDF and Excel builders for the report exports.
+
+reportlab and openpyxl are heavy to import and only two admin views need
+them, so the views import ``booking.exports.pdf`` and ``booking.exports.excel``
+inside the function body. Keep this package free of top-level imports so
+workers never load either library until the first export.
+"""
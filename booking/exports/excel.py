@@ -0,0 +1,65 @@
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font, PatternFill
+
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+
+def _style_header(cell):
+    cell.font = HEADER_FONT
+    cell.fill = HEADER_FILL
+    cell.alignment = HEADER_ALIGNMENT
+
+
+def write_reports_workbook(stream, *, start_date, end_date, total_reservations, room_stats, material_stats):
+    """Write the reports dashboard as a three-sheet workbook to ``stream``."""
+    wb = Workbook()
+    # Remove default sheet
+    wb.remove(wb.active)
+
+    # Summary sheet
+    summary_ws = wb.create_sheet("Resumen")
+    summary_ws['A1'] = "Reporte de Biblioteca"
+    summary_ws['A1'].font = Font(bold=True, size=16)
+    summary_ws.merge_cells('A1:C1')
+    summary_ws['A3'] = f"Período: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+    summary_ws.merge_cells('A3:C3')
+    summary_ws['A5'] = "Métrica"
+    summary_ws['B5'] = "Valor"
+    _style_header(summary_ws['A5'])
+    _style_header(summary_ws['B5'])
+    summary_ws['A6'] = "Total de reservas"
+    summary_ws['B6'] = total_reservations
+    summary_ws['A7'] = "Salones utilizados"
+    summary_ws['B7'] = len(room_stats)
+    summary_ws['A8'] = "Tipos de materiales"
+    summary_ws['B8'] = len(material_stats)
+    summary_ws.column_dimensions['A'].width = 20
+    summary_ws.column_dimensions['B'].width = 15
+
+    # Room statistics sheet
+    room_ws = wb.create_sheet("Reservas por Salón")
+    room_ws['A1'] = "Código de Salón"
+    room_ws['B1'] = "Cantidad de Reservas"
+    for col in ['A1', 'B1']:
+        _style_header(room_ws[col])
+    for row, stat in enumerate(room_stats, start=2):
+        room_ws[f'A{row}'] = f"Salón {stat['room__code']}"
+        room_ws[f'B{row}'] = stat['reservation_count']
+    room_ws.column_dimensions['A'].width = 20
+    room_ws.column_dimensions['B'].width = 25
+
+    # Material statistics sheet
+    material_ws = wb.create_sheet("Materiales Solicitados")
+    material_ws['A1'] = "Material"
+    material_ws['B1'] = "Cantidad Total Solicitada"
+    for col in ['A1', 'B1']:
+        _style_header(material_ws[col])
+    for row, stat in enumerate(material_stats, start=2):
+        material_ws[f'A{row}'] = stat['material__name']
+        material_ws[f'B{row}'] = stat['total_quantity']
+    material_ws.column_dimensions['A'].width = 30
+    material_ws.column_dimensions['B'].width = 25
+
+    wb.save(stream)
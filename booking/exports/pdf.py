@@ -0,0 +1,87 @@
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+def _table_style(header_size):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+def build_reports_pdf(*, start_date, end_date, total_reservations, room_stats, material_stats):
+    """Render the reports dashboard as an A4 PDF and return its bytes."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    # Title
+    elements.append(Paragraph("Reporte de Biblioteca", title_style))
+
+    # Date range
+    elements.append(Paragraph(
+        f"Período: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
+        styles['Normal']
+    ))
+    elements.append(Spacer(1, 20))
+
+    # Summary stats
+    summary_table = Table([
+        ['Métrica', 'Valor'],
+        ['Total de reservas', str(total_reservations)],
+        ['Salones utilizados', str(len(room_stats))],
+        ['Tipos de materiales', str(len(material_stats))]
+    ])
+    summary_table.setStyle(_table_style(14))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 30))
+
+    # Room statistics
+    elements.append(Paragraph("Reservas por Salón", styles['Heading2']))
+    elements.append(Spacer(1, 12))
+    if room_stats:
+        room_data = [['Código de Salón', 'Cantidad de Reservas']]
+        for stat in room_stats:
+            room_data.append([f"Salón {stat['room__code']}", str(stat['reservation_count'])])
+        room_table = Table(room_data)
+        room_table.setStyle(_table_style(12))
+        elements.append(room_table)
+    else:
+        elements.append(Paragraph("No hay datos de reservas para el período seleccionado.", styles['Normal']))
+    elements.append(Spacer(1, 30))
+
+    # Material statistics
+    elements.append(Paragraph("Materiales Solicitados", styles['Heading2']))
+    elements.append(Spacer(1, 12))
+    if material_stats:
+        material_data = [['Material', 'Cantidad Total Solicitada']]
+        for stat in material_stats:
+            material_data.append([stat['material__name'], str(stat['total_quantity'])])
+        material_table = Table(material_data)
+        material_table.setStyle(_table_style(12))
+        elements.append(material_table)
+    else:
+        elements.append(Paragraph("No hay datos de materiales para el período seleccionado.", styles['Normal']))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from .models import IdempotencyRecord
+
+API_RESERVATION_CREATE = 'api:reservation_create'
+WEB_RESERVATION_CREATE = 'web:reservation_create'
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def request_fingerprint(data):
+    """Hash a request payload so a reused key with a different body can be told apart."""
+    return _digest(json.dumps(data, sort_keys=True, default=str))
+
+
+def begin_idempotent(*, user, scope, key, fingerprint='', now=None):
+    """Claim ``key`` for a new request, or return the record of an earlier one.
+
+    Returns ``(record, None)`` when the caller should run the request and later
+    call ``finish_idempotent`` or ``abandon_idempotent``, and ``(None, existing)``
+    when the key was already used. ``existing.status_code`` is ``None`` while the
+    original request is still running.
+    """
+    current = now or timezone.now()
+    key_hash = _digest(key)
+    ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_HOURS', 24))
+    IdempotencyRecord.objects.filter(expires_at__lte=current).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyRecord.objects.create(
+                user=user, scope=scope, key_hash=key_hash, fingerprint=fingerprint, expires_at=current + ttl,
+            )
+        return record, None
+    except IntegrityError:
+        existing = IdempotencyRecord.objects.get(user=user, scope=scope, key_hash=key_hash)
+        return None, existing
+
+
+def finish_idempotent(record, status_code, body):
+    record.status_code = status_code
+    record.response_body = body
+    record.save(update_fields=['status_code', 'response_body'])
+
+
+def abandon_idempotent(record):
+    """Forget a key whose request failed in a way the client may retry."""
+    record.delete()
+
+
+def idempotent_form_post(scope, field='idempotency_key'):
+    """Replay the outcome of a form POST that carries an already used hidden token.
+
+    The view reports a stored outcome by setting ``request.idempotency_result`` to
+    the redirect location; any other response releases the token so the teacher
+    can correct the form and submit again.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = (request.POST.get(field) or '').strip() if request.method == 'POST' else ''
+            if not key or not request.user.is_authenticated or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return view(request, *args, **kwargs)
+
+            record, replay = begin_idempotent(user=request.user, scope=scope, key=key)
+            if replay is not None:
+                if replay.status_code is None:
+                    messages.info(request, "Tu solicitud anterior aún se está procesando.")
+                    return redirect('reservation_list')
+                messages.info(request, "Esta reserva ya fue registrada; se ignoró el envío repetido.")
+                return redirect(replay.response_body['location'])
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                abandon_idempotent(record)
+                raise
+            location = getattr(request, 'idempotency_result', None)
+            if location:
+                finish_idempotent(record, response.status_code, {'location': location})
+            else:
+                abandon_idempotent(record)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from booking.dateutils import block_indexes_for_range
+from booking.models import Reservation, RoomBlockClaim
+
+class Command(BaseCommand):
+    help = "Crea los RoomBlockClaim faltantes para las reservas existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-date", type=str, default=None, help="Solo reservas desde esta fecha (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        reservations = Reservation.objects.order_by("date", "start_time", "id")
+        claims = RoomBlockClaim.objects.all()
+        if opts["from_date"]:
+            reservations = reservations.filter(date__gte=opts["from_date"])
+            claims = claims.filter(date__gte=opts["from_date"])
+
+        taken = {
+            (room_id, date_value, block_index): (reservation_id, start, end)
+            for room_id, date_value, block_index, reservation_id, start, end
+            in claims.values_list(
+                "room_id", "date", "block_index", "reservation_id", "reservation__start_time", "reservation__end_time",
+            )
+        }
+
+        pending = []
+        created = 0
+        conflicts = []
+        rows = reservations.values_list("id", "room_id", "date", "start_time", "end_time")
+        for reservation_id, room_id, date_value, start, end in rows.iterator(chunk_size=opts["batch_size"]):
+            for block_index in block_indexes_for_range(date_value, start, end):
+                key = (room_id, date_value, block_index)
+                owner = taken.get(key)
+                if owner is not None:
+                    owner_id, owner_start, owner_end = owner
+                    # Partial-block ranges may share a block as long as their times do not overlap.
+                    if owner_id != reservation_id and owner_start < end and owner_end > start:
+                        conflicts.append((reservation_id, owner_id, key))
+                    continue
+                taken[key] = (reservation_id, start, end)
+                pending.append(RoomBlockClaim(
+                    room_id=room_id, date=date_value, block_index=block_index, reservation_id=reservation_id,
+                ))
+            if len(pending) >= opts["batch_size"]:
+                created += self._flush(pending)
+
+        created += self._flush(pending)
+
+        for reservation_id, owner, (room_id, date_value, block_index) in conflicts:
+            self.stdout.write(self.style.WARNING(
+                f"Reserva {reservation_id} choca con la reserva {owner} "
+                f"(salón {room_id}, {date_value}, bloque {block_index})"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Claims creados: {created}. Conflictos: {len(conflicts)}"))
+
+    def _flush(self, pending):
+        count = len(pending)
+        if count:
+            with transaction.atomic():
+                RoomBlockClaim.objects.bulk_create(pending)
+            pending.clear()
+        return count
@@ -0,0 +1,354 @@
+import random
+import string
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from booking.availability import RESERVATION_BLACKOUT_PREFIX
+from booking.caching import bump_generation
+from booking.dateutils import get_blocks_for_weekday
+from booking.models import (
+    Blackout, Course, Material, MaterialBlockUsage, Reservation, ReservationItem, Room, RoomBlockClaim,
+    RoomInventory, Subject, TeacherProfile, TeacherRole,
+)
+
+LOAD_USER_PREFIX = "carga_"
+LOAD_MATERIAL_PREFIX = "Carga "
+LOAD_HOLIDAY_REASON = "Feriado (carga)"
+LOAD_RECURRING_REASON = "Mantención semanal (carga)"
+
+ROOM_CODES = string.ascii_uppercase + string.digits
+MATERIAL_NAMES = (
+    "notebook", "proyector", "parlante", "tablet", "cámara", "micrófono", "kit robótica",
+    "calculadora", "microscopio", "extensión", "pizarra móvil", "lentes VR",
+)
+FIRST_NAMES = ("Ana", "Bruno", "Carla", "Diego", "Elena", "Felipe", "Gabriela", "Hugo", "Isidora", "Javier", "Karen", "Luis")
+LAST_NAMES = ("Araya", "Bravo", "Castro", "Díaz", "Espinoza", "Fuentes", "González", "Herrera", "Muñoz", "Rojas", "Soto", "Vera")
+
+# Reservation length in blocks and how often teachers ask for it.
+LENGTH_WEIGHTS = ((1, 65), (2, 28), (3, 7))
+# Morning blocks are booked more than the afternoon ones.
+MORNING_LAST_BLOCK = 6
+MORNING_FACTOR = 1.25
+AFTERNOON_FACTOR = 0.75
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un volumen configurable de datos sintéticos (salones, materiales, docentes, reservas, "
+        "feriados y bloqueos) para medir rendimiento; el resultado depende solo de --seed y --anchor-date"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=2024)
+        parser.add_argument("--rooms", type=int, default=10, help=f"Salones en total (máximo {len(ROOM_CODES)})")
+        parser.add_argument("--materials", type=int, default=12)
+        parser.add_argument("--teachers", type=int, default=2000)
+        parser.add_argument("--reservations", type=int, default=200000)
+        parser.add_argument("--occupancy", type=float, default=0.6, help="Fracción de bloques ocupados por día")
+        parser.add_argument("--future-days", type=int, default=30, help="Días con reservas después de --anchor-date")
+        parser.add_argument("--holidays-per-year", type=int, default=15)
+        parser.add_argument("--recurring", type=int, default=1, help="Bloqueos semanales fijos por salón")
+        parser.add_argument("--anchor-date", type=str, default=None, help="Fecha de referencia (YYYY-MM-DD); por defecto hoy")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--purge", action="store_true", help="Elimina los datos de carga anteriores antes de generar")
+
+    def handle(self, *args, **opts):
+        if not 0 < opts["occupancy"] < 1:
+            raise CommandError("--occupancy debe estar entre 0 y 1.")
+        if opts["rooms"] > len(ROOM_CODES):
+            raise CommandError(f"Solo hay {len(ROOM_CODES)} códigos de salón disponibles.")
+
+        self.rng = random.Random(opts["seed"])
+        self.batch_size = opts["batch_size"]
+        self.anchor = date.fromisoformat(opts["anchor_date"]) if opts["anchor_date"] else timezone.localdate()
+        self.now = _aware(self.anchor, time(0, 0))
+
+        if opts["purge"]:
+            self._purge()
+        elif get_user_model().objects.filter(username__startswith=LOAD_USER_PREFIX).exists():
+            raise CommandError("Ya existen datos de carga; usa --purge para regenerarlos.")
+
+        rooms = self._rooms(opts["rooms"])
+        materials = self._materials(opts["materials"])
+        inventory = self._inventory(rooms, materials)
+        teachers = self._teachers(opts["teachers"])
+        counts = self._reservations(rooms, inventory, teachers, opts)
+        self._reset_sequences()
+        # bulk_create sends no post_save: invalidate what the calendar cached from these tables.
+        for model in (get_user_model(), Reservation, Blackout):
+            bump_generation(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos de carga listos: {len(rooms)} salones, {len(materials)} materiales, {len(teachers)} docentes, "
+            f"{counts['reservations']} reservas ({counts['items']} ítems) entre {counts['first_date']} y "
+            f"{counts['last_date']}, {counts['holidays']} feriados y {counts['recurring']} bloqueos semanales."
+        ))
+
+    # Catalogue --------------------------------------------------------------
+
+    def _rooms(self, total):
+        existing = {room.code: room for room in Room.objects.all()}
+        missing = [code for code in ROOM_CODES if code not in existing][:max(total - len(existing), 0)]
+        Room.objects.bulk_create([Room(code=code) for code in missing])
+        bump_generation(Room)
+        return list(Room.objects.order_by("code"))[:total]
+
+    def _materials(self, total):
+        names = [
+            f"{LOAD_MATERIAL_PREFIX}{MATERIAL_NAMES[n % len(MATERIAL_NAMES)]} {n // len(MATERIAL_NAMES) + 1:02d}"
+            for n in range(total)
+        ]
+        Material.objects.bulk_create([Material(name=name) for name in names], ignore_conflicts=True)
+        bump_generation(Material)
+        return list(Material.objects.filter(name__in=names).order_by("name"))
+
+    def _inventory(self, rooms, materials):
+        """Give each room a random share of the load materials; returns ``{room_id: [(material_id, qty)]}``."""
+        inventory = {}
+        rows = []
+        for room in rooms:
+            stocked = [material for material in materials if self.rng.random() < 0.6]
+            inventory[room.id] = [(material.id, self.rng.randint(2, 30)) for material in stocked]
+            rows.extend(
+                RoomInventory(room_id=room.id, material_id=material_id, quantity=quantity)
+                for material_id, quantity in inventory[room.id]
+            )
+        RoomInventory.objects.bulk_create(rows, batch_size=self.batch_size)
+        return inventory
+
+    def _teachers(self, total):
+        """Create teachers with explicit ids so their profiles can be bulk inserted on any backend."""
+        User = get_user_model()
+        docente_group, _ = Group.objects.get_or_create(name="Docente")
+        subject_ids = list(Subject.objects.order_by("id").values_list("id", flat=True))
+        course_ids = list(Course.objects.order_by("id").values_list("id", flat=True))
+        role_ids = list(TeacherRole.objects.order_by("id").values_list("id", flat=True))
+        password = make_password("docente123")
+
+        teachers = []
+        for offset in range(0, total, self.batch_size):
+            user_id = _next_id(User)
+            profile_id = _next_id(TeacherProfile)
+            users, profiles, groups, subjects, courses, roles = [], [], [], [], [], []
+            for n in range(offset, min(offset + self.batch_size, total)):
+                username = f"{LOAD_USER_PREFIX}{n + 1:05d}"
+                users.append(User(
+                    id=user_id, username=username, email=f"{username}@colegio.cl", password=password,
+                    first_name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES),
+                ))
+                profiles.append(TeacherProfile(id=profile_id, user_id=user_id))
+                groups.append(User.groups.through(user_id=user_id, group_id=docente_group.id))
+                subjects.extend(
+                    TeacherProfile.subjects.through(teacherprofile_id=profile_id, subject_id=subject_id)
+                    for subject_id in _sample(self.rng, subject_ids, 1, 3)
+                )
+                courses.extend(
+                    TeacherProfile.courses.through(teacherprofile_id=profile_id, course_id=course_id)
+                    for course_id in _sample(self.rng, course_ids, 2, 6)
+                )
+                roles.extend(
+                    TeacherProfile.roles.through(teacherprofile_id=profile_id, teacherrole_id=role_id)
+                    for role_id in _sample(self.rng, role_ids, 0, 1)
+                )
+                teachers.append((user_id, username))
+                user_id += 1
+                profile_id += 1
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                TeacherProfile.objects.bulk_create(profiles)
+                User.groups.through.objects.bulk_create(groups)
+                TeacherProfile.subjects.through.objects.bulk_create(subjects)
+                TeacherProfile.courses.through.objects.bulk_create(courses)
+                TeacherProfile.roles.through.objects.bulk_create(roles)
+        return teachers
+
+    # Reservations -----------------------------------------------------------
+
+    def _reservations(self, rooms, inventory, teachers, opts):
+        """Fill days from ``anchor + future_days`` backwards until the requested volume is reached.
+
+        Each room walks its blocks and starts a 1–3 block reservation with a
+        probability tuned so that ``occupancy`` of the blocks end up taken, so
+        reservations never overlap and always start and end on block limits.
+        """
+        target = opts["reservations"]
+        mean_length = sum(length * weight for length, weight in LENGTH_WEIGHTS) / sum(w for _, w in LENGTH_WEIGHTS)
+        occupancy = opts["occupancy"]
+        start_probability = occupancy / (mean_length * (1 - occupancy) + occupancy)
+        lengths = [length for length, _ in LENGTH_WEIGHTS]
+        length_weights = list(accumulate(weight for _, weight in LENGTH_WEIGHTS))
+        # A few teachers book far more than the rest.
+        teacher_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(teachers))))
+        course_ids = list(Course.objects.order_by("id").values_list("id", flat=True)) or [None]
+        subject_ids = list(Subject.objects.order_by("id").values_list("id", flat=True)) or [None]
+        recurring = {
+            room.id: {
+                (self.rng.randint(0, 4), self.rng.randint(1, len(get_blocks_for_weekday(0))))
+                for _ in range(opts["recurring"])
+            }
+            for room in rooms
+        }
+        holiday_probability = opts["holidays_per_year"] / 250
+
+        batch = _Batch(_next_id(Reservation))
+        counts = {"reservations": 0, "items": 0, "holidays": 0, "recurring": 0}
+        day = self.anchor + timedelta(days=opts["future_days"])
+        last_date = first_date = day
+        while teachers and counts["reservations"] < target:
+            day -= timedelta(days=1)
+            blocks = get_blocks_for_weekday(day.weekday())
+            if not blocks:
+                continue
+            first_date = day
+            if self.rng.random() < holiday_probability:
+                batch.blackouts.append(Blackout(
+                    room=None, start_datetime=_aware(day, time(0, 0)), end_datetime=_aware(day, time(23, 59)),
+                    reason=f"{LOAD_HOLIDAY_REASON} {day.isoformat()}",
+                ))
+                counts["holidays"] += 1
+                continue
+            for room in rooms:
+                blocked = {index for weekday, index in recurring[room.id] if weekday == day.weekday()}
+                position = 0
+                while position < len(blocks) and counts["reservations"] < target:
+                    block = blocks[position]
+                    if block["index"] in blocked:
+                        counts["recurring"] += 1
+                        batch.blackouts.append(Blackout(
+                            room_id=room.id,
+                            start_datetime=_aware(day, block["start_time"]),
+                            end_datetime=_aware(day, block["end_time"]),
+                            reason=LOAD_RECURRING_REASON,
+                        ))
+                        position += 1
+                        continue
+                    factor = MORNING_FACTOR if block["index"] <= MORNING_LAST_BLOCK else AFTERNOON_FACTOR
+                    if self.rng.random() >= min(start_probability * factor, 0.95):
+                        position += 1
+                        continue
+                    length = self.rng.choices(lengths, cum_weights=length_weights)[0]
+                    span = []
+                    for candidate in blocks[position:position + length]:
+                        if candidate["index"] in blocked:
+                            break
+                        span.append(candidate)
+                    user_id, username = self.rng.choices(teachers, cum_weights=teacher_weights)[0]
+                    counts["items"] += self._add_reservation(
+                        batch, room.id, day, span, user_id, username, inventory[room.id],
+                        course_id=self.rng.choice(course_ids), subject_id=self.rng.choice(subject_ids),
+                    )
+                    counts["reservations"] += 1
+                    position += len(span)
+            if len(batch.reservations) >= self.batch_size:
+                batch.flush(self.batch_size)
+        batch.flush(self.batch_size)
+
+        counts["first_date"] = first_date
+        counts["last_date"] = last_date - timedelta(days=1)
+        return counts
+
+    def _add_reservation(self, batch, room_id, day, span, user_id, username, stock, *, course_id, subject_id):
+        start_time, end_time = span[0]["start_time"], span[-1]["end_time"]
+        finished = _aware(day, end_time) <= self.now
+        reservation_id = batch.next_id
+        batch.next_id += 1
+        batch.reservations.append(Reservation(
+            id=reservation_id, room_id=room_id, user_id=user_id, date=day, start_time=start_time, end_time=end_time,
+            course_id=course_id, subject_id=subject_id, inventory_released=finished,
+            created_at=_aware(day - timedelta(days=self.rng.randint(0, 30)), time(self.rng.randint(7, 20), 0)),
+        ))
+        batch.blackouts.append(Blackout(
+            room_id=room_id, start_datetime=_aware(day, start_time), end_datetime=_aware(day, end_time),
+            reason=f"{RESERVATION_BLACKOUT_PREFIX} {username}", created_by_id=user_id,
+        ))
+        batch.claims.extend(
+            RoomBlockClaim(room_id=room_id, date=day, block_index=block["index"], reservation_id=reservation_id)
+            for block in span
+        )
+
+        items = []
+        if stock and self.rng.random() < 0.45:
+            # Only one reservation holds a room block at a time, so the room stock caps each item.
+            for material_id, available in self.rng.sample(stock, min(len(stock), self.rng.randint(1, 3))):
+                quantity = self.rng.randint(1, min(available, 10))
+                items.append(ReservationItem(reservation_id=reservation_id, material_id=material_id, quantity=quantity))
+                if not finished:
+                    batch.usages.extend(
+                        MaterialBlockUsage(
+                            room_id=room_id, material_id=material_id, date=day,
+                            block_index=block["index"], reserved=quantity,
+                        )
+                        for block in span
+                    )
+        batch.items.extend(items)
+        return len(items)
+
+    # Housekeeping -----------------------------------------------------------
+
+    def _purge(self):
+        User = get_user_model()
+        with transaction.atomic():
+            load_users = User.objects.filter(username__startswith=LOAD_USER_PREFIX)
+            reservations, _ = Reservation.objects.filter(user__in=load_users).delete()
+            Blackout.objects.filter(
+                models.Q(reason__startswith=f"{RESERVATION_BLACKOUT_PREFIX} {LOAD_USER_PREFIX}")
+                | models.Q(reason__startswith=LOAD_HOLIDAY_REASON)
+                | models.Q(reason=LOAD_RECURRING_REASON)
+            ).delete()
+            Material.objects.filter(name__startswith=LOAD_MATERIAL_PREFIX).delete()
+            users, _ = load_users.delete()
+        self.stdout.write(f"Datos de carga anteriores eliminados ({reservations + users} filas).")
+
+    def _reset_sequences(self):
+        """Move auto-increment sequences past the explicit ids (a no-op on MySQL and SQLite)."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [get_user_model(), TeacherProfile, Reservation],
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+
+class _Batch:
+    """Rows waiting to be inserted; reservations carry explicit ids so their children can point at them."""
+
+    def __init__(self, next_id):
+        self.next_id = next_id
+        self.reservations = []
+        self.items = []
+        self.claims = []
+        self.usages = []
+        self.blackouts = []
+
+    def flush(self, batch_size):
+        with transaction.atomic():
+            Reservation.objects.bulk_create(self.reservations, batch_size=batch_size)
+            ReservationItem.objects.bulk_create(self.items, batch_size=batch_size)
+            RoomBlockClaim.objects.bulk_create(self.claims, batch_size=batch_size)
+            MaterialBlockUsage.objects.bulk_create(self.usages, batch_size=batch_size)
+            Blackout.objects.bulk_create(self.blackouts, batch_size=batch_size)
+        for rows in (self.reservations, self.items, self.claims, self.usages, self.blackouts):
+            rows.clear()
+
+
+def _aware(date_value, time_value):
+    value = datetime.combine(date_value, time_value)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=models.Max("id"))["top"] or 0) + 1
+
+
+def _sample(rng, values, low, high):
+    return rng.sample(values, min(len(values), rng.randint(low, high)))
@@ -0,0 +1,41 @@
+from collections import defaultdict
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from booking.dateutils import block_indexes_for_range
+from booking.models import MaterialBlockUsage, ReservationItem
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores de materiales por bloque a partir de las reservas vigentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-date", type=str, default=None, help="Fecha inicial (YYYY-MM-DD); por defecto hoy")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        from_date = date.fromisoformat(opts["from_date"]) if opts["from_date"] else timezone.localdate()
+
+        totals = defaultdict(int)
+        rows = (
+            ReservationItem.objects
+            .filter(reservation__date__gte=from_date, reservation__inventory_released=False)
+            .values_list(
+                "reservation__room_id", "material_id", "reservation__date",
+                "reservation__start_time", "reservation__end_time", "quantity",
+            )
+        )
+        for room_id, material_id, date_value, start, end, quantity in rows.iterator(chunk_size=opts["batch_size"]):
+            for block_index in block_indexes_for_range(date_value, start, end):
+                totals[(room_id, material_id, date_value, block_index)] += quantity
+
+        counters = [
+            MaterialBlockUsage(room_id=room_id, material_id=material_id, date=date_value, block_index=block_index, reserved=reserved)
+            for (room_id, material_id, date_value, block_index), reserved in totals.items()
+        ]
+        with transaction.atomic():
+            MaterialBlockUsage.objects.filter(date__gte=from_date).delete()
+            MaterialBlockUsage.objects.bulk_create(counters, batch_size=opts["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados: {len(counters)} desde {from_date}"))
@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from booking.admission import get_booking_admission, reset_booking_admission
+from booking.dateutils import get_blocks_for_weekday, max_reservation_date
+from booking.models import Reservation, Room
+from booking.services import BOOKING_TRANSACTION_METRICS
+
+USER_PREFIX = "rush_"
+
+
+class Command(BaseCommand):
+    help = "Simula la apertura diaria de reservas: N docentes envían la misma mañana a la vez"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submits", type=int, default=200)
+        parser.add_argument("--active", type=int, default=None, help="Reservas simultáneas admitidas (por defecto settings)")
+        parser.add_argument("--queue", type=int, default=None, help="Largo máximo de la cola")
+        parser.add_argument("--wait", type=float, default=None, help="Segundos máximos en cola")
+        parser.add_argument("--keep", action="store_true", help="No borrar usuarios ni reservas de la simulación")
+
+    def handle(self, *args, **opts):
+        rooms = list(Room.objects.order_by("code"))
+        if not rooms:
+            raise CommandError("No hay salones; ejecuta seed_data primero.")
+
+        target = max_reservation_date(timezone.localdate())
+        while target.weekday() > 4:
+            target -= timedelta(days=1)
+        blocks = get_blocks_for_weekday(target.weekday())
+
+        users = [
+            User.objects.get_or_create(username=f"{USER_PREFIX}{n:03d}")[0]
+            for n in range(opts["submits"])
+        ]
+
+        overrides = {
+            name: opts[key]
+            for key, name in (("active", "BOOKING_ADMISSION_ACTIVE"), ("queue", "BOOKING_ADMISSION_QUEUE"), ("wait", "BOOKING_ADMISSION_WAIT"))
+            if opts[key] is not None
+        }
+        results = []
+        results_lock = threading.Lock()
+        start_gate = threading.Barrier(len(users))
+
+        def submit(n, user):
+            # Everyone wants the first blocks of the newly opened day.
+            block = blocks[(n // len(rooms)) % min(len(blocks), 3)]
+            client = APIClient(HTTP_HOST="localhost")
+            client.force_authenticate(user)
+            start_gate.wait()
+            started = time.perf_counter()
+            try:
+                response = client.post("/api/reservations/", {
+                    "room": rooms[n % len(rooms)].id,
+                    "date": target.isoformat(),
+                    "start_time": block["start_str"],
+                    "end_time": block["end_str"],
+                    "items": [],
+                }, format="json")
+                outcome = response.status_code
+            except Exception as exc:
+                outcome = type(exc).__name__
+            finally:
+                connection.close()
+            with results_lock:
+                results.append((outcome, time.perf_counter() - started))
+
+        metrics_before = Counter(BOOKING_TRANSACTION_METRICS)
+        with override_settings(**overrides):
+            reset_booking_admission()
+            try:
+                threads = [threading.Thread(target=submit, args=(n, user)) for n, user in enumerate(users)]
+                wall_started = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                wall = time.perf_counter() - wall_started
+                admission = get_booking_admission().snapshot()
+            finally:
+                reset_booking_admission()
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(elapsed for _, elapsed in results)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        transactions = Counter(BOOKING_TRANSACTION_METRICS)
+        transactions.subtract(metrics_before)
+
+        self.stdout.write(f"Fecha objetivo: {target} ({len(users)} envíos, {wall:.2f}s)")
+        self.stdout.write(f"Creadas (201): {outcomes.pop(201, 0)}  Conflictos (400): {outcomes.pop(400, 0)}  En cola/rechazadas (503): {outcomes.pop(503, 0)}")
+        if outcomes:
+            self.stdout.write(self.style.WARNING(f"Otros resultados: {dict(outcomes)}"))
+        self.stdout.write(
+            f"Latencia p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {p95 * 1000:.0f} ms, máx {latencies[-1] * 1000:.0f} ms"
+        )
+        self.stdout.write(f"Admisión: {admission}")
+        self.stdout.write(f"Transacciones: {dict(+transactions)}")
+
+        if not opts["keep"]:
+            Reservation.objects.filter(user__username__startswith=USER_PREFIX).delete()
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS("Simulación terminada"))
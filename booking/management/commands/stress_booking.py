@@ -0,0 +1,302 @@
+import math
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from booking.admission import reset_booking_admission
+from booking.dateutils import get_blocks_for_weekday
+from booking.integrity import check_booking_invariants
+from booking.models import Blackout, Course, Material, Reservation, Room, RoomInventory, Subject
+from booking.services import BOOKING_TRANSACTION_METRICS
+
+USER_PREFIX = "stress_"
+STRESS_MATERIAL = "Material de estrés"
+# Every request asks for one or two of the first blocks of the day, so ranges overlap.
+CONTESTED_BLOCKS = 4
+# Share of requests for ranges that cut through the first block (08:00-08:20, 08:20-08:45, ...)
+# and for ranges on Friday afternoon, outside the block schedule; the rest are whole blocks.
+PARTIAL_SHARE = 0.25
+OFF_BLOCK_SHARE = 0.25
+OFF_BLOCK_RANGES = (("14:00", "15:00"), ("14:30", "15:30"), ("17:00", "18:00"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de estrés: hilos (y procesos) crean reservas superpuestas por la web y la API en los mismos "
+        "bloques y material (bloques completos, partes de un bloque y horarios fuera de los bloques), cancelan "
+        "la mitad, miden latencia y bloqueos, y verifican que no haya dobles reservas ni sobreventa"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Reservas a enviar en total")
+        parser.add_argument("--threads", type=int, default=20, help="Hilos por proceso")
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--rooms", type=int, default=1, help="Salones disputados")
+        parser.add_argument("--stock", type=int, default=4, help="Unidades del material disputado por salón")
+        parser.add_argument("--web-share", type=float, default=0.5, help="Fracción de envíos por el formulario web")
+        parser.add_argument("--seed", type=int, default=2024)
+        parser.add_argument("--keep", action="store_true", help="No borrar usuarios, reservas ni material de la prueba")
+
+    def handle(self, *args, **opts):
+        rooms = list(Room.objects.order_by("code")[:opts["rooms"]])
+        course = Course.objects.order_by("order", "name").first()
+        subject = Subject.objects.order_by("name").first()
+        if not rooms:
+            raise CommandError("No hay salones; ejecuta seed_data primero.")
+        if course is None or subject is None:
+            raise CommandError("Faltan cursos o asignaturas para el formulario web.")
+
+        target = timezone.localdate() + timedelta(days=1)
+        while target.weekday() > 4:
+            target += timedelta(days=1)
+        friday = target + timedelta(days=4 - target.weekday())
+
+        material, _ = Material.objects.get_or_create(name=STRESS_MATERIAL)
+        for room in rooms:
+            RoomInventory.objects.update_or_create(room=room, material=material, defaults={"quantity": opts["stock"]})
+        users = [
+            User.objects.get_or_create(username=f"{USER_PREFIX}{n:04d}")[0].pk
+            for n in range(opts["requests"])
+        ]
+        plan = _plan(opts, users, rooms, target, friday, material.pk, course.pk, subject.pk)
+        stress_reservations = Reservation.objects.filter(
+            user__username__startswith=USER_PREFIX, date__range=(target, friday),
+        )
+
+        self.stdout.write("Reservas:")
+        results = self._fire(plan, opts)
+        problems = self._check(target, friday, rooms)
+        created = sum(1 for outcome, _ in results if outcome == "created")
+        stored = stress_reservations.count()
+        if created != stored:
+            # Not a broken invariant: a request can fail after its booking committed.
+            self.stdout.write(self.style.WARNING(
+                f"Se informaron {created} reservas creadas pero hay {stored} en la base de datos"
+            ))
+
+        if not problems:
+            # Cancelling hands shared blocks over to the neighbours left in them.
+            self.stdout.write("Cancelaciones:")
+            self._fire(_cancel_plan(opts, stress_reservations), opts)
+            problems = self._check(target, friday, rooms)
+
+        if not opts["keep"]:
+            self._cleanup(material)
+        if problems:
+            raise CommandError(f"Invariantes violados: {len(problems)}")
+        self.stdout.write(self.style.SUCCESS("Invariantes OK: sin dobles reservas ni sobreventa de material"))
+
+    def _fire(self, plan, opts):
+        # Children must open their own connections; a shared socket would corrupt both sides.
+        connections.close_all()
+        wall_started = time.perf_counter()
+        if opts["processes"] > 1:
+            chunks = [plan[n::opts["processes"]] for n in range(opts["processes"])]
+            with multiprocessing.get_context("fork").Pool(opts["processes"]) as pool:
+                partials = pool.starmap(_run_chunk, [(chunk, opts["threads"]) for chunk in chunks])
+        else:
+            partials = [_run_chunk(plan, opts["threads"])]
+        wall = time.perf_counter() - wall_started
+
+        results = [result for partial_results, _ in partials for result in partial_results]
+        transactions = Counter()
+        for _, metrics in partials:
+            transactions.update(metrics)
+        self._report(results, transactions, wall)
+        return results
+
+    def _check(self, target, friday, rooms):
+        problems = check_booking_invariants(start_date=target, end_date=friday, room_ids=[room.pk for room in rooms])
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(problem))
+        return problems
+
+    def _report(self, results, transactions, wall):
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(elapsed for _, elapsed in results)
+        self.stdout.write(
+            f"{len(results)} envíos en {wall:.2f}s: {len(results) / wall:.1f} envíos/s, "
+            f"{(outcomes['created'] + outcomes['cancelled']) / wall:.1f} reservas creadas o canceladas/s"
+        )
+        self.stdout.write(f"Resultados: {dict(outcomes)}")
+        if latencies:
+            self.stdout.write(
+                f"Latencia p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                f"p95 {_percentile(latencies, 0.95) * 1000:.0f} ms, "
+                f"p99 {_percentile(latencies, 0.99) * 1000:.0f} ms, máx {latencies[-1] * 1000:.0f} ms"
+            )
+        self.stdout.write(
+            f"Bloqueos (deadlock/lock wait): {transactions['lock_errors']}, reintentos: {transactions['retries']}, "
+            f"agotados: {transactions['exhausted']}, confirmadas: {transactions['committed']}"
+        )
+
+    def _cleanup(self, material):
+        usernames = User.objects.filter(username__startswith=USER_PREFIX)
+        Reservation.objects.filter(user__in=usernames).delete()
+        Blackout.objects.filter(created_by__in=usernames).delete()
+        usernames.delete()
+        material.delete()
+
+
+def _plan(opts, users, rooms, target, friday, material_id, course_id, subject_id):
+    """Decide up front what each request asks for, so a seed replays the same contention."""
+    rng = random.Random(opts["seed"])
+    blocks = get_blocks_for_weekday(target.weekday())[:CONTESTED_BLOCKS]
+    partial_ranges = _partial_ranges(blocks[0])
+    plan = []
+    for user_id in users:
+        shape = rng.random()
+        day = target
+        if shape < PARTIAL_SHARE:
+            start_time, end_time = rng.choice(partial_ranges)
+        elif shape < PARTIAL_SHARE + OFF_BLOCK_SHARE:
+            day = friday
+            start_time, end_time = rng.choice(OFF_BLOCK_RANGES)
+        else:
+            first = rng.randrange(len(blocks))
+            last = min(first + rng.randint(0, 1), len(blocks) - 1)
+            start_time, end_time = blocks[first]["start_str"], blocks[last]["end_str"]
+        plan.append({
+            "user_id": user_id,
+            "web": rng.random() < opts["web_share"],
+            "room": rng.choice(rooms).pk,
+            "date": day.isoformat(),
+            "start_time": start_time,
+            "end_time": end_time,
+            "material_id": material_id,
+            "quantity": rng.randint(1, max(opts["stock"], 1)),
+            "course": course_id,
+            "subject": subject_id,
+        })
+    return plan
+
+
+def _partial_ranges(block):
+    """Two ranges that split ``block`` without overlapping, and one that overlaps both."""
+    def shifted(minutes):
+        return (datetime.combine(datetime.min, block["start_time"]) + timedelta(minutes=minutes)).strftime("%H:%M")
+
+    return [(block["start_str"], shifted(20)), (shifted(20), block["end_str"]), (shifted(10), shifted(30))]
+
+
+def _cancel_plan(opts, reservations):
+    """Cancel half of the stored reservations, each by its owner, through the web or the API."""
+    rng = random.Random(opts["seed"])
+    owned = list(reservations.order_by("id").values_list("pk", "user_id"))
+    return [
+        {"cancel": pk, "user_id": user_id, "web": rng.random() < opts["web_share"]}
+        for pk, user_id in rng.sample(owned, len(owned) // 2)
+    ]
+
+
+def _run_chunk(plan, thread_count):
+    """Fire ``plan`` from ``thread_count`` threads released together; returns results and retry metrics."""
+    reset_booking_admission()
+    metrics_before = Counter(BOOKING_TRANSACTION_METRICS)
+    pending = list(plan)
+    pending_lock = threading.Lock()
+    results = []
+    results_lock = threading.Lock()
+    start_gate = threading.Barrier(max(min(thread_count, len(plan)), 1))
+
+    def worker():
+        start_gate.wait()
+        try:
+            while True:
+                with pending_lock:
+                    if not pending:
+                        return
+                    request = pending.pop()
+                started = time.perf_counter()
+                try:
+                    outcome = _submit(request)
+                except Exception as exc:
+                    outcome = type(exc).__name__
+                with results_lock:
+                    results.append((outcome, time.perf_counter() - started))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(max(min(thread_count, len(plan)), 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = Counter(BOOKING_TRANSACTION_METRICS)
+    metrics.subtract(metrics_before)
+    return results, +metrics
+
+
+def _submit(request):
+    user = User.objects.get(pk=request["user_id"])
+    if "cancel" in request:
+        return _submit_cancel(request, user)
+    if request["web"]:
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user)
+        response = client.post(reverse("reservation_create"), {
+            "room": request["room"],
+            "date": request["date"],
+            "start_time": request["start_time"],
+            "end_time": request["end_time"],
+            "course": request["course"],
+            "subject": request["subject"],
+            f"qty_{request['material_id']}": request["quantity"],
+        })
+        if response.status_code == 302:
+            return "created" if response["Location"] == reverse("index") else "rejected"
+        return _other(response)
+
+    client = APIClient(HTTP_HOST="localhost")
+    client.force_authenticate(user)
+    response = client.post("/api/reservations/", {
+        "room": request["room"],
+        "date": request["date"],
+        "start_time": request["start_time"],
+        "end_time": request["end_time"],
+        "items": [{"material_id": request["material_id"], "quantity": request["quantity"]}],
+    }, format="json")
+    if response.status_code == 201:
+        return "created"
+    if response.status_code == 400:
+        return "rejected"
+    return _other(response)
+
+
+def _submit_cancel(request, user):
+    if request["web"]:
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user)
+        response = client.post(reverse("reservation_cancel", args=[request["cancel"]]))
+        if response.status_code != 302:
+            return _other(response)
+    else:
+        client = APIClient(HTTP_HOST="localhost")
+        client.force_authenticate(user)
+        response = client.delete(f"/api/reservations/{request['cancel']}/")
+        if response.status_code != 204:
+            return _other(response)
+    # The web form redirects on failure too; the row tells whether it went.
+    return "rejected" if Reservation.objects.filter(pk=request["cancel"]).exists() else "cancelled"
+
+
+def _other(response):
+    # 503 is the admission queue or an exhausted retry; anything else is a bug worth seeing.
+    return "busy" if response.status_code == 503 else f"status_{response.status_code}"
+
+
+def _percentile(ordered, fraction):
+    return ordered[max(math.ceil(len(ordered) * fraction) - 1, 0)]
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from booking.caching import REFERENCE_CACHE, cached_materials, cached_registration_metadata, cached_rooms
+from booking.monthgrid import month_grid, render_day_cells
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalienta el caché compartido: salones, materiales, metadatos de registro y los calendarios "
+        "mensuales (datos y HTML de cada día) del mes actual y los siguientes, en paralelo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=2, help="Meses de calendario a preparar, desde el actual")
+        parser.add_argument("--threads", type=int, default=4)
+
+    def handle(self, *args, **opts):
+        if settings.CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+            self.stdout.write(self.style.WARNING(
+                "El caché es locmem: lo preparado aquí no llega a los procesos del servidor"
+            ))
+        today = timezone.localdate()
+        first = today.replace(day=1)
+        tasks = {"salones": cached_rooms, "materiales": cached_materials, "metadatos de registro": cached_registration_metadata}
+        for offset in range(max(opts["months"], 0)):
+            month = date(first.year + (first.month - 1 + offset) // 12, (first.month - 1 + offset) % 12 + 1, 1)
+            tasks[f"calendario {month:%Y-%m}"] = _month_task(month, today)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(opts["threads"], 1)) as pool:
+            futures = {name: pool.submit(_run, task) for name, task in tasks.items()}
+        failed = 0
+        for name, future in futures.items():
+            error, elapsed = future.result()
+            if error is None:
+                self.stdout.write(f"{name}: {elapsed * 1000:.0f} ms")
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"{name}: {error}"))
+
+        summary = f"{len(tasks) - failed} de {len(tasks)} entradas listas en {time.perf_counter() - started:.2f}s ({dict(REFERENCE_CACHE.stats)})"
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
+
+
+def _month_task(month, today):
+    return lambda: render_day_cells(month_grid(month, today))
+
+
+def _run(task):
+    """Build one entry in a pool thread; errors are reported, not raised, so one failure spares the rest."""
+    started = time.perf_counter()
+    try:
+        task()
+        return None, time.perf_counter() - started
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}", time.perf_counter() - started
+    finally:
+        connection.close()
@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from math import ceil
+
+from django.conf import settings
+
+_current = ContextVar('booking_request_metrics', default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:\?, )*\?\)")
+_SPACES = re.compile(r"\s+")
+
+
+def sql_fingerprint(sql):
+    """Reduce a statement to its shape so the same query with other values groups together."""
+    shape = _LITERALS.sub('?', sql)
+    shape = _IN_LISTS.sub('IN (...)', shape.replace('%s', '?'))
+    return _SPACES.sub(' ', shape).strip()
+
+
+class RequestMetrics:
+    """What one request spent in the database and in templates; filled while it runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        self.statements = Counter()
+        self.fingerprints = Counter()
+
+    @property
+    def duplicate_queries(self):
+        """Queries that repeated an earlier statement with the very same parameters."""
+        return self.queries - len(self.statements)
+
+    def repeated_fingerprints(self, limit=3):
+        return [(shape, count) for shape, count in self.fingerprints.most_common(limit) if count > 1]
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with ``connection.execute_wrapper`` for the length of the request.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.statements[(sql, repr(params))] += 1
+            self.fingerprints[sql_fingerprint(sql)] += 1
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request_metrics(token):
+    metrics = _current.get()
+    _current.reset(token)
+    metrics.wall_ms = (time.perf_counter() - metrics.started) * 1000
+    return metrics
+
+
+def record_template_time(elapsed_ms):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_ms += elapsed_ms
+
+
+class ViewStats:
+    def __init__(self, window):
+        self.wall_ms = deque(maxlen=window)
+        self.totals = Counter()
+
+
+class MetricsRegistry:
+    """Rolling per-view latencies plus running totals, shared by every thread of the process."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, metrics, *, status, slow):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = ViewStats(self.window)
+            stats.wall_ms.append(metrics.wall_ms)
+            stats.totals.update({
+                'requests': 1,
+                'errors': int(status >= 500),
+                'slow': int(slow),
+                'queries': metrics.queries,
+                'duplicate_queries': metrics.duplicate_queries,
+                'wall_ms': metrics.wall_ms,
+                'db_ms': metrics.db_ms,
+                'template_ms': metrics.template_ms,
+            })
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def snapshot(self):
+        """Per-view summary rows, slowest p95 first."""
+        with self._lock:
+            views = {view: (sorted(stats.wall_ms), Counter(stats.totals)) for view, stats in self._views.items()}
+        rows = []
+        for view, (samples, totals) in views.items():
+            requests = totals['requests'] or 1
+            rows.append({
+                'view': view,
+                'requests': totals['requests'],
+                'errors': totals['errors'],
+                'slow': totals['slow'],
+                'p50_ms': _percentile(samples, 0.5),
+                'p95_ms': _percentile(samples, 0.95),
+                'p99_ms': _percentile(samples, 0.99),
+                'max_ms': samples[-1] if samples else 0.0,
+                'avg_queries': totals['queries'] / requests,
+                'avg_duplicate_queries': totals['duplicate_queries'] / requests,
+                'avg_db_ms': totals['db_ms'] / requests,
+                'avg_template_ms': totals['template_ms'] / requests,
+                'totals': totals,
+            })
+        rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+        return rows
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[max(ceil(fraction * len(ordered)) - 1, 0)]
+
+
+REQUEST_METRICS = MetricsRegistry(window=getattr(settings, 'PERF_METRICS_WINDOW', 500))
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(rows, booking_transactions=None):
+    """Render the snapshot in the Prometheus text exposition format."""
+    lines = [
+        '# HELP salones_request_duration_seconds Request wall time per view over the rolling window.',
+        '# TYPE salones_request_duration_seconds summary',
+    ]
+    for row in rows:
+        view = _label(row['view'])
+        for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+            lines.append(f'salones_request_duration_seconds{{view="{view}",quantile="{quantile}"}} {row[key] / 1000:.6f}')
+        lines.append(f'salones_request_duration_seconds_sum{{view="{view}"}} {row["totals"]["wall_ms"] / 1000:.6f}')
+        lines.append(f'salones_request_duration_seconds_count{{view="{view}"}} {row["requests"]}')
+
+    counters = (
+        ('salones_requests_errors_total', 'Requests answered with a 5xx status.', 'errors', 1),
+        ('salones_requests_slow_total', 'Requests over PERF_SLOW_REQUEST_MS.', 'slow', 1),
+        ('salones_request_queries_total', 'SQL queries run by requests.', 'queries', 1),
+        ('salones_request_duplicate_queries_total', 'Repeated identical SQL queries.', 'duplicate_queries', 1),
+        ('salones_request_db_seconds_total', 'Time spent in SQL queries.', 'db_ms', 1000),
+        ('salones_request_template_seconds_total', 'Time spent rendering templates.', 'template_ms', 1000),
+    )
+    for name, help_text, key, divisor in counters:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for row in rows:
+            lines.append(f'{name}{{view="{_label(row["view"])}"}} {round(row["totals"][key] / divisor, 6)}')
+
+    if booking_transactions:
+        lines.append('# HELP salones_booking_transactions_total Booking transaction outcomes.')
+        lines.append('# TYPE salones_booking_transactions_total counter')
+        for outcome, value in sorted(booking_transactions.items()):
+            lines.append(f'salones_booking_transactions_total{{outcome="{_label(outcome)}"}} {value}')
+    return '\n'.join(lines) + '\n'
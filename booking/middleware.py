@@ -0,0 +1,134 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.middleware.gzip import GZipMiddleware
+
+from .metrics import REQUEST_METRICS, finish_request_metrics, start_request_metrics
+from .profiling import (
+    PROFILE_HEADER, PROFILE_PARAM, ProfileLimiter, check_profile_token, profile_request, store_profile_report,
+)
+
+logger = logging.getLogger('booking.performance')
+
+
+class RequestMetricsMiddleware:
+    """Time every request, count its queries and feed the per-view rolling stats.
+
+    Requests slower than ``PERF_SLOW_REQUEST_MS`` are logged together with the
+    SQL shapes they repeated most, which is usually where an N+1 hides.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 500)
+
+    def __call__(self, request):
+        metrics, token = start_request_metrics()
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else '') or 'unresolved'
+        slow = metrics.wall_ms >= self.slow_ms
+        REQUEST_METRICS.record(view, metrics, status=response.status_code, slow=slow)
+        if slow:
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, db %.0f ms in %s queries (%s duplicated), templates %.0f ms; "
+                "repeated SQL: %s",
+                request.method, request.path, view, metrics.wall_ms, metrics.db_ms, metrics.queries,
+                metrics.duplicate_queries, metrics.template_ms,
+                '; '.join(f'{count}x {shape[:200]}' for shape, count in metrics.repeated_fingerprints()) or '-',
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile a single request for a library admin who presents a signed token.
+
+    The token comes from ``/panel/metrics/`` in the ``_profile`` query parameter
+    or the ``X-Profile-Token`` header and is bound to the admin and the path.
+    Instead of the page, the response is a plain-text report of the hottest
+    functions, SQL shapes and allocations. ``ProfileLimiter`` keeps it to one
+    profile at a time and ``PROFILING_MAX_PER_HOUR`` per process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limiter = ProfileLimiter(getattr(settings, 'PROFILING_MAX_PER_HOUR', 20))
+
+    def __call__(self, request):
+        token = request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+        if not token or not getattr(settings, 'PROFILING_ENABLED', True):
+            return self.get_response(request)
+
+        from .views import is_library_admin
+
+        if not is_library_admin(request.user) or not check_profile_token(token, request.user, request.path):
+            return HttpResponseForbidden("Token de perfilado inválido o vencido.", content_type='text/plain; charset=utf-8')
+        retry_after = self.limiter.acquire()
+        if retry_after:
+            response = HttpResponse(
+                "Se alcanzó el límite de perfilados; intenta más tarde.",
+                status=429, content_type='text/plain; charset=utf-8',
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+        try:
+            original, report = profile_request(request, self.get_response)
+        finally:
+            self.limiter.release()
+        store_profile_report(report, request)
+        response = HttpResponse(report, content_type='text/plain; charset=utf-8')
+        response['X-Profiled-Status'] = str(original.status_code)
+        return response
+
+
+class SlidingSessionMiddleware:
+    """Extend a session's expiry without saving it on every request.
+
+    Replaces ``SESSION_SAVE_EVERY_REQUEST``: an unchanged session is only
+    written again once ``SESSION_REFRESH_FRACTION`` of ``SESSION_COOKIE_AGE``
+    has passed since its last save, which renews its expiry. Must sit after
+    ``SessionMiddleware`` so it runs before the session is saved.
+    """
+
+    STAMP_KEY = '_refreshed_at'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty():
+            return response
+
+        now = int(time.time())
+        if session.modified:
+            session[self.STAMP_KEY] = now
+            return response
+        interval = settings.SESSION_COOKIE_AGE * getattr(settings, 'SESSION_REFRESH_FRACTION', 0.25)
+        if now - session.get(self.STAMP_KEY, 0) >= interval:
+            session[self.STAMP_KEY] = now
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Gzip text responses (HTML, JSON, CSS, JS, plain text); streaming ones are compressed as they stream.
+
+    Images and files WhiteNoise already serves pre-compressed are left alone,
+    so no CPU goes into squeezing JPEGs.
+    """
+
+    COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith(self.COMPRESSIBLE_TYPES):
+            return response
+        return super().process_response(request, response)
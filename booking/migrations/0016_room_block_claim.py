@@ -0,0 +1,27 @@
+# Generated by Django 5.0.7 on 2026-10-19 06:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0015_update_module_subject_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomBlockClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('block_index', models.PositiveSmallIntegerField()),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_claims', to='booking.reservation')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.room')),
+            ],
+            options={
+                'unique_together': {('room', 'date', 'block_index')},
+            },
+        ),
+    ]
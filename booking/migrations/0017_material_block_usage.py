@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 06:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0016_room_block_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialBlockUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('block_index', models.PositiveSmallIntegerField()),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.material')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.room')),
+            ],
+            options={
+                'unique_together': {('room', 'material', 'date', 'block_index')},
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from django.conf import settings
 
+from .dateutils import block_indexes_for_range
+
 class Room(models.Model):
     code = models.CharField(max_length=1, unique=True)  # 'A', 'B', 'C'
     def __str__(self): return self.code
@@ -38,6 +41,7 @@ class Reservation(models.Model):
 
         self.inventory_released = True
         self.save(update_fields=['inventory_released'])
+        MaterialBlockUsage.release(self, self.items.all() if items is None else items)
 
         return True
 
@@ -46,6 +50,82 @@ class ReservationItem(models.Model):
     material = models.ForeignKey(Material, on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField(default=1)
 
+class RoomBlockClaim(models.Model):
+    """A (room, date, block) taken by a reservation; the unique index rejects double bookings."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    date = models.DateField()
+    block_index = models.PositiveSmallIntegerField()
+    reservation = models.ForeignKey(Reservation, related_name="block_claims", on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ("room", "date", "block_index")
+
+    def __str__(self):
+        return f"Salón {self.room_id} {self.date} bloque {self.block_index}"
+
+class MaterialBlockUsage(models.Model):
+    """Units of a material reserved in one block of a room, kept as an atomic counter."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    material = models.ForeignKey(Material, on_delete=models.CASCADE)
+    date = models.DateField()
+    block_index = models.PositiveSmallIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("room", "material", "date", "block_index")
+
+    def __str__(self):
+        return f"{self.material_id} en salón {self.room_id} {self.date} bloque {self.block_index}: {self.reserved}"
+
+    @classmethod
+    def release(cls, reservation, items):
+        """Give back the units a reservation holds in each of its blocks."""
+        block_indexes = block_indexes_for_range(reservation.date, reservation.start_time, reservation.end_time)
+        for item in sorted(items, key=lambda entry: entry.material_id):
+            cls.objects.filter(
+                room_id=reservation.room_id,
+                material_id=item.material_id,
+                date=reservation.date,
+                block_index__in=block_indexes,
+                reserved__gte=item.quantity,
+            ).update(reserved=F('reserved') - item.quantity)
+
+class ReservationHold(models.Model):
+    """Short-lived hold on a room time range while a teacher fills the reservation form."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservation_holds')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    # {material_id: quantity} requested when the hold was placed
+    materials = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["room", "date"])]
+
+    def __str__(self):
+        return f"Retención {self.room_id} {self.date} {self.start_time}-{self.end_time} hasta {self.expires_at}"
+
+class IdempotencyRecord(models.Model):
+    """Stored outcome of a booking submit, replayed when the same key is sent again."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    scope = models.CharField(max_length=40)
+    # sha256 of the client key, so long keys stay compact
+    key_hash = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64, blank=True)
+    # Null while the original request is still running
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("user", "scope", "key_hash")
+
+    def __str__(self):
+        return f"{self.scope} {self.key_hash[:12]} ({self.status_code or 'en curso'})"
+
 class Blackout(models.Model):
     room = models.ForeignKey(Room, null=True, blank=True, on_delete=models.CASCADE)
     start_datetime = models.DateTimeField()
@@ -84,6 +164,15 @@ class Blackout(models.Model):
     def __str__(self):
         return f"{self.display_scope}: {self.start_datetime}-{self.end_datetime} ({self.reason})"
 
+    def delete(self, *args, **kwargs):
+        # Blackout has no post_delete receiver: one would add a SELECT to every queryset delete of
+        # shadow blackouts on the booking path. Deletes the calendar can show come through here.
+        from .caching import bump_generation_on_change
+
+        result = super().delete(*args, **kwargs)
+        bump_generation_on_change(Blackout)
+        return result
+
 
 class Notification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
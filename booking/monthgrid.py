@@ -0,0 +1,324 @@
+import calendar
+import hashlib
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .caching import REFERENCE_CACHE, cached_rooms
+from .dateutils import get_blocks_for_weekday
+from .models import Blackout, Course, Reservation, Room, Subject
+
+WEEKDAY_NAMES = ['Lun', 'Mar', 'Mie', 'Jue', 'Vie']
+
+# Everything the month grid shows comes from these models (see BookingConfig.ready).
+CALENDAR_MODELS = (Reservation, Blackout, Room, Course, Subject, User)
+
+# One day of the grid, rendered by either engine (CALENDAR_TEMPLATE_ENGINE) from this one file.
+DAY_TEMPLATE = 'reservations/calendar_day.html'
+
+
+def month_bounds(display_date):
+    """First and last weekday shown for ``display_date``'s month: whole Monday-Friday weeks."""
+    first_of_month = display_date
+    first_workday = first_of_month
+    while first_workday.month == display_date.month and first_workday.weekday() >= 5:
+        first_workday += timedelta(days=1)
+    if first_workday.month != display_date.month:
+        first_workday = first_of_month
+
+    if first_workday.weekday() == 0 and first_of_month.weekday() >= 5:
+        start_date = first_workday
+    else:
+        start_date = first_workday - timedelta(days=first_workday.weekday())
+
+    last_day = date(display_date.year, display_date.month, calendar.monthrange(display_date.year, display_date.month)[1])
+    last_workday = last_day
+    while last_workday.month == display_date.month and last_workday.weekday() >= 5:
+        last_workday -= timedelta(days=1)
+    if last_workday.month != display_date.month:
+        last_workday = last_day
+
+    if last_workday.weekday() < 4:
+        end_date = last_workday + timedelta(days=(4 - last_workday.weekday()))
+    else:
+        end_date = last_workday
+    return start_date, end_date
+
+
+def month_grid(display_date, today=None, rooms=None):
+    """Weeks of the monthly calendar, cached until a reservation, blackout or reference row changes."""
+    today = today or timezone.localdate()
+    rooms = cached_rooms() if rooms is None else rooms
+    return REFERENCE_CACHE.get_or_build(
+        f'month_grid:{display_date:%Y-%m}:{today.isoformat()}',
+        CALENDAR_MODELS,
+        lambda: build_month_grid(display_date, today, rooms),
+    )
+
+
+def build_month_grid(display_date, today, rooms):
+    start_date, end_date = month_bounds(display_date)
+
+    reservations_qs = (
+        Reservation.objects
+        .select_related('room', 'user', 'course', 'subject')
+        .filter(date__gte=start_date, date__lte=end_date)
+        .order_by('date', 'start_time')
+    )
+
+    reservations_by_day = defaultdict(lambda: defaultdict(list))
+    for reservation in reservations_qs:
+        reservations_by_day[reservation.date][reservation.room.code].append(reservation)
+
+    tz = timezone.get_current_timezone()
+
+    def to_local(dt):
+        if timezone.is_naive(dt):
+            return timezone.make_aware(dt, tz)
+        return timezone.localtime(dt)
+
+    blackout_range_start = datetime.combine(start_date, time.min)
+    blackout_range_end = datetime.combine(end_date + timedelta(days=1), time.min)
+
+    blackouts_qs = (
+        Blackout.objects.select_related('room')
+        .filter(start_datetime__lt=blackout_range_end, end_datetime__gt=blackout_range_start)
+        .exclude(reason__startswith='Reserva de')
+        .order_by('start_datetime')
+    )
+
+    variant_order = {'holiday': 0, 'general': 1, 'room': 2}
+    blackouts_by_day = defaultdict(list)
+    room_blackouts_by_day = defaultdict(lambda: defaultdict(list))
+    for blackout in blackouts_qs:
+        start_dt = to_local(blackout.start_datetime)
+        end_dt = to_local(blackout.end_datetime)
+        current = max(start_dt.date(), start_date)
+        last = min(end_dt.date(), end_date)
+        reason_text = (blackout.reason or '').strip()
+        while current <= last:
+            if current == start_dt.date() and current == end_dt.date():
+                time_label = f"{start_dt:%H:%M} - {end_dt:%H:%M}"
+            elif current == start_dt.date():
+                time_label = f"Desde {start_dt:%H:%M}"
+            elif current == end_dt.date():
+                time_label = f"Hasta {end_dt:%H:%M}"
+            else:
+                time_label = "Todo el día"
+            blackouts_by_day[current].append({
+                'scope': blackout.display_scope,
+                'type': blackout.display_type,
+                'variant': blackout.style_variant,
+                'reason': reason_text,
+                'from_reservation': reason_text.startswith('Reserva de'),
+                'time_label': time_label,
+            })
+            if blackout.room_id:
+                day_start_time = start_dt.time() if current == start_dt.date() else time.min
+                day_end_time = end_dt.time() if current == end_dt.date() else time.max
+                if day_end_time > day_start_time:
+                    room_blackouts_by_day[current][blackout.room.code].append({
+                        'scope': blackout.display_scope,
+                        'reason': reason_text,
+                        'time_label': time_label,
+                        'start': day_start_time,
+                        'end': day_end_time,
+                    })
+            current += timedelta(days=1)
+
+    for day_key, items in blackouts_by_day.items():
+        items.sort(key=lambda item: (variant_order.get(item['variant'], 99), item['scope']))
+    for day_key, room_map in room_blackouts_by_day.items():
+        for room_code, entries in room_map.items():
+            entries.sort(key=lambda item: item['start'])
+
+    weeks = []
+    current_week_start = start_date
+    while current_week_start <= end_date:
+        week_days = []
+        for day_offset in range(5):
+            day = current_week_start + timedelta(days=day_offset)
+            daily_map = reservations_by_day.get(day, {})
+            day_blocks = get_blocks_for_weekday(day.weekday())
+            room_blocks = []
+
+            day_room_blackouts = room_blackouts_by_day.get(day, {})
+
+            for room in rooms:
+                room_reservations = sorted(
+                    daily_map.get(room.code, []),
+                    key=lambda r: r.start_time
+                )
+                room_blackouts = day_room_blackouts.get(room.code, [])
+
+                def serialize_reservation(reservation):
+                    if reservation.user:
+                        full_name = (reservation.user.get_full_name() or '').strip()
+                        teacher_name = full_name or reservation.user.username
+                    else:
+                        teacher_name = 'Sin usuario'
+                    return {
+                        'teacher': teacher_name,
+                        'course': reservation.course.name if reservation.course else '',
+                        'subject': reservation.subject.name if reservation.subject else '',
+                        'time_range': f"{reservation.start_time.strftime('%H:%M')} - {reservation.end_time.strftime('%H:%M')}",
+                    }
+
+                formatted_entries = [serialize_reservation(res) for res in room_reservations]
+
+                block_entries = []
+                for block_def in day_blocks:
+                    block_info = {
+                        'index': block_def['index'],
+                        'label': block_def['label'],
+                        'time_label': f"{block_def['start_str']} - {block_def['end_str']}",
+                        'status': 'available',
+                    }
+                    matching_blackout = next(
+                        (
+                            blk for blk in room_blackouts
+                            if blk['start'] < block_def['end_time']
+                            and blk['end'] > block_def['start_time']
+                        ),
+                        None
+                    )
+                    if matching_blackout:
+                        block_info['status'] = 'blackout'
+                        block_info['blackout'] = matching_blackout
+                    else:
+                        matching_reservation = next(
+                            (
+                                res for res in room_reservations
+                                if res.start_time < block_def['end_time']
+                                and res.end_time > block_def['start_time']
+                            ),
+                            None
+                        )
+                        if matching_reservation:
+                            block_info['status'] = 'reserved'
+                            block_info['reservation'] = serialize_reservation(matching_reservation)
+                    block_entries.append(block_info)
+
+                room_blocks.append({
+                    'room': room,
+                    'reservations': formatted_entries,
+                    'blocks': block_entries,
+                    'reserved_blocks': [item for item in block_entries if item['status'] == 'reserved'],
+                    'available_blocks': [item for item in block_entries if item['status'] == 'available'],
+                    'block_map': {item['index']: item for item in block_entries},
+                    'has_block_schedule': bool(day_blocks),
+                })
+            day_blackouts = blackouts_by_day.get(day, [])
+
+            full_block_blackouts = [item for item in day_blackouts if item['variant'] in ('holiday', 'general')]
+            room_level_blackouts = [item for item in day_blackouts if item['variant'] == 'room']
+
+            is_full_day_block = bool(full_block_blackouts)
+
+            room_schedules_map = {rb['room'].code: {'room': rb['room'], 'blocks': [], 'has_content': False} for rb in room_blocks}
+            block_schedule = []
+            if room_blocks and day_blocks and not is_full_day_block:
+                for block_def in day_blocks:
+                    schedule_row = {
+                        'index': block_def['index'],
+                        'label': block_def['label'],
+                        'time_label': f"{block_def['start_str']} - {block_def['end_str']}",
+                        'rooms': [],
+                    }
+                    has_visible_room = False
+                    for room_block in room_blocks:
+                        block_info = room_block['block_map'].get(block_def['index'], {})
+                        status = block_info.get('status', 'available')
+                        schedule_row['rooms'].append({
+                            'room_code': room_block['room'].code,
+                            'status': status,
+                            'reservation': block_info.get('reservation'),
+                        })
+                        room_entry = room_schedules_map[room_block['room'].code]
+                        if status != 'blackout':
+                            has_visible_room = True
+                            room_entry['blocks'].append({
+                                'label': block_def['label'],
+                                'time_label': f"{block_def['start_str']} - {block_def['end_str']}",
+                                'status': status,
+                                'reservation': block_info.get('reservation'),
+                            })
+                            room_entry['has_content'] = True
+                    if has_visible_room:
+                        block_schedule.append(schedule_row)
+            room_schedules = []
+            if not is_full_day_block and room_schedules_map:
+                for room in rooms:
+                    entry = room_schedules_map.get(room.code)
+                    if entry and entry['has_content']:
+                        room_schedules.append({
+                            'room': entry['room'],
+                            'blocks': entry['blocks'],
+                            'is_first': not room_schedules,
+                        })
+
+            week_days.append({
+                'date': day,
+                'iso_date': day.isoformat(),
+                'in_month': day.month == display_date.month,
+                'is_today': day == today,
+                'is_weekend': day.weekday() >= 5,
+                'weekday_label': WEEKDAY_NAMES[day.weekday()],
+                'room_blocks': [] if is_full_day_block else room_blocks,
+                'blackouts': room_level_blackouts if not is_full_day_block else [],
+                'full_block_blackouts': full_block_blackouts,
+                'is_holiday': any(item['variant'] == 'holiday' for item in full_block_blackouts),
+                'has_blackouts': bool(day_blackouts),
+                'is_full_day_block': is_full_day_block,
+                'block_schedule': block_schedule,
+                'has_schedule': bool(block_schedule),
+                'schedule_rooms': [rb['room'] for rb in room_blocks] if not is_full_day_block else [],
+                'room_schedules': room_schedules,
+            })
+            week_days[-1]['version'] = _day_version(week_days[-1])
+
+        weeks.append(week_days)
+        current_week_start += timedelta(days=7)
+    return weeks
+
+
+def _day_version(day):
+    """Digest of everything the day cell shows: equal digests render equal HTML."""
+    visible = (
+        day['in_month'], day['is_today'], day['is_full_day_block'], day['full_block_blackouts'], day['blackouts'],
+        [(schedule['room'].code, schedule['blocks']) for schedule in day['room_schedules']],
+    )
+    return hashlib.sha1(repr(visible).encode()).hexdigest()[:16]
+
+
+def _day_template():
+    engine = getattr(settings, 'CALENDAR_TEMPLATE_ENGINE', 'django')
+    return get_template(DAY_TEMPLATE, using=None if engine == 'django' else engine)
+
+
+@lru_cache(maxsize=None)
+def _template_digest(path):
+    # Part of every fragment key, so a deploy that edits the cell template does not serve old cells.
+    with open(path, 'rb') as source:
+        return hashlib.sha1(source.read()).hexdigest()[:8]
+
+
+def render_day_cells(weeks):
+    """HTML of every day cell in ``weeks``; only days whose content changed since last time are rendered."""
+    template = _day_template()
+    prefix = f"calendar_day:{_template_digest(template.origin.name)}"
+    days = [day for week in weeks for day in week]
+    keys = [f"{prefix}:{day['date']:%Y%m%d}:{day['version']}" for day in days]
+    cached = cache.get_many(keys)
+    rendered = {key: template.render({'day': day}) for key, day in zip(keys, days) if key not in cached}
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', 86400))
+        cached.update(rendered)
+    return [mark_safe(cached[key]) for key in keys]
@@ -0,0 +1,143 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.utils import timezone
+
+from .metrics import sql_fingerprint
+
+logger = logging.getLogger('booking.performance')
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile-Token'
+_SALT = 'booking.profiling'
+
+
+def make_profile_token(user, path):
+    """Sign a token that lets ``user`` profile ``path`` for a short while."""
+    return signing.TimestampSigner(salt=_SALT).sign(f'{user.pk}:{path}')
+
+
+def check_profile_token(token, user, path):
+    """Return True when ``token`` was minted for this user and path and has not expired."""
+    max_age = getattr(settings, 'PROFILING_TOKEN_SECONDS', 600)
+    try:
+        value = signing.TimestampSigner(salt=_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == f'{user.pk}:{path}'
+
+
+class ProfileLimiter:
+    """Allow one profiled request at a time and at most ``per_hour`` of them per process."""
+
+    def __init__(self, per_hour):
+        self.per_hour = per_hour
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._recent = deque()
+
+    def acquire(self, now=None):
+        """Return 0 when a profile may start, otherwise the seconds to wait before trying again."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 3600:
+                self._recent.popleft()
+            if len(self._recent) >= self.per_hour:
+                return max(int(3600 - (now - self._recent[0])), 1)
+            if not self._running.acquire(blocking=False):
+                return 1
+            self._recent.append(now)
+            return 0
+
+    def release(self):
+        self._running.release()
+
+
+class _SqlRecorder:
+    def __init__(self):
+        self.count = Counter()
+        self.total_ms = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            shape = sql_fingerprint(sql)
+            self.count[shape] += 1
+            self.total_ms[shape] += (time.perf_counter() - started) * 1000
+
+
+def profile_request(request, get_response, *, top=30):
+    """Run the request under cProfile, tracemalloc and an SQL recorder; return ``(response, report)``."""
+    profiler = cProfile.Profile()
+    sql = _SqlRecorder()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(sql):
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    match = getattr(request, 'resolver_match', None)
+    lines = [
+        f"Perfil de {request.method} {request.get_full_path()} (vista {match.view_name if match else '-'})",
+        f"Usuario {request.user.get_username()}, {timezone.localtime():%Y-%m-%d %H:%M:%S}",
+        f"Estado {response.status_code}, {elapsed_ms:.0f} ms, {sum(sql.count.values())} consultas SQL "
+        f"({sum(sql.total_ms.values()):.0f} ms), pico de memoria {peak / 1024:.0f} KB",
+        '',
+        '== Funciones (tiempo acumulado) ==',
+    ]
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats('cumulative').print_stats(top)
+    lines.append(stream.getvalue().strip())
+
+    lines += ['', '== SQL por forma (veces, ms totales) ==']
+    for shape, total in sorted(sql.total_ms.items(), key=lambda entry: entry[1], reverse=True)[:top]:
+        lines.append(f'{sql.count[shape]:>5} {total:>9.1f}  {shape[:300]}')
+
+    lines += ['', '== Asignaciones nuevas (KB, bloques, origen) ==']
+    for stat in after.compare_to(before, 'lineno')[:top]:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        lines.append(f'{stat.size_diff / 1024:>9.1f} {stat.count_diff:>7}  {frame.filename}:{frame.lineno}')
+    return response, '\n'.join(lines) + '\n'
+
+
+def store_profile_report(report, request):
+    """Write the report under ``PROFILING_DIR`` when configured; returns the file path or None."""
+    directory = getattr(settings, 'PROFILING_DIR', '')
+    if not directory:
+        return None
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    match = getattr(request, 'resolver_match', None)
+    name = (match.view_name if match else 'unresolved').replace(':', '-')
+    target = path / f"{timezone.localtime():%Y%m%d-%H%M%S}-{name}-{request.user.pk}.txt"
+    target.write_text(report, encoding='utf-8')
+    logger.info("Profile report stored at %s", target)
+    return target
@@ -1,13 +1,98 @@
-from django.db import models
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.db import models, transaction, connection, IntegrityError, OperationalError
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Sum, F, Q, Exists, OuterRef
 
-from .models import Reservation, ReservationItem, Course, Subject, TeacherRole
+from .models import (
+    Room, Reservation, ReservationItem, ReservationHold, RoomInventory, RoomBlockClaim, MaterialBlockUsage, Blackout,
+    Course, Subject, TeacherRole,
+)
+from .availability import (
+    AvailabilityIndex, RESERVATION_BLACKOUT_PREFIX, CONFLICT_BLACKOUT, CONFLICT_HELD, CONFLICT_MESSAGES,
+    CONFLICT_RESERVED,
+)
 from .constants import SUBJECTS_BY_LEVEL
+from .dateutils import block_indexes_for_range, get_blocks_for_weekday, is_block_aligned, max_reservation_date
+
+
+logger = logging.getLogger(__name__)
+
+
+class BookingConflict(Exception):
+    """Raised when a booking cannot be stored because its slot is already taken."""
+
+
+class BookingInvalid(Exception):
+    """Raised when a booking request breaks a scheduling rule (date window, hours)."""
+
+
+class BookingBusy(BookingConflict):
+    """Raised when a booking transaction keeps deadlocking after every retry."""
+
+
+# MySQL ER_LOCK_DEADLOCK and ER_LOCK_WAIT_TIMEOUT
+RETRYABLE_LOCK_ERROR_CODES = (1213, 1205)
+
+_booking_metrics_lock = threading.Lock()
+BOOKING_TRANSACTION_METRICS = Counter()
+
+
+def _record_booking_metric(name, amount=1):
+    with _booking_metrics_lock:
+        BOOKING_TRANSACTION_METRICS[name] += amount
+
+
+def is_retryable_lock_error(exc):
+    """Return True for deadlocks and lock-wait timeouts that are safe to retry."""
+    code = exc.args[0] if exc.args else None
+    if code in RETRYABLE_LOCK_ERROR_CODES:
+        return True
+    message = str(exc).lower()
+    return 'deadlock' in message or 'database is locked' in message
+
+
+def run_booking_transaction(operation, *, attempts=None, base_delay=None, max_delay=None):
+    """Run ``operation`` in its own transaction, retrying deadlocks with jittered backoff.
+
+    Retries are only possible when no outer transaction is open; inside one the
+    error is propagated so the caller's transaction can roll back as a whole.
+    After the last attempt the error surfaces as ``BookingBusy``.
+    """
+    attempts = attempts or getattr(settings, 'BOOKING_TRANSACTION_ATTEMPTS', 3)
+    base_delay = base_delay if base_delay is not None else getattr(settings, 'BOOKING_RETRY_BASE_DELAY', 0.05)
+    max_delay = max_delay if max_delay is not None else getattr(settings, 'BOOKING_RETRY_MAX_DELAY', 0.5)
+    can_retry = not connection.in_atomic_block
+
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                result = operation()
+            _record_booking_metric('committed')
+            return result
+        except OperationalError as exc:
+            if not is_retryable_lock_error(exc):
+                raise
+            _record_booking_metric('lock_errors')
+            if not can_retry or attempt == attempts:
+                _record_booking_metric('exhausted')
+                logger.error("Booking transaction gave up after %s attempt(s): %s", attempt, exc)
+                raise BookingBusy("Hay demasiadas reservas simultáneas; intenta nuevamente en unos segundos.") from exc
+            _record_booking_metric('retries')
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            logger.warning("Booking transaction deadlocked (attempt %s/%s), retrying in %.3fs: %s", attempt, attempts, delay, exc)
+            time.sleep(delay)
 
 
 def release_overdue_reservations(now=None):
     """Release inventory for reservations that have already finished."""
+    expire_holds(now)
     current_dt = timezone.localtime(now) if now else timezone.localtime()
     current_date = current_dt.date()
     current_time = current_dt.time()
@@ -30,8 +115,74 @@ def release_overdue_reservations(now=None):
     return released
 
 
-def get_reserved_material_quantity(*, room, material_id, date, start_time, end_time, exclude_reservation_id=None):
-    """Return total quantity of a material already reserved for the same slot."""
+def expire_holds(now=None):
+    """Delete reservation holds whose time to live has run out."""
+    deleted, _ = ReservationHold.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
+
+
+def check_booking_rules(date, start_time, end_time, today):
+    """Raise ``BookingInvalid`` unless the range is a weekday within the booking window, 08:00 to 18:00."""
+    if date < today:
+        raise BookingInvalid("La fecha de la reserva debe ser igual o posterior a hoy.")
+    if date > max_reservation_date(today):
+        raise BookingInvalid("Las reservas solo se permiten hasta con 1 mes de anticipación.")
+    if date.weekday() > 4:
+        raise BookingInvalid("Solo se permiten reservas de lunes a viernes.")
+    if start_time >= end_time:
+        raise BookingInvalid("La hora de inicio debe ser menor que la de término.")
+    if not (dt_time(8, 0) <= start_time < dt_time(18, 0) and dt_time(8, 0) < end_time <= dt_time(18, 0)):
+        raise BookingInvalid("Horario permitido: 08:00 a 18:00.")
+
+
+def place_hold(*, user, room, date, start_time, end_time, material_quantities=None, now=None):
+    """Hold a room time range for ``user`` while the reservation form is being filled.
+
+    The teacher's previous holds are replaced. Raises ``BookingInvalid`` for a
+    range that could not be booked at all, and ``BookingConflict`` when it is
+    reserved, held by someone else, blocked, or short of material stock.
+    """
+    current = now or timezone.now()
+    check_booking_rules(date, start_time, end_time, timezone.localtime(current).date())
+    material_quantities = {int(material_id): qty for material_id, qty in (material_quantities or {}).items() if qty}
+    ttl = timedelta(minutes=getattr(settings, 'RESERVATION_HOLD_MINUTES', 5))
+    with transaction.atomic():
+        # Serialize hold placement per room so two teachers cannot hold the same block.
+        Room.objects.select_for_update().get(pk=room.pk)
+        ReservationHold.objects.filter(user=user).delete()
+        index = AvailabilityIndex.load(date, date, hold_owner_id=user.id, now=current)
+        reason = index.range_conflict(room.id, date, start_time, end_time)
+        if reason is None:
+            headroom = index.material_headroom(
+                room.id, date, block_indexes_for_range(date, start_time, end_time), material_quantities,
+            )
+            reason = headroom if isinstance(headroom, str) else None
+        if reason:
+            raise BookingConflict(CONFLICT_MESSAGES[reason])
+        return ReservationHold.objects.create(
+            user=user,
+            room=room,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            materials={str(material_id): qty for material_id, qty in material_quantities.items()},
+            created_at=current,
+            expires_at=current + ttl,
+        )
+
+
+def release_user_holds(user):
+    """Drop the holds of ``user``; called once the held booking is confirmed."""
+    ReservationHold.objects.filter(user=user).delete()
+
+
+def get_reserved_material_quantity(*, room, material_id, date, start_time, end_time, exclude_reservation_id=None,
+                                   for_update=False):
+    """Return total quantity of a material already reserved for the same slot.
+
+    ``for_update`` sums with a locking read, which also sees rows committed by a
+    competing booking after this transaction's snapshot was taken.
+    """
     overlap_qs = ReservationItem.objects.filter(
         reservation__room=room,
         material_id=material_id,
@@ -41,9 +192,379 @@ def get_reserved_material_quantity(*, room, material_id, date, start_time, end_t
     )
     if exclude_reservation_id:
         overlap_qs = overlap_qs.exclude(reservation_id=exclude_reservation_id)
+    if for_update:
+        return sum(overlap_qs.select_for_update().values_list('quantity', flat=True))
     return overlap_qs.aggregate(total=Sum('quantity'))['total'] or 0
 
 
+def needs_overlap_scan(date, start_time, end_time):
+    """Return True when block claims alone cannot detect clashes for the time range."""
+    return not is_block_aligned(date, start_time, end_time)
+
+
+def build_block_claims(reservation):
+    return [
+        RoomBlockClaim(
+            room_id=reservation.room_id,
+            date=reservation.date,
+            block_index=block_index,
+            reservation=reservation,
+        )
+        for block_index in block_indexes_for_range(reservation.date, reservation.start_time, reservation.end_time)
+    ]
+
+
+def claim_room_blocks(reservation):
+    """Claim every block covered by the reservation inside the caller's transaction.
+
+    The unique index on (room, date, block_index) makes the database reject the
+    second of two concurrent bookings for the same block, without locking or
+    scanning overlapping reservations. Ranges that cut through a block, or
+    fall outside the block schedule, go through ``_claim_shared_blocks`` instead.
+    """
+    claims = build_block_claims(reservation)
+    if needs_overlap_scan(reservation.date, reservation.start_time, reservation.end_time):
+        return _claim_shared_blocks(reservation, claims)
+    try:
+        with transaction.atomic():
+            RoomBlockClaim.objects.bulk_create(claims)
+    except IntegrityError:
+        raise BookingConflict("El salón ya está ocupado en ese horario.")
+    return len(claims)
+
+
+def _claim_shared_blocks(reservation, claims):
+    """Claim the blocks of a range that only covers part of some of them, or none.
+
+    Two such ranges may share a block without overlapping (08:00-08:20 and
+    08:20-08:45), and a range outside the schedule has no block to claim, so
+    they serialize on the room row and scan for a real overlap. Whichever of them claims a block first keeps the row, which still
+    makes a whole-block booking of that block fail on the unique index.
+    """
+    Room.objects.select_for_update().get(pk=reservation.room_id)
+    RoomBlockClaim.objects.bulk_create(claims, ignore_conflicts=True)
+    overlapping = Reservation.objects.filter(
+        room_id=reservation.room_id,
+        date=reservation.date,
+        start_time__lt=reservation.end_time,
+        end_time__gt=reservation.start_time,
+    ).exclude(pk=reservation.pk)
+    if overlapping.exists():
+        raise BookingConflict("El salón ya está ocupado en ese horario.")
+    return len(claims)
+
+
+def hand_over_shared_blocks(room_id, date, start_time, end_time, *, exclude_reservation_id):
+    """After a partial-block range is cancelled or moved, re-claim its blocks for the ranges still in them."""
+    if not needs_overlap_scan(date, start_time, end_time):
+        return 0  # a whole-block range never shares its blocks
+    freed = set(block_indexes_for_range(date, start_time, end_time))
+    if not freed:
+        return 0  # outside the block schedule: there were no claims to hand over
+    blocks = [block for block in get_blocks_for_weekday(date.weekday()) if block['index'] in freed]
+    others = Reservation.objects.filter(
+        room_id=room_id,
+        date=date,
+        start_time__lt=blocks[-1]['end_time'],
+        end_time__gt=blocks[0]['start_time'],
+    ).exclude(pk=exclude_reservation_id)
+    claims = [claim for other in others for claim in build_block_claims(other) if claim.block_index in freed]
+    RoomBlockClaim.objects.bulk_create(claims, ignore_conflicts=True)
+    return len(claims)
+
+
+def reclaim_room_blocks(reservation, old_slot=None):
+    """Replace the block claims of an edited reservation; ``old_slot`` is its previous (room_id, date, start, end)."""
+    RoomBlockClaim.objects.filter(reservation=reservation).delete()
+    if old_slot is not None:
+        # Before claiming again, so a partial range left behind keeps its block.
+        hand_over_shared_blocks(*old_slot, exclude_reservation_id=reservation.pk)
+    return claim_room_blocks(reservation)
+
+def reserve_material_blocks(*, room, date, start_time, end_time, material_quantities, exclude_reservation_id=None):
+    """Reserve material units per block with conditional counter updates.
+
+    Each block counter is bumped with ``UPDATE ... SET reserved = reserved + n
+    WHERE reserved <= capacity - n``, so only bookings that compete for the same
+    (room, material, date, block) contend with each other. A range that is not
+    block-aligned would be charged for whole blocks it only partly uses, so it
+    locks the RoomInventory rows and checks the overlapping reservations
+    instead; it still adds to the counters of its blocks, because any
+    whole-block booking of them overlaps it. Must run inside the caller's
+    transaction; a ``BookingConflict`` rolls every increment back.
+    """
+    if not material_quantities:
+        return
+    block_indexes = block_indexes_for_range(date, start_time, end_time)
+    aligned = is_block_aligned(date, start_time, end_time)
+    inventory = RoomInventory.objects.filter(room=room, material__in=list(material_quantities))
+    if not aligned:
+        inventory = inventory.select_for_update().order_by('material_id')
+    capacities = dict(inventory.values_list('material_id', 'quantity'))
+    # Los contadores se bloquean siempre en orden (material, bloque) para evitar deadlocks.
+    ordered = sorted(material_quantities.items(), key=lambda entry: entry[0].id)
+    for material, qty in ordered:
+        capacity = capacities.get(material.id)
+        if capacity is None:
+            raise BookingConflict(f"No hay inventario configurado para {material.name} en salón {room.code}.")
+        if qty > capacity:
+            raise BookingConflict(f"No hay stock suficiente de {material.name} en salón {room.code}.")
+
+    if block_indexes:
+        MaterialBlockUsage.objects.bulk_create(
+            [
+                MaterialBlockUsage(room=room, material=material, date=date, block_index=block_index)
+                for material, _ in ordered
+                for block_index in block_indexes
+            ],
+            ignore_conflicts=True,
+        )
+    for material, qty in ordered:
+        usage = MaterialBlockUsage.objects.filter(room=room, material=material, date=date, block_index__in=block_indexes)
+        if aligned:
+            # One conditional UPDATE per material; a block without room makes it fall short.
+            updated = usage.filter(reserved__lte=capacities[material.id] - qty).update(reserved=F('reserved') + qty)
+            if updated != len(block_indexes):
+                raise BookingConflict(f"No hay stock suficiente de {material.name} en salón {room.code}.")
+            continue
+        if block_indexes:
+            # Unconditional: this range's own limit is the overlap sum below. Taking the
+            # counter rows first also waits out a whole-block booking still in flight.
+            usage.update(reserved=F('reserved') + qty)
+        reserved_overlap = get_reserved_material_quantity(
+            room=room,
+            material_id=material.id,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            exclude_reservation_id=exclude_reservation_id,
+            for_update=True,
+        )
+        if reserved_overlap + qty > capacities[material.id]:
+            raise BookingConflict(f"No hay stock suficiente de {material.name} en salón {room.code}.")
+
+
+def release_material_blocks(reservation, items=None):
+    """Return the units held by a reservation that has not released its inventory yet."""
+    if reservation.inventory_released:
+        return
+    MaterialBlockUsage.release(reservation, reservation.items.all() if items is None else items)
+
+
+def _aware(date_value, time_value):
+    value = datetime.combine(date_value, time_value)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+class BookingService:
+    """Create, update and cancel reservations for the web views and the API alike.
+
+    Every operation validates the scheduling rules, checks the slot with a single
+    query, and then writes the reservation, its block claims, material counters,
+    items and shadow blackout inside ``run_booking_transaction``. Callers map
+    ``BookingInvalid``, ``BookingConflict`` and ``BookingBusy`` to their own
+    error responses.
+    """
+
+    def __init__(self, user, *, now=None):
+        self.user = user
+        self.now = now
+
+    def _local_now(self):
+        return timezone.localtime(self.now) if self.now else timezone.localtime()
+
+    def validate(self, *, room, date, start_time, end_time, exclude_reservation_id=None):
+        """Check the booking rules and the slot; raise on the first problem found."""
+        check_booking_rules(date, start_time, end_time, self._local_now().date())
+        reason = self.slot_conflict(
+            room=room, date=date, start_time=start_time, end_time=end_time,
+            exclude_reservation_id=exclude_reservation_id,
+        )
+        if reason:
+            raise BookingConflict(CONFLICT_MESSAGES[reason])
+
+    def slot_conflict(self, *, room, date, start_time, end_time, exclude_reservation_id=None):
+        """Return why the slot is taken (reserved, blocked or held by someone else), in one query."""
+        reservations = Reservation.objects.filter(
+            room=OuterRef('pk'), date=date, start_time__lt=end_time, end_time__gt=start_time,
+        )
+        if exclude_reservation_id:
+            reservations = reservations.exclude(pk=exclude_reservation_id)
+        blackouts = (
+            Blackout.objects
+            .filter(Q(room__isnull=True) | Q(room=OuterRef('pk')))
+            .filter(start_datetime__lt=_aware(date, end_time), end_datetime__gt=_aware(date, start_time))
+            .exclude(reason__startswith=RESERVATION_BLACKOUT_PREFIX)
+        )
+        holds = (
+            ReservationHold.objects
+            .filter(room=OuterRef('pk'), date=date, start_time__lt=end_time, end_time__gt=start_time)
+            .filter(expires_at__gt=self.now or timezone.now())
+            .exclude(user_id=getattr(self.user, 'id', None))
+        )
+        row = (
+            Room.objects.filter(pk=room.pk)
+            .annotate(reserved=Exists(reservations), blocked=Exists(blackouts), held=Exists(holds))
+            .values_list('reserved', 'blocked', 'held')
+            .first()
+        )
+        if row is None:
+            return None
+        for flag, reason in zip(row, (CONFLICT_RESERVED, CONFLICT_BLACKOUT, CONFLICT_HELD)):
+            if flag:
+                return reason
+        return None
+
+    def _owner(self, reservation):
+        if reservation.user_id is None or reservation.user_id == getattr(self.user, 'id', None):
+            return self.user
+        return reservation.user
+
+    def _owner_name(self, reservation):
+        return getattr(self._owner(reservation), 'username', '') or ''
+
+    def _create_shadow_blackout(self, reservation):
+        Blackout.objects.create(
+            room_id=reservation.room_id,
+            start_datetime=_aware(reservation.date, reservation.start_time),
+            end_datetime=_aware(reservation.date, reservation.end_time),
+            reason=f"{RESERVATION_BLACKOUT_PREFIX} {self._owner_name(reservation)}",
+            created_by=self._owner(reservation),
+        )
+
+    @staticmethod
+    def _shadow_blackouts(room_id, date, start_time, end_time):
+        return Blackout.objects.filter(
+            room_id=room_id,
+            start_datetime=_aware(date, start_time),
+            end_datetime=_aware(date, end_time),
+            reason__startswith=RESERVATION_BLACKOUT_PREFIX,
+        )
+
+    def create(self, *, room, date, start_time, end_time, materials=None, course=None, subject=None):
+        """Book a slot; ``materials`` maps ``Material`` to quantity."""
+        materials = {material: qty for material, qty in (materials or {}).items() if qty}
+        self.validate(room=room, date=date, start_time=start_time, end_time=end_time)
+
+        def _book():
+            reservation = Reservation.objects.create(
+                room=room,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                course=course,
+                subject=subject,
+                user=self.user,
+            )
+            claim_room_blocks(reservation)
+            reserve_material_blocks(
+                room=room,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                material_quantities=materials,
+                exclude_reservation_id=reservation.pk,
+            )
+            ReservationItem.objects.bulk_create([
+                ReservationItem(reservation=reservation, material=material, quantity=qty)
+                for material, qty in materials.items()
+            ])
+            self._create_shadow_blackout(reservation)
+            if self.user is not None:
+                release_user_holds(self.user)
+            return reservation
+
+        return run_booking_transaction(_book)
+
+    def update(self, reservation, *, materials=None, **changes):
+        """Move or edit a reservation; ``changes`` may hold room, date, times, course and subject.
+
+        ``materials`` replaces the reserved materials when given; otherwise the
+        current ones are kept and re-reserved for the new slot.
+        """
+        room = changes.get('room', reservation.room)
+        date = changes.get('date', reservation.date)
+        start_time = changes.get('start_time', reservation.start_time)
+        end_time = changes.get('end_time', reservation.end_time)
+        self.validate(
+            room=room, date=date, start_time=start_time, end_time=end_time, exclude_reservation_id=reservation.pk,
+        )
+
+        def _apply_update():
+            reservation.refresh_from_db()
+            old_slot = (reservation.room_id, reservation.date, reservation.start_time, reservation.end_time)
+            current_items = list(reservation.items.select_related('material'))
+            release_material_blocks(reservation, current_items)
+            if materials is None:
+                wanted = {}
+                for item in current_items:
+                    wanted[item.material] = wanted.get(item.material, 0) + item.quantity
+            else:
+                wanted = {material: qty for material, qty in materials.items() if qty}
+            reserve_material_blocks(
+                room=room,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                material_quantities=wanted,
+                exclude_reservation_id=reservation.pk,
+            )
+
+            for field, value in changes.items():
+                setattr(reservation, field, value)
+            reservation.inventory_released = False
+            reservation.save()
+            reclaim_room_blocks(reservation, old_slot)
+
+            if materials is not None:
+                self._replace_items(reservation, current_items, wanted)
+
+            moved = self._shadow_blackouts(*old_slot).update(
+                room_id=reservation.room_id,
+                start_datetime=_aware(reservation.date, reservation.start_time),
+                end_datetime=_aware(reservation.date, reservation.end_time),
+                reason=f"{RESERVATION_BLACKOUT_PREFIX} {self._owner_name(reservation)}",
+            )
+            if not moved:
+                self._create_shadow_blackout(reservation)
+            return reservation
+
+        return run_booking_transaction(_apply_update)
+
+    @staticmethod
+    def _replace_items(reservation, current_items, wanted):
+        existing = {item.material_id: item for item in current_items}
+        wanted_by_id = {material.id: (material, qty) for material, qty in wanted.items()}
+        changed = []
+        for material_id, item in existing.items():
+            if material_id in wanted_by_id and item.quantity != wanted_by_id[material_id][1]:
+                item.quantity = wanted_by_id[material_id][1]
+                changed.append(item)
+        if changed:
+            ReservationItem.objects.bulk_update(changed, ['quantity'])
+        stale = [item.pk for material_id, item in existing.items() if material_id not in wanted_by_id]
+        if stale:
+            ReservationItem.objects.filter(pk__in=stale).delete()
+        ReservationItem.objects.bulk_create([
+            ReservationItem(reservation=reservation, material=material, quantity=qty)
+            for material_id, (material, qty) in wanted_by_id.items()
+            if material_id not in existing
+        ])
+
+    def cancel(self, reservation):
+        """Delete a reservation, giving back its materials and its shadow blackout."""
+
+        def _cancel():
+            current = Reservation.objects.get(pk=reservation.pk)
+            current.release_inventory(items=list(current.items.all()))
+            self._shadow_blackouts(current.room_id, current.date, current.start_time, current.end_time).delete()
+            current.delete()
+            hand_over_shared_blocks(
+                current.room_id, current.date, current.start_time, current.end_time, exclude_reservation_id=reservation.pk,
+            )
+
+        run_booking_transaction(_cancel)
+
 
 ACADEMIC_ROLE_NAMES = ('Docente',)
 
@@ -0,0 +1,63 @@
+import io
+import re
+from pathlib import PurePosixPath
+
+# Widths of the WebP copies made of every photo and logo at least that wide.
+IMAGE_WIDTHS = (160, 480, 960, 1600)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+WEBP_QUALITY = 80
+
+# Comments, quoted strings and unquoted url() values, scanned together so that a
+# "/*" inside a string is not taken for a comment.
+_CSS_TOKENS = re.compile(
+    r'(?P<comment>/\*.*?\*/)'
+    r'|(?P<keep>"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|url\(\s*[^\s)\'"]*\s*\))',
+    re.S,
+)
+_CSS_KEPT = re.compile(r'\x00(\d+)\x00')
+_CSS_SPACES = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_JS_LINE_COMMENT = re.compile(r'^\s*//.*$')
+
+
+def minify_css(source):
+    """Drop comments and the whitespace around CSS punctuation; strings and url() values are left as written."""
+    kept = []
+
+    def set_aside(match):
+        if match.group('comment'):
+            return ''
+        kept.append(match.group('keep'))
+        return f'\x00{len(kept) - 1}\x00'
+
+    css = _CSS_TOKENS.sub(set_aside, source)
+    css = _CSS_SPACES.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = css.replace(';}', '}').replace(': ', ':').strip()
+    return _CSS_KEPT.sub(lambda match: kept[int(match.group(1))], css) + '\n'
+
+
+def minify_js(source):
+    """Drop indentation, blank lines and whole-line ``//`` comments; line breaks are kept, so ASI still holds."""
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not _JS_LINE_COMMENT.match(line)) + '\n'
+
+
+def variant_name(name, width):
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}-{width}w.webp'))
+
+
+def webp_variants(name, data):
+    """Yield ``(variant name, bytes)`` for each width in IMAGE_WIDTHS not larger than the image."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for width in IMAGE_WIDTHS:
+            if width > image.width:
+                break
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, 'WEBP', quality=WEBP_QUALITY, method=6)
+            yield variant_name(name, width), out.getvalue()
@@ -0,0 +1,44 @@
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .staticbuild import IMAGE_EXTENSIONS, minify_css, minify_js, webp_variants
+
+_MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+class BuildStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """The collectstatic build step used in production.
+
+    Before WhiteNoise hashes and compresses the collected files, CSS and JS are
+    minified in place and every photo gets WebP copies at ``IMAGE_WIDTHS``.
+    The copies go through hashing and compression like any other file;
+    WhiteNoise writes ``.br`` next to ``.gz`` when the ``brotli`` package is
+    installed.
+    """
+
+    # A template that names a missing file renders an unhashed URL instead of failing.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in list(paths):
+                suffix = name[name.rfind('.'):].lower()
+                if suffix in _MINIFIERS:
+                    with self.open(name) as original:
+                        text = original.read().decode('utf-8')
+                    self._replace(name, _MINIFIERS[suffix](text).encode('utf-8'))
+                    # Hash from the minified copy, not the app's original.
+                    paths[name] = (self, name)
+                elif suffix in IMAGE_EXTENSIONS:
+                    with self.open(name) as original:
+                        data = original.read()
+                    for variant, content in webp_variants(name, data):
+                        self._replace(variant, content)
+                        paths[variant] = (self, variant)
+        yield from super().post_process(paths, dry_run, **options)
+
+    def _replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self.save(name, ContentFile(content))
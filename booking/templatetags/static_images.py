@@ -0,0 +1,47 @@
+import mimetypes
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from booking.staticbuild import IMAGE_WIDTHS, variant_name
+
+register = template.Library()
+
+
+@lru_cache(maxsize=64)
+def _webp_variants(path):
+    """``(url, width)`` of the WebP copies collectstatic made of ``path``; none in development."""
+    return tuple(
+        (static(variant_name(path, width)), width)
+        for width in IMAGE_WIDTHS
+        if staticfiles_storage.exists(variant_name(path, width))
+    )
+
+
+@register.simple_tag
+def picture(path, alt='', sizes='100vw', **attrs):
+    """``<img>`` for a static image, wrapped in ``<picture>`` with WebP sources once they are built."""
+    attrs = {key.replace('_', '-'): value for key, value in attrs.items()}
+    img = format_html('<img src="{}" alt="{}"{}>', static(path), alt, flatatt(attrs))
+    variants = _webp_variants(path)
+    if not variants:
+        return img
+    srcset = ', '.join(f'{url} {width}w' for url, width in variants)
+    return format_html('<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>', srcset, sizes, img)
+
+
+@register.simple_tag
+def background_image(path):
+    """``style`` value for a CSS background photo, preferring its largest WebP copy where supported."""
+    fallback = format_html("background-image: url('{}');", static(path))
+    variants = _webp_variants(path)
+    if not variants:
+        return fallback
+    return format_html(
+        "{} background-image: image-set(url('{}') type('image/webp'), url('{}') type('{}'));",
+        fallback, variants[-1][0], static(path), mimetypes.guess_type(path)[0],
+    )
@@ -0,0 +1,11 @@
+from django.template.backends.jinja2 import Jinja2
+
+from .templating import TimedBackendMixin
+
+
+class TimedJinja2(TimedBackendMixin, Jinja2):
+    """Django's Jinja2 backend, with render time reported to ``booking.metrics``.
+
+    Kept apart from ``booking.templating`` so Jinja2 is only imported when
+    ``CALENDAR_TEMPLATE_ENGINE=jinja2`` configures this backend.
+    """
@@ -1,14 +1,53 @@
-from datetime import date, time, timedelta
+import gzip
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time as time_module
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from importlib.util import find_spec
+from unittest import mock, skipUnless
 
-from django.contrib.auth.models import User
-from django.test import TestCase
-from django.urls import reverse
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve, reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from booking.dateutils import max_reservation_date
-from booking.models import Course, Reservation, Room, Subject
-from booking.services import build_registration_metadata
+from booking.admission import AdmissionController, AdmissionRejected, reset_booking_admission
+from booking.availability import find_free_slots
+from booking.caching import REFERENCE_CACHE, ReferenceCache, cached_rooms
+from booking.dateutils import get_blocks_for_weekday, max_reservation_date
+from booking.db.pool import ConnectionPool, PoolTimeout
+from booking.integrity import check_booking_invariants
+from booking.metrics import REQUEST_METRICS, sql_fingerprint
+from booking.monthgrid import month_bounds, month_grid, render_day_cells
+from booking.models import (
+    Blackout, Course, IdempotencyRecord, Material, MaterialBlockUsage, Notification, Reservation, ReservationHold, ReservationItem, Room, RoomBlockClaim,
+    RoomInventory, Subject,
+)
+from booking.services import (
+    BOOKING_TRANSACTION_METRICS, BookingBusy, BookingConflict, BookingInvalid, BookingService, build_registration_metadata,
+    claim_room_blocks,
+    place_hold, release_overdue_reservations, run_booking_transaction,
+)
+from booking.staticbuild import minify_css, minify_js, webp_variants
+from booking.templatetags.static_images import _webp_variants
+
+def next_weekday(base_date, weekday, weeks_ahead=1):
+    """Return the ``weekday`` of the week ``weeks_ahead`` weeks after ``base_date``."""
+    monday = base_date - timedelta(days=base_date.weekday()) + timedelta(weeks=weeks_ahead)
+    return monday + timedelta(days=weekday)
+
 
 class ReservationTests(TestCase):
     def setUp(self):
@@ -179,3 +218,1354 @@ class RegistrationEmailValidationTests(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertTrue(User.objects.filter(username="prof_ok").exists())
+
+
+class FreeSlotSearchTests(TestCase):
+    def setUp(self):
+        self.room_a = Room.objects.create(code="A")
+        self.room_b = Room.objects.create(code="B")
+        self.notebooks = Material.objects.create(name="Notebook")
+        RoomInventory.objects.create(room=self.room_a, material=self.notebooks, quantity=10)
+        RoomInventory.objects.create(room=self.room_b, material=self.notebooks, quantity=5)
+        self.monday = next_weekday(timezone.localdate(), 0)
+        reservation = Reservation.objects.create(
+            room=self.room_a, date=self.monday, start_time=time(8, 0), end_time=time(8, 45)
+        )
+        ReservationItem.objects.create(reservation=reservation, material=self.notebooks, quantity=1)
+
+    def test_search_skips_reserved_blocks_and_rooms_without_stock(self):
+        slots = find_free_slots(
+            start_date=self.monday,
+            end_date=self.monday,
+            materials={self.notebooks.id: 8},
+            limit=100,
+        )
+
+        self.assertTrue(slots)
+        self.assertEqual({self.room_a.id}, {slot["room_id"] for slot in slots})
+        self.assertNotIn([1], [slot["block_indexes"] for slot in slots])
+        self.assertEqual([2], slots[0]["block_indexes"])
+
+    def test_search_returns_consecutive_blocks_and_honours_blackouts(self):
+        tuesday = self.monday + timedelta(days=1)
+        Blackout.objects.create(
+            room=None,
+            start_datetime=timezone.make_aware(datetime.combine(tuesday, time(0, 0))),
+            end_datetime=timezone.make_aware(datetime.combine(tuesday, time(23, 59))),
+            reason="Feriado: prueba",
+        )
+
+        slots = find_free_slots(start_date=self.monday, end_date=tuesday, block_count=2, limit=500)
+
+        self.assertTrue(all(slot["date"] == self.monday for slot in slots))
+        self.assertTrue(all(len(slot["block_indexes"]) == 2 for slot in slots))
+        self.assertNotIn((self.room_a.id, [1, 2]), [(slot["room_id"], slot["block_indexes"]) for slot in slots])
+
+    def test_availability_api_lists_ranked_slots(self):
+        user = User.objects.create_user(username="buscador", password="pass1234")
+        api_client = APIClient()
+        api_client.force_authenticate(user)
+
+        response = api_client.get("/api/availability/", {
+            "start_date": self.monday.isoformat(),
+            "end_date": self.monday.isoformat(),
+            "rooms": [self.room_b.id],
+            "materials": [f"{self.notebooks.id}:5"],
+            "block_count": 2,
+        })
+
+        self.assertEqual(200, response.status_code)
+        self.assertGreater(response.data["count"], 0)
+        first = response.data["results"][0]
+        self.assertEqual("B", first["room_code"])
+        self.assertEqual([1, 2], first["block_indexes"])
+
+
+class ConflictSuggestionTests(TestCase):
+    def setUp(self):
+        self.room_a = Room.objects.create(code="A")
+        self.room_b = Room.objects.create(code="B")
+        self.course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        self.subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+        claim_room_blocks(Reservation.objects.create(
+            room=self.room_a, date=self.monday, start_time=time(9, 50), end_time=time(10, 35)
+        ))
+
+    def test_web_rejection_offers_other_rooms_and_adjacent_blocks(self):
+        self.client.login(username="docente", password="pass1234")
+        response = self.client.post(reverse("reservation_create"), {
+            "room": self.room_a.id,
+            "date": self.monday.isoformat(),
+            "start_time": "09:50",
+            "end_time": "10:35",
+            "course": self.course.id,
+            "subject": self.subject.id,
+        }, follow=True)
+
+        suggestions = response.context["suggestions"]
+        self.assertEqual(1, Reservation.objects.count())
+        self.assertIn(("B", "Bloque 3"), [(s["room_code"], s["label"]) for s in suggestions])
+        self.assertIn(("A", "Bloque 2"), [(s["room_code"], s["label"]) for s in suggestions])
+        self.assertEqual([], self.client.get(reverse("reservation_create")).context["suggestions"])
+
+    def test_api_rejection_includes_alternatives(self):
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+        response = api_client.post("/api/reservations/", {
+            "room": self.room_a.id,
+            "date": self.monday.isoformat(),
+            "start_time": "09:50:00",
+            "end_time": "10:35:00",
+            "items": [],
+        }, format="json")
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("ocupado", str(response.data["non_field_errors"]))
+        kinds = {alternative["kind"] for alternative in response.data["alternatives"]}
+        self.assertTrue({"other_room", "adjacent_block", "other_day"} <= kinds)
+
+
+class RoomBlockClaimTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        self.subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+
+    def test_second_claim_for_the_same_block_is_rejected(self):
+        first = Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(9, 30))
+        self.assertEqual(2, claim_room_blocks(first))
+
+        second = Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 45), end_time=time(9, 30))
+        with self.assertRaises(BookingConflict):
+            claim_room_blocks(second)
+        self.assertEqual(2, RoomBlockClaim.objects.count())
+
+    def test_web_and_api_bookings_write_claims(self):
+        self.client.login(username="docente", password="pass1234")
+        payload = {
+            "room": self.room.id,
+            "date": self.monday.isoformat(),
+            "start_time": "08:00",
+            "end_time": "08:45",
+            "course": self.course.id,
+            "subject": self.subject.id,
+        }
+        self.client.post(reverse("reservation_create"), payload)
+        self.client.post(reverse("reservation_create"), payload)
+
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+        response = api_client.post("/api/reservations/", {
+            "room": self.room.id,
+            "date": self.monday.isoformat(),
+            "start_time": "08:00:00",
+            "end_time": "08:45:00",
+            "items": [],
+        }, format="json")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(1, Reservation.objects.count())
+        self.assertEqual(
+            [(self.room.id, self.monday, 1)],
+            list(RoomBlockClaim.objects.values_list("room_id", "date", "block_index")),
+        )
+
+    def test_adjacent_partial_block_bookings_share_the_block(self):
+        service = BookingService(self.user)
+        first = service.create(room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(8, 20))
+        second = service.create(room=self.room, date=self.monday, start_time=time(8, 20), end_time=time(8, 45))
+
+        whole = Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(8, 45))
+        with self.assertRaises(BookingConflict):
+            claim_room_blocks(whole)
+        whole.delete()
+        self.assertEqual([first.pk], list(RoomBlockClaim.objects.values_list("reservation_id", flat=True)))
+
+        service.cancel(first)
+        self.assertEqual([second.pk], list(RoomBlockClaim.objects.values_list("reservation_id", flat=True)))
+        self.assertEqual([], check_booking_invariants(start_date=self.monday))
+
+    def test_off_block_bookings_can_be_moved_and_cancelled(self):
+        friday = self.monday + timedelta(days=4)
+        service = BookingService(self.user)
+        reservation = service.create(room=self.room, date=friday, start_time=time(14, 0), end_time=time(15, 0))
+
+        service.update(reservation, start_time=time(15, 0), end_time=time(16, 0))
+        self.assertEqual(time(16, 0), Reservation.objects.get().end_time)
+        service.cancel(reservation)
+
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(RoomBlockClaim.objects.exists())
+
+    def test_overlapping_off_block_ranges_are_rejected_inside_the_transaction(self):
+        friday = self.monday + timedelta(days=4)
+        first = Reservation.objects.create(room=self.room, date=friday, start_time=time(14, 0), end_time=time(15, 0))
+        self.assertEqual(0, claim_room_blocks(first))
+
+        second = Reservation.objects.create(room=self.room, date=friday, start_time=time(14, 30), end_time=time(15, 30))
+        with self.assertRaises(BookingConflict):
+            claim_room_blocks(second)
+
+    def test_backfill_command_claims_existing_reservations(self):
+        Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(9, 30))
+        Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 45), end_time=time(9, 30))
+
+        call_command("backfill_block_claims", stdout=io.StringIO())
+
+        self.assertEqual(2, RoomBlockClaim.objects.count())
+
+
+class MaterialBlockCounterTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.notebooks = Material.objects.create(name="Notebook")
+        RoomInventory.objects.create(room=self.room, material=self.notebooks, quantity=5)
+        self.course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        self.subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.client.login(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+
+    def _book(self, *, start, end, qty, room=None):
+        return self.client.post(reverse("reservation_create"), {
+            "room": (room or self.room).id,
+            "date": self.monday.isoformat(),
+            "start_time": start,
+            "end_time": end,
+            "course": self.course.id,
+            "subject": self.subject.id,
+            f"qty_{self.notebooks.id}": str(qty),
+        })
+
+    def _reserved(self, block_index):
+        return MaterialBlockUsage.objects.get(
+            room=self.room, material=self.notebooks, date=self.monday, block_index=block_index
+        ).reserved
+
+    def test_counters_only_contend_within_the_same_block(self):
+        other_room = Room.objects.create(code="B")
+        RoomInventory.objects.create(room=other_room, material=self.notebooks, quantity=5)
+
+        self._book(start="08:00", end="08:45", qty=3)
+        self._book(start="08:00", end="08:45", qty=3, room=other_room)
+        self._book(start="08:45", end="09:30", qty=5)
+
+        self.assertEqual(3, Reservation.objects.count())
+        self.assertEqual(3, self._reserved(1))
+        self.assertEqual(5, self._reserved(2))
+
+    def test_cancel_and_edit_give_units_back(self):
+        self._book(start="08:00", end="09:30", qty=4)
+        reservation = Reservation.objects.get()
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+
+        response = api_client.patch(f"/api/reservations/{reservation.pk}/", {
+            "items": [{"material_id": self.notebooks.id, "quantity": 5}],
+        }, format="json")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual((5, 5), (self._reserved(1), self._reserved(2)))
+
+        self.client.post(reverse("reservation_cancel", args=[reservation.pk]))
+        self.assertEqual((0, 0), (self._reserved(1), self._reserved(2)))
+
+    def test_partial_block_ranges_only_count_real_overlaps(self):
+        self._book(start="08:00", end="08:20", qty=5)
+        self._book(start="08:20", end="08:45", qty=5)
+        self.assertEqual(2, Reservation.objects.count())
+
+        self._book(start="08:10", end="08:30", qty=1)
+        self._book(start="08:45", end="09:30", qty=5)
+        self.assertEqual(3, Reservation.objects.count())
+        self.assertEqual(10, self._reserved(1))
+        self.assertEqual([], check_booking_invariants(start_date=self.monday))
+
+        self.client.post(reverse("reservation_cancel", args=[Reservation.objects.order_by("id").first().pk]))
+        self.assertEqual(5, self._reserved(1))
+
+    def test_rebuild_command_recomputes_counters(self):
+        self._book(start="08:00", end="08:45", qty=2)
+        MaterialBlockUsage.objects.all().delete()
+
+        call_command("rebuild_material_counters", from_date=self.monday.isoformat(), stdout=io.StringIO())
+
+        self.assertEqual(2, self._reserved(1))
+
+
+class BookingTransactionRetryTests(TransactionTestCase):
+    def test_deadlock_is_retried_until_the_operation_commits(self):
+        calls = []
+
+        def operation():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError(1213, "Deadlock found when trying to get lock")
+            return Room.objects.create(code="R")
+
+        retries_before = BOOKING_TRANSACTION_METRICS["retries"]
+        room = run_booking_transaction(operation, attempts=3, base_delay=0)
+
+        self.assertEqual(3, len(calls))
+        self.assertTrue(Room.objects.filter(pk=room.pk).exists())
+        self.assertEqual(retries_before + 2, BOOKING_TRANSACTION_METRICS["retries"])
+
+    def test_exhausted_retries_raise_booking_busy(self):
+        def operation():
+            raise OperationalError(1205, "Lock wait timeout exceeded")
+
+        with self.assertRaises(BookingBusy):
+            run_booking_transaction(operation, attempts=2, base_delay=0)
+
+    def test_other_operational_errors_are_not_retried(self):
+        calls = []
+
+        def operation():
+            calls.append(1)
+            raise OperationalError(2006, "MySQL server has gone away")
+
+        with self.assertRaises(OperationalError):
+            run_booking_transaction(operation, attempts=3, base_delay=0)
+        self.assertEqual(1, len(calls))
+
+
+class AdmissionControllerTests(TestCase):
+    def test_rush_of_200_submits_stays_within_the_active_limit_in_fifo_order(self):
+        controller = AdmissionController(max_active=3, max_waiting=200, per_user=1, wait_timeout=10)
+        peak = {"active": 0, "max": 0}
+        admitted = []
+        lock = threading.Lock()
+
+        def submit(n):
+            with controller.admit(n):
+                with lock:
+                    peak["active"] += 1
+                    peak["max"] = max(peak["max"], peak["active"])
+                    admitted.append(n)
+                time_module.sleep(0.001)
+                with lock:
+                    peak["active"] -= 1
+
+        # Hold all three slots so the 200 submits line up in a known order.
+        holders = [threading.Event() for _ in range(3)]
+        released = threading.Event()
+
+        def hold(n):
+            with controller.admit(f"holder-{n}"):
+                holders[n].set()
+                released.wait()
+
+        holder_threads = [threading.Thread(target=hold, args=(n,)) for n in range(3)]
+        for thread in holder_threads:
+            thread.start()
+        for event in holders:
+            event.wait()
+
+        threads = []
+        for n in range(200):
+            thread = threading.Thread(target=submit, args=(n,))
+            thread.start()
+            threads.append(thread)
+            while controller.snapshot()["waiting"] < n + 1:
+                time_module.sleep(0.0005)
+        released.set()
+        for thread in threads + holder_threads:
+            thread.join()
+
+        self.assertEqual(list(range(200)), admitted)
+        self.assertLessEqual(peak["max"], 3)
+        self.assertEqual(0, controller.snapshot()["active"])
+
+    def test_full_queue_and_repeat_user_are_rejected_with_position(self):
+        controller = AdmissionController(max_active=1, max_waiting=0, per_user=1, wait_timeout=0)
+        with controller.admit("docente"):
+            with self.assertRaises(AdmissionRejected):
+                controller.admit("docente").__enter__()
+            with self.assertRaises(AdmissionRejected) as ctx:
+                controller.admit("otro").__enter__()
+        self.assertEqual(1, ctx.exception.position)
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+    @override_settings(BOOKING_ADMISSION_ACTIVE=0, BOOKING_ADMISSION_QUEUE=0)
+    def test_api_answers_queued_bookings_with_503_and_retry_after(self):
+        reset_booking_admission()
+        self.addCleanup(reset_booking_admission)
+        room = Room.objects.create(code="A")
+        user = User.objects.create_user(username="docente", password="pass1234")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post("/api/reservations/", {
+            "room": room.id,
+            "date": next_weekday(timezone.localdate(), 0).isoformat(),
+            "start_time": "08:00",
+            "end_time": "08:45",
+            "items": [],
+        }, format="json")
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(1, response.data["position"])
+        self.assertIn("Retry-After", response)
+        self.assertFalse(Reservation.objects.exists())
+
+    @override_settings(BOOKING_ADMISSION_ACTIVE=0, BOOKING_ADMISSION_QUEUE=0)
+    def test_queued_web_edit_keeps_the_submitted_form(self):
+        reset_booking_admission()
+        self.addCleanup(reset_booking_admission)
+        room = Room.objects.create(code="A")
+        course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        user = User.objects.create_user(username="docente", password="pass1234")
+        monday = next_weekday(timezone.localdate(), 0)
+        reservation = BookingService(user).create(room=room, date=monday, start_time=time(8, 0), end_time=time(8, 45))
+        self.client.force_login(user)
+
+        response = self.client.post(reverse("reservation_update", args=[reservation.pk]), {
+            "room": room.id, "date": monday.isoformat(), "start_time": "08:45", "end_time": "09:30",
+            "course": course.id, "subject": subject.id,
+        })
+
+        self.assertEqual(503, response.status_code)
+        self.assertIn("Retry-After", response)
+        self.assertTrue(response.context["is_edit"])
+        self.assertEqual("09:30", response.context["form"]["end_time"].value())
+        self.assertEqual(time(8, 45), Reservation.objects.get().end_time)
+
+
+class ReservationHoldTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        self.subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        self.holder = User.objects.create_user(username="titular", password="pass1234")
+        self.other = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+
+    def _hold(self, user, **kwargs):
+        client = APIClient()
+        client.force_authenticate(user)
+        payload = {"room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45"}
+        payload.update(kwargs)
+        return client.post("/api/holds/", payload, format="json")
+
+    def test_hold_blocks_other_teachers_until_it_expires(self):
+        self.assertEqual(201, self._hold(self.holder).status_code)
+
+        self.assertEqual(400, self._hold(self.other).status_code)
+        self.client.login(username="docente", password="pass1234")
+        self.client.post(reverse("reservation_create"), {
+            "room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45",
+            "course": self.course.id, "subject": self.subject.id,
+        })
+        self.assertFalse(Reservation.objects.exists())
+        slots = find_free_slots(start_date=self.monday, end_date=self.monday, hold_owner_id=self.other.id)
+        self.assertNotIn([1], [slot["block_indexes"] for slot in slots])
+
+        ReservationHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        release_overdue_reservations()
+        self.assertFalse(ReservationHold.objects.exists())
+        self.assertEqual(201, self._hold(self.other).status_code)
+
+    def test_holds_follow_the_booking_rules(self):
+        saturday = self.monday + timedelta(days=5)
+        response = self._hold(self.holder, date=saturday.isoformat())
+        self.assertEqual(400, response.status_code)
+        self.assertIn("lunes a viernes", str(response.data))
+        self.assertEqual(400, self._hold(self.holder, start_time="18:00", end_time="19:00").status_code)
+        with self.assertRaises(BookingInvalid):
+            place_hold(user=self.holder, room=self.room, date=saturday, start_time=time(8, 0), end_time=time(8, 45))
+        self.assertFalse(ReservationHold.objects.exists())
+
+    def test_submit_confirms_the_holders_own_hold(self):
+        place_hold(user=self.holder, room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(8, 45))
+        self.client.login(username="titular", password="pass1234")
+
+        self.client.post(reverse("reservation_create"), {
+            "room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45",
+            "course": self.course.id, "subject": self.subject.id,
+        })
+
+        self.assertEqual(1, Reservation.objects.count())
+        self.assertFalse(ReservationHold.objects.exists())
+
+    def test_hold_checks_material_stock(self):
+        notebooks = Material.objects.create(name="Notebook")
+        RoomInventory.objects.create(room=self.room, material=notebooks, quantity=2)
+
+        response = self._hold(self.holder, items=[{"material_id": notebooks.id, "quantity": 3}])
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("stock", response.data["non_field_errors"][0])
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        self.subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+        self.payload = {
+            "room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45",
+            "items": [],
+        }
+
+    def test_api_replays_the_original_response(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        first = client.post("/api/reservations/", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc-123")
+        second = client.post("/api/reservations/", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc-123")
+
+        self.assertEqual(201, first.status_code)
+        self.assertEqual(201, second.status_code)
+        self.assertEqual(first.data["id"], second.data["id"])
+        self.assertEqual("true", second["Idempotent-Replayed"])
+        self.assertEqual(1, Reservation.objects.count())
+
+        other = dict(self.payload, start_time="08:45", end_time="09:30")
+        reused = client.post("/api/reservations/", other, format="json", HTTP_IDEMPOTENCY_KEY="abc-123")
+        self.assertEqual(422, reused.status_code)
+
+    def test_web_form_token_ignores_double_submit(self):
+        self.client.login(username="docente", password="pass1234")
+        form = {
+            "room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45",
+            "course": self.course.id, "subject": self.subject.id, "idempotency_key": "token-1",
+        }
+
+        first = self.client.post(reverse("reservation_create"), form)
+        second = self.client.post(reverse("reservation_create"), form)
+
+        self.assertEqual(reverse("index"), first.url)
+        self.assertEqual(reverse("index"), second.url)
+        self.assertEqual(1, Reservation.objects.count())
+
+    def test_expired_keys_are_purged(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post("/api/reservations/", self.payload, format="json", HTTP_IDEMPOTENCY_KEY="old")
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        client.post("/api/reservations/", dict(self.payload, start_time="08:45", end_time="09:30"),
+                    format="json", HTTP_IDEMPOTENCY_KEY="new")
+
+        self.assertEqual(1, IdempotencyRecord.objects.count())
+
+
+class BookingServiceTests(TestCase):
+    # Query budgets for a booking with three materials over two blocks. They must not
+    # grow with the number of materials beyond one counter UPDATE each.
+    CREATE_BUDGET = 15
+    UPDATE_BUDGET = 20
+    CANCEL_BUDGET = 11
+
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.materials = [Material.objects.create(name=f"Material {n}") for n in range(3)]
+        for material in self.materials:
+            RoomInventory.objects.create(room=self.room, material=material, quantity=5)
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+        self.service = BookingService(self.user)
+
+    def test_create_update_and_cancel_stay_within_query_budget(self):
+        with CaptureQueriesContext(connection) as create_queries:
+            reservation = self.service.create(
+                room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(9, 30),
+                materials={material: 1 for material in self.materials},
+            )
+        with CaptureQueriesContext(connection) as update_queries:
+            self.service.update(
+                reservation, start_time=time(9, 50), end_time=time(11, 20),
+                materials={self.materials[0]: 2, self.materials[1]: 1},
+            )
+        with CaptureQueriesContext(connection) as cancel_queries:
+            self.service.cancel(reservation)
+
+        self.assertLessEqual(len(create_queries), self.CREATE_BUDGET)
+        self.assertLessEqual(len(update_queries), self.UPDATE_BUDGET)
+        self.assertLessEqual(len(cancel_queries), self.CANCEL_BUDGET)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(Blackout.objects.exists())
+        self.assertEqual(0, sum(MaterialBlockUsage.objects.values_list("reserved", flat=True)))
+
+    def test_api_bookings_create_and_remove_the_shadow_blackout(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post("/api/reservations/", {
+            "room": self.room.id, "date": self.monday.isoformat(), "start_time": "08:00", "end_time": "08:45",
+            "items": [],
+        }, format="json")
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(["Reserva de docente"], list(Blackout.objects.values_list("reason", flat=True)))
+
+        client.delete(f"/api/reservations/{response.data['id']}/")
+        self.assertFalse(Blackout.objects.exists())
+
+
+class BlackoutCancellationTests(TestCase):
+    def test_blackout_cancels_overlapping_reservations_in_bulk(self):
+        from booking.views.blackouts import _cancel_overlapping_reservations
+
+        room = Room.objects.create(code="A")
+        notebooks = Material.objects.create(name="Notebook")
+        RoomInventory.objects.create(room=room, material=notebooks, quantity=5)
+        user = User.objects.create_user(username="docente", password="pass1234")
+        monday = next_weekday(timezone.localdate(), 0)
+        for start, end in ((time(8, 0), time(8, 45)), (time(8, 45), time(9, 30))):
+            BookingService(user).create(room=room, date=monday, start_time=start, end_time=end, materials={notebooks: 2})
+
+        cancelled = _cancel_overlapping_reservations(
+            room,
+            timezone.make_aware(datetime.combine(monday, time(8, 0))),
+            timezone.make_aware(datetime.combine(monday, time(12, 0))),
+            reason="Consejo de profesores",
+        )
+
+        self.assertEqual(2, cancelled)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(Blackout.objects.exists())
+        self.assertEqual(2, Notification.objects.filter(user=user, message__contains="Consejo de profesores").count())
+        self.assertEqual(0, sum(MaterialBlockUsage.objects.values_list("reserved", flat=True)))
+
+
+PERF_BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "perf_budgets.json")
+
+
+def iter_named_urls(patterns=None, namespace=None):
+    """Yield ``(url_name, pattern)`` for every named route; the admin site counts as its index only."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == "admin":
+                yield "admin:index", pattern
+                continue
+            yield from iter_named_urls(pattern.url_patterns, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            if "format" in pattern.pattern.regex.groupindex:
+                continue  # router .json/.api suffix variants
+            yield (f"{namespace}:{pattern.name}" if namespace else pattern.name), pattern
+
+
+class EndpointBudgetTests(TestCase):
+    """Hit every route as admin and as teacher against per-endpoint budgets.
+
+    Budgets live in ``booking/perf_budgets.json``. After an intended change,
+    regenerate them with ``PERF_BUDGETS_UPDATE=1 python manage.py test
+    booking.tests.EndpointBudgetTests`` and commit the file.
+    """
+    ROLES = ("admin", "teacher")
+    # Routes that end the session are requested last for each role.
+    LAST = ("logout",)
+    TIME_FLOOR_MS = 250
+    TIME_FACTOR = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            "admin": User.objects.create_user(username="biblioteca", password="pass1234", is_staff=True),
+            "teacher": User.objects.create_user(username="docente", password="pass1234"),
+        }
+        cls.users["admin"].groups.add(Group.objects.get_or_create(name="AdminBiblioteca")[0])
+        course, _ = Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        subject, _ = Subject.objects.get_or_create(name="Matemáticas")
+        rooms = [Room.objects.create(code=code) for code in "ABC"]
+        materials = [Material.objects.create(name=name) for name in ("Notebook", "Tablet", "Parlante", "Proyector")]
+        inventory = [
+            RoomInventory.objects.create(room=room, material=material, quantity=10)
+            for room in rooms for material in materials
+        ]
+
+        today = timezone.localdate()
+        reservations = []
+        for week in (1, 2):
+            for weekday in range(5):
+                day = next_weekday(today, weekday, weeks_ahead=week)
+                for block in get_blocks_for_weekday(weekday)[:3]:
+                    for n, room in enumerate(rooms):
+                        owner = cls.users["teacher" if n % 2 == 0 else "admin"]
+                        reservations.append(BookingService(owner).create(
+                            room=room, date=day, start_time=block["start_time"], end_time=block["end_time"],
+                            materials={materials[n]: 1, materials[3]: 2}, course=course, subject=subject,
+                        ))
+        blackout = Blackout.objects.create(
+            room=rooms[0],
+            start_datetime=timezone.make_aware(datetime.combine(next_weekday(today, 4, 3), time(8, 0))),
+            end_datetime=timezone.make_aware(datetime.combine(next_weekday(today, 4, 3), time(18, 0))),
+            reason="Reunión de apoderados",
+        )
+        Notification.objects.create(user=cls.users["teacher"], message="Aviso de prueba")
+        hold = place_hold(
+            user=cls.users["teacher"], room=rooms[1], date=next_weekday(today, 3, 3),
+            start_time=time(8, 0), end_time=time(8, 45),
+        )
+        cls.pks = {
+            "reservation": reservations[0].pk,
+            "blackout": blackout.pk,
+            "material": materials[0].pk,
+            "inventory": inventory[0].pk,
+            "room": rooms[0].pk,
+            "hold": hold.pk,
+        }
+        cls.query_params = {
+            "availability-list": {
+                "start_date": next_weekday(today, 0).isoformat(),
+                "end_date": next_weekday(today, 4, 2).isoformat(),
+                "block_count": 2,
+            },
+        }
+
+    def _url_for(self, name, pattern):
+        kwargs = {}
+        for arg in pattern.pattern.regex.groupindex:
+            model = name.split(":")[-1].replace("-", "_").split("_")[0]
+            self.assertIn(model, self.pks, f"Falta un objeto de ejemplo para la ruta {name}")
+            kwargs[arg] = self.pks[model]
+        return reverse(name, kwargs=kwargs)
+
+    def _measure(self):
+        endpoints = sorted(iter_named_urls(), key=lambda entry: (entry[0] in self.LAST, entry[0]))
+        results = {}
+        for role in self.ROLES:
+            for name, pattern in endpoints:
+                self.client.force_login(self.users[role])
+                url = self._url_for(name, pattern)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time_module.perf_counter()
+                    response = self.client.get(url, self.query_params.get(name, {}))
+                    elapsed_ms = (time_module.perf_counter() - started) * 1000
+                self.assertLess(response.status_code, 500, f"{role} GET {url} -> {response.status_code}")
+                results[f"{role}:{name}"] = {"queries": len(queries), "ms": elapsed_ms}
+        return results
+
+    def test_endpoints_stay_within_budget(self):
+        results = self._measure()
+
+        if os.environ.get("PERF_BUDGETS_UPDATE"):
+            budgets = {
+                key: {
+                    "queries": value["queries"],
+                    "ms": max(self.TIME_FLOOR_MS, math.ceil(value["ms"] * self.TIME_FACTOR / 50) * 50),
+                }
+                for key, value in sorted(results.items())
+            }
+            with open(PERF_BUDGETS_PATH, "w", encoding="utf-8") as fh:
+                json.dump(budgets, fh, indent=2, sort_keys=True)
+                fh.write("\n")
+            return
+
+        with open(PERF_BUDGETS_PATH, encoding="utf-8") as fh:
+            budgets = json.load(fh)
+        problems = []
+        for key, value in sorted(results.items()):
+            budget = budgets.get(key)
+            if budget is None:
+                problems.append(f"{key}: sin presupuesto en perf_budgets.json")
+                continue
+            if value["queries"] > budget["queries"]:
+                problems.append(f"{key}: {value['queries']} consultas (presupuesto {budget['queries']})")
+            if value["ms"] > budget["ms"]:
+                problems.append(f"{key}: {value['ms']:.0f} ms (presupuesto {budget['ms']} ms)")
+        self.assertFalse(problems, "Endpoints fuera de presupuesto:\n" + "\n".join(problems))
+
+
+class GenerateLoadDataTests(TestCase):
+    OPTIONS = {
+        "seed": 7, "rooms": 3, "materials": 4, "teachers": 12, "reservations": 150,
+        "anchor_date": "2024-03-04", "batch_size": 40, "holidays_per_year": 25,
+    }
+
+    def _generate(self, **extra):
+        call_command("generate_load_data", stdout=io.StringIO(), **{**self.OPTIONS, **extra})
+        return sorted(
+            (room, day.isoformat(), start.isoformat(), end.isoformat(), username)
+            for room, day, start, end, username in Reservation.objects.values_list(
+                "room__code", "date", "start_time", "end_time", "user__username",
+            )
+        ), sorted(ReservationItem.objects.values_list("reservation__date", "material__name", "quantity"))
+
+    def test_same_seed_generates_the_same_data(self):
+        first = self._generate()
+        second = self._generate(purge=True)
+
+        self.assertEqual(first, second)
+        self.assertEqual(150, len(first[0]))
+        self.assertNotEqual(first, self._generate(purge=True, seed=8))
+
+    def test_generated_reservations_keep_booking_invariants(self):
+        self._generate()
+        reservations = list(Reservation.objects.all())
+
+        claims = sum(
+            len([
+                block for block in get_blocks_for_weekday(reservation.date.weekday())
+                if block["start_time"] < reservation.end_time and block["end_time"] > reservation.start_time
+            ])
+            for reservation in reservations
+        )
+        self.assertEqual(claims, RoomBlockClaim.objects.count())
+        self.assertEqual(len(reservations), Blackout.objects.filter(reason__startswith="Reserva de carga_").count())
+        self.assertTrue(all(reservation.date.weekday() < 5 for reservation in reservations))
+        self.assertTrue(all(
+            reservation.inventory_released == (reservation.date < date(2024, 3, 4)) for reservation in reservations
+        ))
+        stock = dict(((row.room_id, row.material_id), row.quantity) for row in RoomInventory.objects.all())
+        for usage in MaterialBlockUsage.objects.all():
+            self.assertLessEqual(usage.reserved, stock[(usage.room_id, usage.material_id)])
+        self.assertEqual(12, User.objects.filter(username__startswith="carga_", teacher_profile__isnull=False).count())
+
+        output = io.StringIO()
+        call_command("backfill_block_claims", stdout=output)
+        self.assertIn("Conflictos: 0", output.getvalue())
+
+
+class BenchmarkCompareTests(TestCase):
+    def _report(self, database, **case):
+        result = {"median_ms": 10.0, "p95_ms": 12.0, "queries": 8, "peak_kb": 300.0, "status": 200, **case}
+        return {"meta": {"database": database}, "results": {"small": {"reports:view": result}}}
+
+    def test_flags_slower_and_chattier_cases(self):
+        from benchmarks.runner import compare
+
+        baseline = self._report("sqlite")
+        self.assertEqual([], compare(self._report("sqlite", median_ms=14.0), baseline))
+        self.assertEqual(1, len(compare(self._report("sqlite", median_ms=40.0), baseline)))
+        self.assertEqual(
+            ["small reports:view: consultas 8 → 9"],
+            compare(self._report("mysql", median_ms=40.0, queries=9), baseline),
+        )
+
+
+class ImportTimeBudgetTests(TestCase):
+    def test_startup_does_not_load_export_libraries(self):
+        from benchmarks.importtime import check_budget, measure_imports
+
+        modules = measure_imports()
+        self.assertIn("booking.views.reservations", modules)
+        self.assertNotIn("booking.views.reports", modules)
+        self.assertNotIn("booking.views.inventory", modules)
+        self.assertNotIn("reportlab", modules)
+        self.assertNotIn("openpyxl", modules)
+        self.assertEqual([], check_budget(modules, budget_ms=10_000))
+
+    def test_lazy_routes_resolve_to_their_view_modules(self):
+        from booking import views
+
+        match = resolve(reverse("inventory_list"))
+        self.assertEqual("booking.views.inventory.inventory_list", match._func_path)
+        self.assertIs(views.reports_view, import_module("booking.views.reports").reports_view)
+
+    def test_eager_export_library_is_reported(self):
+        from benchmarks.importtime import check_budget
+
+        problems = check_budget({"reportlab.lib": (40_000, 90_000, 3), "django": (1_000, 1_000, 0)}, budget_ms=20)
+        self.assertEqual(2, len(problems))
+        self.assertIn("reportlab", problems[0])
+
+
+class BookingInvariantTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(code="A")
+        self.material = Material.objects.create(name="Notebook")
+        RoomInventory.objects.create(room=self.room, material=self.material, quantity=2)
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.monday = next_weekday(timezone.localdate(), 0)
+
+    def test_service_bookings_are_consistent(self):
+        BookingService(self.user).create(
+            room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(9, 30), materials={self.material: 2},
+        )
+
+        self.assertEqual([], check_booking_invariants(start_date=self.monday))
+
+    def test_double_booking_and_oversold_stock_are_reported(self):
+        BookingService(self.user).create(
+            room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(8, 45), materials={self.material: 2},
+        )
+        intruder = Reservation.objects.create(room=self.room, date=self.monday, start_time=time(8, 0), end_time=time(8, 45))
+        ReservationItem.objects.create(reservation=intruder, material=self.material, quantity=1)
+        MaterialBlockUsage.objects.filter(room=self.room).update(reserved=3)
+
+        problems = check_booking_invariants(start_date=self.monday)
+
+        self.assertTrue(any("se superponen" in problem for problem in problems))
+        self.assertTrue(any("3 reservados con stock 2" in problem for problem in problems))
+        self.assertTrue(any("2 reserva(s) y 1 bloqueo(s)" in problem for problem in problems))
+
+
+class StressBookingCommandTests(TransactionTestCase):
+    def test_contended_bookings_keep_invariants(self):
+        Room.objects.create(code="A")
+        Course.objects.get_or_create(name="1 Basico A", defaults={"order": 1})
+        Subject.objects.get_or_create(name="Matemáticas")
+        output = io.StringIO()
+
+        # One thread: the in-memory SQLite test database locks whole tables.
+        call_command("stress_booking", requests=12, threads=1, stdout=output)
+
+        self.assertIn("Invariantes OK", output.getvalue())
+        # Whole blocks, halves of the first block and Friday afternoon: more than the 4 blocks fit.
+        self.assertRegex(output.getvalue(), r"'created': [5-9],")
+        self.assertIn("Resultados: {'cancelled': 2}", output.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="stress_").exists())
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        REQUEST_METRICS.reset()
+        self.admin = User.objects.create_user(username="biblioteca", password="pass1234", is_staff=True)
+        self.teacher = User.objects.create_user(username="docente", password="pass1234")
+
+    def test_requests_are_aggregated_per_view(self):
+        self.client.force_login(self.admin)
+        for _ in range(3):
+            self.client.get(reverse("inventory_list"))
+
+        row = next(row for row in REQUEST_METRICS.snapshot() if row["view"] == "inventory_list")
+        self.assertEqual(3, row["requests"])
+        self.assertGreater(row["avg_queries"], 0)
+        self.assertGreater(row["avg_template_ms"], 0)
+        self.assertGreaterEqual(row["p95_ms"], row["p50_ms"])
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_repeated_sql(self):
+        self.client.force_login(self.teacher)
+        with self.assertLogs("booking.performance", level="WARNING") as logs:
+            self.client.get(reverse("reservation_list"))
+
+        self.assertIn("Slow request GET /reservas/ (reservation_list)", logs.output[0])
+
+    def test_sql_fingerprint_ignores_values(self):
+        self.assertEqual(
+            sql_fingerprint('SELECT * FROM "room" WHERE "id" IN (%s, %s, %s) AND code = \'A\''),
+            sql_fingerprint('SELECT * FROM "room" WHERE "id" IN (%s) AND code = \'B\''),
+        )
+
+    @override_settings(METRICS_TOKEN="secreto")
+    def test_metrics_page_is_for_admins_and_scrapers(self):
+        url = reverse("metrics")
+        self.client.force_login(self.teacher)
+        self.assertEqual(302, self.client.get(url).status_code)
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse("index"))
+        self.assertContains(self.client.get(url), "Métricas de rendimiento")
+
+        self.client.logout()
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secreto")
+        self.assertEqual("text/plain; version=0.0.4; charset=utf-8", response["Content-Type"])
+        self.assertIn('salones_request_duration_seconds_count{view="index"} 1', response.content.decode())
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="biblioteca", password="pass1234", is_staff=True)
+        self.teacher = User.objects.create_user(username="docente", password="pass1234")
+        self.monthly = reverse("reservation_monthly")
+
+    def _profile_link(self, target):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("metrics"), {"profile_url": target})
+        return response.context["profile_link"]
+
+    def test_admin_link_returns_a_profile_report(self):
+        link = self._profile_link(f"{self.monthly}?year=2025&month=5")
+
+        response = self.client.get(link)
+
+        self.assertEqual("200", response["X-Profiled-Status"])
+        report = response.content.decode()
+        self.assertIn("vista reservation_monthly", report)
+        self.assertIn("== Funciones (tiempo acumulado) ==", report)
+        self.assertIn("== SQL por forma", report)
+
+    def test_token_is_bound_to_the_admin_and_the_path(self):
+        link = self._profile_link(self.monthly)
+        token = link.split("_profile=")[1]
+
+        self.assertEqual(403, self.client.get(reverse("reservation_list"), {"_profile": token}).status_code)
+        self.client.force_login(self.teacher)
+        self.assertEqual(403, self.client.get(self.monthly, HTTP_X_PROFILE_TOKEN=token).status_code)
+        self.assertEqual(302, self.client.get(reverse("metrics"), {"profile_url": self.monthly}).status_code)
+
+    @override_settings(PROFILING_MAX_PER_HOUR=1)
+    def test_profiles_are_rate_limited(self):
+        link = self._profile_link(self.monthly)
+
+        self.assertEqual(200, self.client.get(link).status_code)
+        response = self.client.get(link)
+        self.assertEqual(429, response.status_code)
+        self.assertIn("Retry-After", response)
+
+
+class SlidingSessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="docente", password="pass1234")
+        self.client.login(username="docente", password="pass1234")
+        self.client.get(reverse("index"))
+
+    def _session_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("reservation_list"))
+        return [
+            query["sql"] for query in queries
+            if "django_session" in query["sql"] and not query["sql"].lstrip().upper().startswith("SELECT")
+        ]
+
+    def test_unchanged_session_is_not_saved_on_every_request(self):
+        for _ in range(3):
+            self.assertEqual([], self._session_writes())
+
+    def test_session_is_renewed_after_the_refresh_interval(self):
+        session = self.client.session
+        session["_refreshed_at"] = int(time_module.time()) - 3600
+        session.save()
+        expiry_before = Session.objects.get(session_key=session.session_key).expire_date
+
+        self.assertTrue(self._session_writes())
+        self.assertGreater(Session.objects.get(session_key=session.session_key).expire_date, expiry_before)
+        self.assertEqual([], self._session_writes())
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+        self.rollbacks = 0
+
+    def ping(self):
+        self.pings += 1
+        if self.closed:
+            raise OperationalError("gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.opened = []
+
+    def _pool(self, **options):
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+        options.setdefault("size", 2)
+        return ConnectionPool(connect, clock=lambda: self.now, **options)
+
+    def test_released_connection_is_reused_after_rollback(self):
+        pool = self._pool()
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(first, pool.acquire())
+        self.assertEqual(1, len(self.opened))
+        self.assertEqual(1, first.rollbacks)
+
+    def test_pool_never_exceeds_its_size(self):
+        pool = self._pool(timeout=0)
+        pool.acquire()
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(2, len(self.opened))
+
+    def test_waiting_thread_gets_the_released_connection(self):
+        pool = ConnectionPool(FakeConnection, size=1, timeout=5)
+        held = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        time_module.sleep(0.05)
+        pool.release(held)
+        waiter.join(timeout=5)
+        self.assertEqual([held], got)
+        self.assertEqual(1, pool.status()["waits"])
+
+    def test_idle_connection_is_pinged_and_replaced_when_dead(self):
+        pool = self._pool(ping_after=30)
+        first = pool.acquire()
+        pool.release(first)
+        first.closed = True
+        self.now += 60
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        self.assertEqual(1, first.pings)
+        self.assertEqual(1, pool.status()["discarded"])
+
+    def test_old_or_broken_connections_are_closed_not_reused(self):
+        pool = self._pool(recycle=100)
+        broken = pool.acquire()
+        pool.release(broken, discard=True)
+        self.assertTrue(broken.closed)
+        old = pool.acquire()
+        self.now += 100
+        pool.release(old)
+        self.assertTrue(old.closed)
+        self.assertEqual({"idle": 0, "in_use": 0}, {key: pool.status()[key] for key in ("idle", "in_use")})
+
+
+class ReferenceCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        REFERENCE_CACHE.clear()
+        Room.objects.create(code="A")
+
+    def test_second_read_is_served_without_queries(self):
+        self.assertEqual(["A"], [room.code for room in cached_rooms()])
+        with self.assertNumQueries(0):
+            self.assertEqual(["A"], [room.code for room in cached_rooms()])
+        self.assertEqual(1, REFERENCE_CACHE.stats["local_hits"])
+
+    def test_save_and_delete_invalidate_every_worker(self):
+        other_worker = ReferenceCache()
+
+        def build():
+            return [room.code for room in Room.objects.order_by("code")]
+
+        self.assertEqual(["A"], REFERENCE_CACHE.get_or_build("codes", (Room,), build))
+        self.assertEqual(["A"], other_worker.get_or_build("codes", (Room,), build))
+        self.assertEqual(1, other_worker.stats["shared_hits"])
+
+        room_b = Room.objects.create(code="B")
+        self.assertEqual(["A", "B"], other_worker.get_or_build("codes", (Room,), build))
+        room_b.delete()
+        self.assertEqual(["A"], REFERENCE_CACHE.get_or_build("codes", (Room,), build))
+
+    def test_reads_inside_a_transaction_are_not_cached(self):
+        with transaction.atomic():
+            Room.objects.create(code="B")
+            self.assertEqual(["A", "B"], [room.code for room in cached_rooms()])
+            transaction.set_rollback(True)
+        self.assertEqual(["A"], [room.code for room in cached_rooms()])
+
+    def test_warm_caches_prebuilds_the_month_grid(self):
+        today = timezone.localdate()
+        room = Room.objects.get(code="A")
+        out = io.StringIO()
+        call_command("warm_caches", months=1, stdout=out)
+        self.assertIn("4 de 4 entradas listas", out.getvalue())
+
+        REFERENCE_CACHE.clear()
+        with self.assertNumQueries(0):
+            month_grid(today.replace(day=1), today, cached_rooms())
+
+        blackout = Blackout.objects.create(
+            room=room,
+            start_datetime=timezone.make_aware(datetime.combine(today, time(8, 0))),
+            end_datetime=timezone.make_aware(datetime.combine(today, time(9, 0))),
+            reason="Mantención",
+        )
+        month_grid(today.replace(day=1), today, cached_rooms())
+        blackout.delete()
+        month_grid(today.replace(day=1), today, cached_rooms())
+        self.assertEqual(2, REFERENCE_CACHE.stats["misses"])
+
+    def test_a_year_of_warmed_calendars_fits_without_culling(self):
+        Room.objects.bulk_create(Room(code=code) for code in "BCD")
+        with mock.patch.object(type(caches["default"]), "_cull") as cull:
+            call_command("warm_caches", months=12, stdout=io.StringIO())
+        cull.assert_not_called()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="docente", password="pass1234")
+        self.room = Room.objects.create(code="A")
+        self.monthly = reverse("reservation_monthly")
+        self.client.force_login(self.teacher)
+
+    def test_unchanged_calendar_is_answered_with_304_before_the_view_runs(self):
+        first = self.client.get(self.monthly)
+        self.assertEqual(200, first.status_code)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        with self.assertNumQueries(3):  # the user and the overdue release; the session comes from the cache
+            again = self.client.get(self.monthly, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(304, again.status_code)
+
+        Notification.objects.create(user=self.teacher, message="Aviso")
+        changed = self.client.get(self.monthly, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(200, changed.status_code)
+        self.assertNotEqual(first["ETag"], changed["ETag"])
+        # Rendering marked the notice read, so the tag sent with it is already stale.
+        self.assertEqual(200, self.client.get(self.monthly, HTTP_IF_NONE_MATCH=changed["ETag"]).status_code)
+
+    def test_etag_is_per_user_and_skipped_while_messages_are_pending(self):
+        etag = self.client.get(self.monthly)["ETag"]
+        self.client.force_login(User.objects.create_user(username="otro", password="pass1234"))
+        self.assertEqual(200, self.client.get(self.monthly, HTTP_IF_NONE_MATCH=etag).status_code)
+
+        self.client.force_login(self.teacher)
+        session = self.client.session
+        session["_messages"] = '[["__json_message",0,25,"Reserva creada"]]'
+        session.save()
+        self.assertEqual(200, self.client.get(self.monthly, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_api_list_revalidates_against_model_changes(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        first = client.get("/api/rooms/")
+        self.assertEqual(304, client.get("/api/rooms/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code)
+
+        Room.objects.create(code="B")
+        response = client.get("/api/rooms/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(response.json()["results"]))
+
+    def test_revalidation_still_releases_finished_reservations(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        first = client.get("/api/reservations/")
+        # Rows that finished since the last request; bulk_create bumps no generation.
+        Reservation.objects.bulk_create([Reservation(
+            room=self.room, user=self.teacher, date=timezone.localdate() - timedelta(days=1),
+            start_time=time(8, 0), end_time=time(8, 45),
+        )])
+
+        response = client.get("/api/reservations/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(Reservation.objects.get().inventory_released)
+        self.assertEqual(304, client.get("/api/reservations/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code)
+
+
+class StaticPipelineTests(TestCase):
+    def test_minifiers_keep_the_rules_and_drop_the_padding(self):
+        css = "/* base */\n.a ,\n.b > .c {\n  color: red;\n  margin: 0 auto;\n}\n"
+        self.assertEqual(".a,.b>.c{color:red;margin:0 auto}\n", minify_css(css))
+        css = ".a::before {\n  content: \"a ,  b; }\";\n  background: url(data:image/svg+xml;utf8,<svg></svg>) , url( 'z /* q */.png' );\n}\n"
+        self.assertEqual(
+            ".a::before{content:\"a ,  b; }\";background:url(data:image/svg+xml;utf8,<svg></svg>),url( 'z /* q */.png' )}\n", minify_css(css),
+        )
+        js = "function f() {\n    // note\n\n    return 1;\n}\n"
+        self.assertEqual("function f() {\nreturn 1;\n}\n", minify_js(js))
+
+    @skipUnless(find_spec("whitenoise"), "whitenoise no está instalado")
+    def test_collectstatic_hashes_the_minified_files(self):
+        css = ".a {\n  color: red;\n}\n"
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(source, "app.css"), "w") as handle:
+                handle.write(css)
+            with override_settings(
+                STATICFILES_DIRS=[source],
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+                STATIC_ROOT=root,
+                STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "booking.storage.BuildStaticFilesStorage"}},
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+            with open(os.path.join(root, "staticfiles.json")) as handle:
+                hashed = json.load(handle)["paths"]["app.css"]
+            with open(os.path.join(root, hashed)) as handle:
+                self.assertEqual(minify_css(css), handle.read())
+
+    def test_photos_get_webp_copies_up_to_their_own_width(self):
+        from PIL import Image
+
+        source = io.BytesIO()
+        Image.new("RGB", (1000, 500), "navy").save(source, "JPEG")
+        variants = dict(webp_variants("img/salon.jpg", source.getvalue()))
+
+        self.assertEqual(["img/salon-160w.webp", "img/salon-480w.webp", "img/salon-960w.webp"], list(variants))
+        self.assertEqual((480, 240), Image.open(io.BytesIO(variants["img/salon-480w.webp"])).size)
+
+    def test_picture_tag_adds_webp_sources_once_they_are_built(self):
+        from django.template import Context, Template
+
+        template = Template("{% load static_images %}{% picture 'img/logo.png' alt='Logo' sizes='56px' %}")
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root):
+            _webp_variants.cache_clear()
+            self.assertEqual('<img src="/static/img/logo.png" alt="Logo">', template.render(Context()))
+
+            os.makedirs(os.path.join(root, "img"))
+            open(os.path.join(root, "img", "logo-160w.webp"), "wb").close()
+            _webp_variants.cache_clear()
+            html = template.render(Context())
+        _webp_variants.cache_clear()
+        self.assertIn('<source type="image/webp" srcset="/static/img/logo-160w.webp 160w" sizes="56px">', html)
+
+    def test_html_is_gzipped_for_clients_that_accept_it(self):
+        self.client.force_login(User.objects.create_user(username="docente", password="pass1234"))
+
+        response = self.client.get(reverse("reservation_monthly"), HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertIn("calendar", gzip.decompress(response.content).decode())
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(username="docente", password="pass1234", first_name="Ana", last_name="Rojas")
+        self.room = Room.objects.create(code="A")
+        self.today = timezone.localdate()
+        self.monday = month_bounds(self.today.replace(day=1))[0]
+
+    def _book(self, day):
+        block = get_blocks_for_weekday(day.weekday())[0]
+        Reservation.objects.create(
+            room=self.room, user=self.teacher, date=day, start_time=block["start_time"], end_time=block["end_time"],
+        )
+
+    def _versions(self):
+        weeks = month_grid(self.today.replace(day=1), self.today, [self.room])
+        return weeks, {day["date"]: day["version"] for week in weeks for day in week}
+
+    def test_only_the_changed_day_gets_a_new_fragment(self):
+        self._book(self.monday)
+        weeks, before = self._versions()
+        cells = render_day_cells(weeks)
+        self.assertIn("Ana Rojas", cells[0])
+        self.assertNotIn("Ana Rojas", cells[1])
+        with self.assertNumQueries(0):
+            self.assertEqual(cells, render_day_cells(weeks))
+
+        tuesday = self.monday + timedelta(days=1)
+        self._book(tuesday)
+        weeks, after = self._versions()
+        self.assertEqual([tuesday], [day for day in after if after[day] != before[day]])
+        self.assertIn("Ana Rojas", render_day_cells(weeks)[1])
+
+    def test_reservation_list_is_served_from_cache_until_data_changes(self):
+        self._book(self.monday)
+        self.client.force_login(self.teacher)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse("reservation_list"))
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse("reservation_list"))
+        self.assertLess(len(second), len(first))
+        self.assertContains(response, "Salón A", count=1)
+
+        self._book(self.monday + timedelta(days=1))
+        self.assertContains(self.client.get(reverse("reservation_list")), "Salón A", count=2)
+
+    @skipUnless(find_spec("jinja2"), "Jinja2 no está instalado")
+    def test_django_and_jinja2_render_the_same_day_cells(self):
+        room_b = Room.objects.create(code="B")
+        self._book(self.monday)
+        Reservation.objects.create(
+            room=room_b, user=self.teacher, date=self.monday, start_time=time(10, 0), end_time=time(10, 45),
+        )
+        for offset, room, reason in (
+            (1, self.room, "Mantención"), (2, None, "Jornada <docente>"), (3, self.room, "Reserva de Ana"),
+        ):
+            day = self.monday + timedelta(days=offset)
+            Blackout.objects.create(
+                room=room, reason=reason,
+                start_datetime=timezone.make_aware(datetime.combine(day, time(8, 0))),
+                end_datetime=timezone.make_aware(datetime.combine(day, time(9, 30))),
+            )
+        weeks = month_grid(self.today.replace(day=1), self.today, [self.room, room_b])
+
+        django_cells = render_day_cells(weeks)
+        cache.clear()
+        with override_settings(
+            CALENDAR_TEMPLATE_ENGINE="jinja2", TEMPLATES=[*settings.TEMPLATES, settings.CALENDAR_JINJA2_TEMPLATES],
+        ):
+            self.assertEqual(django_cells, render_day_cells(weeks))
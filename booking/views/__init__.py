@@ -0,0 +1,50 @@
+"""Web views, one module per subsystem.
+
+Importing this package loads nothing else: ``from booking import views`` and
+``views.reservation_list`` resolve the name on first access, and
+``salones_cra/urls.py`` routes the admin-only subsystems through
+:func:`lazy_view`, so a worker that only serves the calendar and reservations
+never imports the inventory, user or report code.
+"""
+from importlib import import_module
+
+_MODULES = {
+    'common': ('get_unread_notifications', 'is_library_admin'),
+    'dashboard': ('index', 'admin_dashboard', 'metrics_view'),
+    'reservations': (
+        'reservation_create', 'reservation_update', 'reservation_cancel', 'reservation_list', 'reservation_monthly',
+    ),
+    'blackouts': ('blackout_list', 'blackout_create', 'blackout_update', 'blackout_delete'),
+    'inventory': (
+        'material_list', 'material_create', 'material_update', 'material_delete',
+        'inventory_list', 'inventory_create', 'inventory_update', 'inventory_delete',
+    ),
+    'users': ('custom_logout', 'user_register', 'user_list', 'user_create'),
+    'reports': ('reports_view', 'export_reports_pdf', 'export_reports_excel'),
+}
+_OWNER = {name: module for module, names in _MODULES.items() for name in names}
+
+__all__ = sorted(_OWNER)
+
+
+def __getattr__(name):
+    module = _OWNER.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(f'{__name__}.{module}'), name)
+
+
+def lazy_view(name):
+    """Return a view that imports the module owning ``name`` on its first request."""
+    module_path = f'{__name__}.{_OWNER[name]}'
+    view = None
+
+    def load(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = getattr(import_module(module_path), name)
+        return view(request, *args, **kwargs)
+
+    load.__name__ = load.__qualname__ = name
+    load.__module__ = module_path
+    return load
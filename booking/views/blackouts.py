@@ -0,0 +1,151 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.contrib.auth.decorators import user_passes_test
+from ..forms import BlackoutForm
+from datetime import datetime
+from django.db import transaction
+from django.db.models import Q
+from ..models import Reservation, MaterialBlockUsage, Blackout, Notification
+from .common import is_library_admin
+
+
+def blackout_list(request):
+    # Only show administrative blackouts, not reservation-generated ones
+    items = Blackout.objects.select_related('room').exclude(
+        reason__startswith='Reserva de'
+    ).order_by('-start_datetime')
+    return render(request, 'blackouts/list.html', {'items': items})
+
+
+def _cancel_overlapping_reservations(room, start_dt, end_dt, *, reason=None):
+    """Cancel reservations that conflict with a blackout and restore inventory."""
+    if room:
+        overlapping = Reservation.objects.filter(
+            room=room,
+            date=start_dt.date(),
+            start_time__lt=end_dt.time(),
+            end_time__gt=start_dt.time()
+        )
+    else:
+        overlapping = Reservation.objects.filter(
+            date=start_dt.date(),
+            start_time__lt=end_dt.time(),
+            end_time__gt=start_dt.time()
+        )
+
+    overlapping = list(overlapping.select_related('room', 'user').prefetch_related('items'))
+    if not overlapping:
+        return 0
+
+    reason_text = (reason.strip() or 'un bloqueo de agenda') if reason else 'un bloqueo de agenda'
+    notifications = []
+    shadow_blackouts = Q()
+    with transaction.atomic():
+        for reservation in overlapping:
+            if not reservation.inventory_released:
+                MaterialBlockUsage.release(reservation, reservation.items.all())
+            if reservation.user:
+                notifications.append(Notification(
+                    user=reservation.user,
+                    message=(
+                        f"Tu reserva del salon {reservation.room.code} para el {reservation.date:%d/%m/%Y} "
+                        f"entre {reservation.start_time.strftime('%H:%M')} y {reservation.end_time.strftime('%H:%M')} fue cancelada debido a {reason_text}."
+                    ),
+                ))
+                shadow_blackouts |= Q(
+                    room=reservation.room,
+                    reason=f"Reserva de {reservation.user.username}",
+                    start_datetime=datetime.combine(reservation.date, reservation.start_time),
+                    end_datetime=datetime.combine(reservation.date, reservation.end_time),
+                )
+        Notification.objects.bulk_create(notifications)
+        if shadow_blackouts:
+            Blackout.objects.filter(shadow_blackouts).delete()
+        Reservation.objects.filter(pk__in=[reservation.pk for reservation in overlapping]).delete()
+
+    cancelled_count = len(overlapping)
+    return cancelled_count
+
+
+@user_passes_test(is_library_admin)
+def blackout_create(request):
+    if request.method == "POST":
+        form = BlackoutForm(request.POST)
+        if form.is_valid():
+            occurrences = form.get_occurrences()
+            if not occurrences:
+                messages.error(request, "No se pudo determinar el horario del bloqueo.")
+                return render(request, 'blackouts/form.html', {'form': form, 'title': 'Nuevo bloqueo'})
+
+            room = form.cleaned_data.get('room')
+            reason = form.cleaned_data.get('reason', '')
+
+            total_cancelled = 0
+            created_count = 0
+            for start_dt, end_dt in occurrences:
+                total_cancelled += _cancel_overlapping_reservations(room, start_dt, end_dt, reason=reason)
+
+                obj = Blackout(
+                    room=room,
+                    reason=reason,
+                    start_datetime=start_dt,
+                    end_datetime=end_dt,
+                    created_by=request.user
+                )
+                obj.save()
+                created_count += 1
+
+            if created_count > 1:
+                base_msg = f"Se crearon {created_count} bloqueos."
+            else:
+                base_msg = "Bloqueo creado."
+
+            if total_cancelled > 0:
+                base_msg += f" Se cancelaron {total_cancelled} reserva(s) que se solapaban."
+
+            messages.success(request, base_msg)
+            return redirect('blackout_list')
+    else:
+        form = BlackoutForm()
+    return render(request, 'blackouts/form.html', {'form': form, 'title': 'Nuevo bloqueo'})
+
+
+@user_passes_test(is_library_admin)
+def blackout_update(request, pk):
+    obj = get_object_or_404(Blackout, pk=pk)
+    if request.method == "POST":
+        form = BlackoutForm(request.POST, instance=obj)
+        if form.is_valid():
+            occurrences = form.get_occurrences()
+            if not occurrences:
+                messages.error(request, "No se pudo determinar el horario del bloqueo.")
+                return render(request, 'blackouts/form.html', {'form': form, 'title': 'Editar bloqueo'})
+
+            start_dt, end_dt = occurrences[0]
+
+            updated_obj = form.save(commit=False)
+            updated_obj.start_datetime = start_dt
+            updated_obj.end_datetime = end_dt
+
+            cancelled_count = _cancel_overlapping_reservations(updated_obj.room, start_dt, end_dt, reason=updated_obj.reason)
+
+            updated_obj.save()
+
+            if cancelled_count > 0:
+                messages.success(request, f"Bloqueo actualizado. Se cancelaron {cancelled_count} reserva(s) que se solapaban.")
+            else:
+                messages.success(request, "Bloqueo actualizado.")
+            return redirect('blackout_list')
+    else:
+        form = BlackoutForm(instance=obj)
+    return render(request, 'blackouts/form.html', {'form': form, 'title': 'Editar bloqueo'})
+
+
+@user_passes_test(is_library_admin)
+def blackout_delete(request, pk):
+    obj = get_object_or_404(Blackout, pk=pk)
+    if request.method == "POST":
+        obj.delete()
+        messages.success(request, "Bloqueo eliminado.")
+        return redirect('blackout_list')
+    return render(request, 'blackouts/confirm_delete.html', {'obj': obj})
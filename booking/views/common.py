@@ -0,0 +1,17 @@
+from django.utils import timezone
+from ..caching import bump_generation
+from ..models import Notification
+
+
+def get_unread_notifications(user):
+    if not user.is_authenticated:
+        return []
+    unread = list(Notification.objects.filter(user=user, read_at__isnull=True).order_by('-created_at'))
+    if unread:
+        Notification.objects.filter(id__in=[note.id for note in unread]).update(read_at=timezone.now())
+        bump_generation(Notification)  # the next calendar poll must not get a 304 that still shows them
+    return unread
+
+
+def is_library_admin(user):
+    return user.is_authenticated and (user.is_staff or user.groups.filter(name='AdminBiblioteca').exists())
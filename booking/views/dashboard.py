@@ -0,0 +1,154 @@
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.http import HttpResponse
+from django.utils import timezone
+from ..models import Material, Reservation
+from ..services import release_overdue_reservations, BOOKING_TRANSACTION_METRICS
+from ..metrics import REQUEST_METRICS, prometheus_text
+from ..profiling import PROFILE_PARAM, make_profile_token
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.utils.crypto import constant_time_compare
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from .common import is_library_admin
+
+
+def index(request):
+    release_overdue_reservations()
+    # Redirect unauthenticated users to login
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    # Redirect based on user type
+    if request.user.is_staff or request.user.groups.filter(name='AdminBiblioteca').exists():
+        # Admin users go to dashboard
+        return redirect('admin_dashboard')
+    else:
+        # Teachers and other users go to reservations
+        return redirect('reservation_list')
+
+
+@user_passes_test(is_library_admin)
+def admin_dashboard(request):
+    """Home section for library administrators with quick actions."""
+    display_name = (
+        request.user.get_full_name()
+        or request.user.first_name
+        or request.user.username
+    )
+
+    quick_links = [
+        {
+            'title': 'Reservas',
+            'description': 'Revisa y administra todas las reservas creadas.',
+            'url': reverse('reservation_list'),
+            'cta': 'Ir a reservas',
+            'tag': 'calendar',
+        },
+        {
+            'title': 'Bloqueos',
+            'description': 'Configura feriados y bloqueos de agenda.',
+            'url': reverse('blackout_list'),
+            'cta': 'Ir a bloqueos',
+            'tag': 'stopwatch',
+        },
+        {
+            'title': 'Materiales',
+            'description': 'Actualiza el catálogo disponible para préstamo.',
+            'url': reverse('material_list'),
+            'cta': 'Ir a materiales',
+            'tag': 'materials',
+        },
+        {
+            'title': 'Inventario',
+            'description': 'Controla el stock por salón y disponibilidad.',
+            'url': reverse('inventory_list'),
+            'cta': 'Ir a inventario',
+            'tag': 'inventory',
+        },
+        {
+            'title': 'Usuarios',
+            'description': 'Gestiona docentes y permisos de acceso.',
+            'url': reverse('user_list'),
+            'cta': 'Ir a usuarios',
+            'tag': 'users',
+        },
+        {
+            'title': 'Reportes',
+            'description': 'Consulta métricas y exporta información.',
+            'url': reverse('reports'),
+            'cta': 'Ir a reportes',
+            'tag': 'reports',
+        },
+        {
+            'title': 'Métricas',
+            'description': 'Tiempos de respuesta y consultas por vista.',
+            'url': reverse('metrics'),
+            'cta': 'Ver métricas',
+            'tag': 'reports',
+        },
+    ]
+
+    teacher_count = User.objects.filter(groups__name='Docentes').distinct().count()
+    if teacher_count == 0:
+        teacher_count = User.objects.filter(is_staff=False).count()
+
+    stats = {
+        'reservations': Reservation.objects.count(),
+        'materials': Material.objects.count(),
+        'teachers': teacher_count,
+        'today_reservations': Reservation.objects.filter(date=timezone.localdate()).count(),
+    }
+
+    context = {
+        'display_name': display_name,
+        'quick_links': quick_links,
+        'stats': stats,
+    }
+    return render(request, 'dashboard/admin_home.html', context)
+
+
+def _has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Per-view latency percentiles of this process, as a page or as Prometheus text.
+
+    The page also hands out signed links that profile one page for the admin.
+    """
+    scraper = _has_metrics_token(request)
+    if not scraper and not is_library_admin(request.user):
+        return redirect_to_login(request.get_full_path())
+
+    rows = REQUEST_METRICS.snapshot()
+    if scraper or request.GET.get('format') == 'prometheus':
+        return HttpResponse(
+            prometheus_text(rows, booking_transactions=BOOKING_TRANSACTION_METRICS),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+    profiling_enabled = getattr(settings, 'PROFILING_ENABLED', True)
+    profile_link = None
+    profile_target = request.GET.get('profile_url', '').strip()
+    if profiling_enabled and profile_target:
+        parsed = urlsplit(profile_target)
+        # Only local paths; the token is bound to the path, not to the query string.
+        if parsed.path.startswith('/') and not parsed.netloc:
+            query = parse_qsl(parsed.query, keep_blank_values=True)
+            query.append((PROFILE_PARAM, make_profile_token(request.user, parsed.path)))
+            profile_link = f"{parsed.path}?{urlencode(query)}"
+    context = {
+        'rows': rows,
+        'profiling_enabled': profiling_enabled,
+        'profile_target': profile_target,
+        'profile_link': profile_link,
+        'profile_minutes': getattr(settings, 'PROFILING_TOKEN_SECONDS', 600) // 60,
+        'slow_ms': getattr(settings, 'PERF_SLOW_REQUEST_MS', 500),
+        'window': REQUEST_METRICS.window,
+        'transactions': dict(BOOKING_TRANSACTION_METRICS),
+    }
+    return render(request, 'dashboard/metrics.html', context)
@@ -0,0 +1,197 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.contrib.auth.decorators import user_passes_test
+from ..forms import MaterialForm, InventoryForm, InventoryUpdateForm
+from django.utils import timezone
+from datetime import datetime
+from django.db.models import Sum
+from ..models import Material, RoomInventory, ReservationItem
+from ..caching import cached_materials, cached_rooms
+from ..services import release_overdue_reservations
+from ..dateutils import get_blocks_for_weekday
+from .common import is_library_admin
+
+
+# Material Management Views
+@user_passes_test(is_library_admin)
+def material_list(request):
+    materials = Material.objects.order_by('name')
+    return render(request, 'materials/list.html', {'materials': materials})
+
+
+@user_passes_test(is_library_admin)
+def material_create(request):
+    if request.method == "POST":
+        form = MaterialForm(request.POST)
+        if form.is_valid():
+            form.save()
+            messages.success(request, "Material creado exitosamente.")
+            return redirect('material_list')
+    else:
+        form = MaterialForm()
+    return render(request, 'materials/form.html', {'form': form, 'title': 'Nuevo Material'})
+
+
+@user_passes_test(is_library_admin)
+def material_update(request, pk):
+    material = get_object_or_404(Material, pk=pk)
+    if request.method == "POST":
+        form = MaterialForm(request.POST, instance=material)
+        if form.is_valid():
+            form.save()
+            messages.success(request, "Material actualizado exitosamente.")
+            return redirect('material_list')
+    else:
+        form = MaterialForm(instance=material)
+    return render(request, 'materials/form.html', {'form': form, 'title': 'Editar Material'})
+
+
+@user_passes_test(is_library_admin)
+def material_delete(request, pk):
+    material = get_object_or_404(Material, pk=pk)
+    if request.method == "POST":
+        try:
+            material.delete()
+            messages.success(request, "Material eliminado exitosamente.")
+        except Exception as e:
+            messages.error(request, f"No se puede eliminar el material: {str(e)}")
+        return redirect('material_list')
+    return render(request, 'materials/delete.html', {'material': material})
+
+
+# Inventory Management Views
+@user_passes_test(is_library_admin)
+def inventory_list(request):
+    release_overdue_reservations()
+    inventory = RoomInventory.objects.select_related('room', 'material').order_by('room__code', 'material__name')
+    rooms = cached_rooms()
+    materials = cached_materials()
+    today = timezone.localdate()
+    selected_date_str = request.GET.get('date', today.isoformat())
+    try:
+        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        selected_date = today
+        selected_date_str = today.isoformat()
+
+    weekday_blocks = get_blocks_for_weekday(selected_date.weekday())
+    block_param = request.GET.get('block')
+    selected_block = None
+    if weekday_blocks:
+        if block_param:
+            try:
+                block_index = int(block_param)
+                selected_block = next((b for b in weekday_blocks if b['index'] == block_index), None)
+            except (ValueError, TypeError):
+                selected_block = None
+        if not selected_block:
+            # Default to first block of the day
+            selected_block = weekday_blocks[0]
+    block_start = selected_block['start_time'] if selected_block else None
+    block_end = selected_block['end_time'] if selected_block else None
+
+    availability_options = []
+    for block in weekday_blocks:
+        availability_options.append({
+            'index': block['index'],
+            'label': f"{block['label']} ({block['start_str']} - {block['end_str']})"
+        })
+
+    # Reserved quantities for the selected block, in one grouped query
+    reserved_by_slot = {}
+    if block_start and block_end:
+        reserved_by_slot = {
+            (row['reservation__room_id'], row['material_id']): row['total']
+            for row in ReservationItem.objects.filter(
+                reservation__date=selected_date,
+                reservation__start_time__lt=block_end,
+                reservation__end_time__gt=block_start,
+            ).values('reservation__room_id', 'material_id').annotate(total=Sum('quantity'))
+        }
+
+    # Annotate inventory with availability details for the selected block
+    for item in inventory:
+        reserved_quantity = reserved_by_slot.get((item.room_id, item.material_id), 0)
+        available_quantity = max(item.quantity - reserved_quantity, 0)
+        if item.quantity <= 0:
+            availability_status = 'empty'
+        elif available_quantity <= 0:
+            availability_status = 'empty'
+        else:
+            ratio = available_quantity / item.quantity if item.quantity else 0
+            if ratio <= 0.5:
+                availability_status = 'warning'
+            else:
+                availability_status = 'ok'
+        item.selected_reserved_quantity = reserved_quantity
+        item.selected_available_quantity = available_quantity
+        item.selected_availability_status = availability_status
+
+    return render(request, 'inventory/list.html', {
+        'inventory': inventory,
+        'rooms': rooms,
+        'materials': materials,
+        'selected_date': selected_date,
+        'selected_date_str': selected_date_str,
+        'selected_block': selected_block,
+        'weekday_blocks': availability_options,
+        'has_block_schedule': bool(selected_block),
+    })
+
+
+@user_passes_test(is_library_admin)
+def inventory_create(request):
+    if request.method == "POST":
+        form = InventoryForm(request.POST)
+        if form.is_valid():
+            room = form.cleaned_data['room']
+            material = form.cleaned_data['material']
+            # Check if inventory already exists
+            existing = RoomInventory.objects.filter(room=room, material=material).first()
+            if existing:
+                messages.error(request, f"Ya existe inventario para {material.name} en salón {room.code}")
+                return render(request, 'inventory/form.html', {'form': form, 'title': 'Agregar Inventario'})
+            form.save()
+            messages.success(request, "Inventario agregado exitosamente.")
+            return redirect('inventory_list')
+    else:
+        form = InventoryForm()
+    return render(request, 'inventory/form.html', {'form': form, 'title': 'Agregar Inventario'})
+
+
+@user_passes_test(is_library_admin)
+def inventory_update(request, pk):
+    inventory = get_object_or_404(RoomInventory, pk=pk)
+    if request.method == "POST":
+        form = InventoryUpdateForm(request.POST)
+        if form.is_valid():
+            action = form.cleaned_data['action']
+            quantity = form.cleaned_data['quantity']
+            
+            if action == 'add':
+                inventory.quantity += quantity
+            elif action == 'remove':
+                new_qty = inventory.quantity - quantity
+                if new_qty < 0:
+                    messages.error(request, "No se puede quitar más cantidad de la disponible.")
+                    return render(request, 'inventory/update.html', {'form': form, 'inventory': inventory})
+                inventory.quantity = new_qty
+            elif action == 'set':
+                inventory.quantity = quantity
+            
+            inventory.save()
+            messages.success(request, f"Inventario actualizado: {inventory.material.name} en salón {inventory.room.code}")
+            return redirect('inventory_list')
+    else:
+        form = InventoryUpdateForm()
+    return render(request, 'inventory/update.html', {'form': form, 'inventory': inventory})
+
+
+@user_passes_test(is_library_admin)
+def inventory_delete(request, pk):
+    inventory = get_object_or_404(RoomInventory, pk=pk)
+    if request.method == "POST":
+        inventory.delete()
+        messages.success(request, "Inventario eliminado exitosamente.")
+        return redirect('inventory_list')
+    return render(request, 'inventory/delete.html', {'item': inventory})
@@ -0,0 +1,200 @@
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from django.contrib.auth.decorators import user_passes_test
+from django.http import HttpResponse
+from datetime import datetime, date
+from django.db.models import Count, Sum
+from ..models import Material, Reservation, ReservationItem, Room
+from ..caching import cached_rooms
+from ..conditional import conditional_on
+from ..services import release_overdue_reservations
+from .common import is_library_admin
+
+
+def _resolve_report_dates(request):
+    """Parse and normalize report date filters."""
+    start = request.GET.get('start_date')
+    end = request.GET.get('end_date')
+    today = date.today()
+    had_error = False
+
+    if not start or not end:
+        return today.replace(day=1), today, had_error
+
+    try:
+        start_obj = datetime.strptime(start, '%Y-%m-%d').date()
+        end_obj = datetime.strptime(end, '%Y-%m-%d').date()
+    except ValueError:
+        messages.error(request, "Formato de fecha inválido.")
+        return today.replace(day=1), today, True
+
+    if start_obj > end_obj:
+        messages.error(request, "La fecha de inicio no puede ser posterior a la fecha de término. Se usará el rango corregido.")
+        start_obj, end_obj = end_obj, start_obj
+        had_error = True
+
+    return start_obj, end_obj, had_error
+
+
+@user_passes_test(is_library_admin)
+@conditional_on(Reservation, Room, Material, before=release_overdue_reservations)
+def reports_view(request):
+    """Reports view with date range and room filters"""
+    # Get filter parameters
+    room_filter = request.GET.get('room')
+
+    start_date_obj, end_date_obj, _ = _resolve_report_dates(request)
+    start_date = start_date_obj.strftime('%Y-%m-%d')
+    end_date = end_date_obj.strftime('%Y-%m-%d')
+    
+    # Base queryset for reservations in date range
+    reservations_qs = Reservation.objects.filter(
+        date__gte=start_date_obj,
+        date__lte=end_date_obj
+    )
+    
+    # Apply room filter if specified
+    if room_filter:
+        reservations_qs = reservations_qs.filter(room_id=room_filter)
+    
+    # Report 1: Reservations by room (count)
+    room_stats = reservations_qs.values(
+        'room__code'
+    ).annotate(
+        reservation_count=Count('id')
+    ).order_by('room__code')
+    
+    # Report 2: Materials requested (sum by type)
+    material_stats = ReservationItem.objects.filter(
+        reservation__in=reservations_qs
+    ).values(
+        'material__name'
+    ).annotate(
+        total_quantity=Sum('quantity')
+    ).order_by('material__name')
+    
+    # Get all rooms for filter dropdown
+    rooms = cached_rooms()
+    
+    context = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'room_filter': room_filter,
+        'room_stats': room_stats,
+        'material_stats': material_stats,
+        'rooms': rooms,
+        'total_reservations': reservations_qs.count(),
+        'date_range_display': f"{start_date_obj.strftime('%d/%m/%Y')} - {end_date_obj.strftime('%d/%m/%Y')}"
+    }
+    
+    return render(request, 'reports/dashboard.html', context)
+
+
+@user_passes_test(is_library_admin)
+def export_reports_pdf(request):
+    """Export reports data to PDF"""
+    # Get the same filter parameters as reports_view
+    room_filter = request.GET.get('room')
+    start_date_obj, end_date_obj, had_error = _resolve_report_dates(request)
+    if had_error:
+        return redirect('reports')
+    start_date = start_date_obj.strftime('%Y-%m-%d')
+    end_date = end_date_obj.strftime('%Y-%m-%d')
+    # Get the same data as reports_view
+    reservations_qs = Reservation.objects.filter(
+        date__gte=start_date_obj,
+        date__lte=end_date_obj
+    )
+    
+    if room_filter:
+        reservations_qs = reservations_qs.filter(room_id=room_filter)
+    
+    room_stats = reservations_qs.values(
+        'room__code'
+    ).annotate(
+        reservation_count=Count('id')
+    ).order_by('room__code')
+    
+    material_stats = ReservationItem.objects.filter(
+        reservation__in=reservations_qs
+    ).values(
+        'material__name'
+    ).annotate(
+        total_quantity=Sum('quantity')
+    ).order_by('material__name')
+    
+    # Check if there's data to export
+    if not reservations_qs.exists():
+        messages.error(request, "No hay datos para exportar en el período seleccionado.")
+        return redirect('reports')
+    
+    # reportlab is only loaded once someone actually exports (see booking/exports/).
+    from .exports.pdf import build_reports_pdf
+
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="reporte_biblioteca_{start_date}_{end_date}.pdf"'
+    response.write(build_reports_pdf(
+        start_date=start_date_obj,
+        end_date=end_date_obj,
+        total_reservations=reservations_qs.count(),
+        room_stats=room_stats,
+        material_stats=material_stats,
+    ))
+    return response
+
+
+@user_passes_test(is_library_admin)
+def export_reports_excel(request):
+    """Export reports data to Excel"""
+    # Get the same filter parameters as reports_view
+    room_filter = request.GET.get('room')
+    start_date_obj, end_date_obj, had_error = _resolve_report_dates(request)
+    if had_error:
+        return redirect('reports')
+    start_date = start_date_obj.strftime('%Y-%m-%d')
+    end_date = end_date_obj.strftime('%Y-%m-%d')
+    
+    # Get the same data as reports_view
+    reservations_qs = Reservation.objects.filter(
+        date__gte=start_date_obj,
+        date__lte=end_date_obj
+    )
+    
+    if room_filter:
+        reservations_qs = reservations_qs.filter(room_id=room_filter)
+    
+    room_stats = reservations_qs.values(
+        'room__code'
+    ).annotate(
+        reservation_count=Count('id')
+    ).order_by('room__code')
+    
+    material_stats = ReservationItem.objects.filter(
+        reservation__in=reservations_qs
+    ).values(
+        'material__name'
+    ).annotate(
+        total_quantity=Sum('quantity')
+    ).order_by('material__name')
+    
+    # Check if there's data to export
+    if not reservations_qs.exists():
+        messages.error(request, "No hay datos para exportar en el período seleccionado.")
+        return redirect('reports')
+    
+    # openpyxl is only loaded once someone actually exports (see booking/exports/).
+    from .exports.excel import write_reports_workbook
+
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="reporte_biblioteca_{start_date}_{end_date}.xlsx"'
+    write_reports_workbook(
+        response,
+        start_date=start_date_obj,
+        end_date=end_date_obj,
+        total_reservations=reservations_qs.count(),
+        room_stats=room_stats,
+        material_stats=material_stats,
+    )
+    return response
@@ -0,0 +1,350 @@
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.contrib.auth.decorators import user_passes_test
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from ..forms import ReservationForm
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from datetime import date
+from ..models import Course, Material, Notification, Reservation, Room, Subject
+from ..caching import cached_materials, cached_rooms, model_generations
+from ..conditional import conditional_on
+from ..services import release_overdue_reservations, BookingConflict, BookingInvalid, BookingService
+from ..monthgrid import CALENDAR_MODELS, WEEKDAY_NAMES, month_grid, render_day_cells
+from ..availability import suggest_alternatives
+from ..admission import AdmissionRejected, get_booking_admission
+from ..idempotency import WEB_RESERVATION_CREATE, idempotent_form_post
+from urllib.parse import urlencode
+import hashlib
+import uuid
+from .common import get_unread_notifications
+
+
+# What the reservation cards show; a change to any of them re-renders the cached list.
+LIST_MODELS = (Reservation, Room, Course, Subject, Material, User)
+
+MONTH_NAMES = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+
+def _remember_reservation_suggestions(request, *, room, date_value, start, end, items):
+    """Store nearby free slots in the session so the form can offer them after a rejection."""
+    materials = {material.id: qty for material, qty in items}
+    alternatives = suggest_alternatives(
+        room_id=room.id,
+        date_value=date_value,
+        start_time=start,
+        end_time=end,
+        materials=materials,
+        hold_owner_id=request.user.id,
+    )
+    suggestions = []
+    for slot in alternatives:
+        params = {
+            'room': slot['room_id'],
+            'date': slot['date'].isoformat(),
+            'start_time': slot['start_time'].strftime('%H:%M'),
+            'end_time': slot['end_time'].strftime('%H:%M'),
+        }
+        params.update({f"qty_{material_id}": qty for material_id, qty in materials.items()})
+        suggestions.append({
+            'kind_label': slot['kind_label'],
+            'room_code': slot['room_code'],
+            'date_label': slot['date'].strftime('%d/%m/%Y'),
+            'label': slot['label'],
+            'time_range': f"{params['start_time']} - {params['end_time']}",
+            'url': f"{reverse('reservation_create')}?{urlencode(params)}",
+        })
+    request.session['reservation_suggestions'] = suggestions
+
+
+@user_passes_test(lambda u: u.is_authenticated)
+@idempotent_form_post(WEB_RESERVATION_CREATE)
+def reservation_create(request):
+    release_overdue_reservations()
+    materials = cached_materials()
+    material_values = {m.id: '' for m in materials}
+    queued = None
+    if request.method == "POST":
+        form = ReservationForm(request.POST, user=request.user)
+        items = []
+        for m in materials:
+            raw_value = (request.POST.get(f"qty_{m.id}", "") or "").strip()
+            material_values[m.id] = raw_value
+            try:
+                q = int(raw_value or 0)
+            except (TypeError, ValueError):
+                messages.error(request, "Las cantidades de materiales deben ser números enteros.")
+                return redirect('reservation_create')
+            if q < 0:
+                messages.error(request, "Las cantidades de materiales no pueden ser negativas.")
+                return redirect('reservation_create')
+            if q > 0:
+                items.append((m, q))
+        if form.is_valid():
+            room = form.cleaned_data["room"]
+            date = form.cleaned_data["date"]
+            start = form.cleaned_data["start_time"]
+            end = form.cleaned_data["end_time"]
+            course = form.cleaned_data["course"]
+            subject = form.cleaned_data["subject"]
+
+            try:
+                with get_booking_admission().admit(request.user.pk):
+                    BookingService(request.user).create(
+                        room=room,
+                        date=date,
+                        start_time=start,
+                        end_time=end,
+                        materials=dict(items),
+                        course=course,
+                        subject=subject,
+                    )
+            except AdmissionRejected as exc:
+                # Keep the submitted form so the teacher can resend it as is.
+                messages.warning(request, str(exc))
+                queued = exc
+            except BookingInvalid as exc:
+                messages.error(request, str(exc))
+                return redirect('reservation_create')
+            except BookingConflict as exc:
+                messages.error(request, str(exc))
+                _remember_reservation_suggestions(request, room=room, date_value=date, start=start, end=end, items=items)
+                return redirect('reservation_create')
+            else:
+                messages.success(request, "Reserva creada con éxito.")
+                request.idempotency_result = reverse('index')
+                return redirect('index')
+        suggestions = []
+    else:
+        initial_data = {
+            field: request.GET[field]
+            for field in ('room', 'date', 'start_time', 'end_time')
+            if request.GET.get(field)
+        }
+        form = ReservationForm(initial=initial_data, user=request.user)
+        for m in materials:
+            material_values[m.id] = request.GET.get(f"qty_{m.id}", '')
+        suggestions = request.session.pop('reservation_suggestions', [])
+    context = {
+        'form': form,
+        'material_inputs': [(m, material_values.get(m.id, '')) for m in materials],
+        'suggestions': suggestions,
+        'form_title': 'Nueva reserva',
+        'submit_label': 'Crear reserva',
+        'cancel_url': reverse('reservation_list'),
+        'is_edit': False,
+        # A resubmission of the same page reuses the token and is answered from the stored result.
+        'idempotency_key': request.POST.get('idempotency_key') or uuid.uuid4().hex,
+    }
+    return _render_reservation_form(request, context, queued)
+
+
+def _render_reservation_form(request, context, queued=None):
+    """Render the reservation form; after an ``AdmissionRejected`` it keeps the submitted values and answers 503."""
+    if queued is None:
+        return render(request, 'reservation_form.html', context)
+    response = render(request, 'reservation_form.html', context, status=503)
+    response['Retry-After'] = str(queued.retry_after)
+    return response
+
+
+@user_passes_test(lambda u: u.is_authenticated)
+def reservation_update(request, pk):
+    release_overdue_reservations()
+    reservation = get_object_or_404(
+        Reservation.objects.select_related('room', 'user', 'course', 'subject').prefetch_related('items__material'),
+        pk=pk
+    )
+    is_admin_user = request.user.is_staff or request.user.groups.filter(name='AdminBiblioteca').exists()
+    if reservation.user_id != request.user.id and not is_admin_user:
+        messages.error(request, "No tienes permiso para editar esta reserva.")
+        return redirect('reservation_list')
+
+    materials = cached_materials()
+    material_values = {m.id: '' for m in materials}
+    queued = None
+
+    if request.method == "POST":
+        form = ReservationForm(request.POST, user=request.user)
+        items = []
+        for m in materials:
+            raw_value = (request.POST.get(f"qty_{m.id}", "") or "").strip()
+            material_values[m.id] = raw_value
+            try:
+                q = int(raw_value or 0)
+            except (TypeError, ValueError):
+                messages.error(request, "Las cantidades de materiales deben ser números enteros.")
+                return redirect('reservation_update', pk=pk)
+            if q < 0:
+                messages.error(request, "Las cantidades de materiales no pueden ser negativas.")
+                return redirect('reservation_update', pk=pk)
+            if q > 0:
+                items.append((m, q))
+
+        if form.is_valid():
+            room = form.cleaned_data["room"]
+            date_value = form.cleaned_data["date"]
+            start = form.cleaned_data["start_time"]
+            end = form.cleaned_data["end_time"]
+            course = form.cleaned_data["course"]
+            subject = form.cleaned_data["subject"]
+
+            try:
+                with get_booking_admission().admit(request.user.pk):
+                    BookingService(request.user).update(
+                        reservation,
+                        room=room,
+                        date=date_value,
+                        start_time=start,
+                        end_time=end,
+                        course=course,
+                        subject=subject,
+                        materials=dict(items),
+                    )
+            except AdmissionRejected as exc:
+                # Keep the submitted form so the teacher can resend it as is.
+                messages.warning(request, str(exc))
+                queued = exc
+            except (BookingInvalid, BookingConflict) as exc:
+                messages.error(request, str(exc))
+                return redirect('reservation_update', pk=pk)
+            else:
+                messages.success(request, "Reserva actualizada con éxito.")
+                return redirect('reservation_list')
+    else:
+        initial_data = {
+            'room': reservation.room,
+            'date': reservation.date,
+            'start_time': reservation.start_time,
+            'end_time': reservation.end_time,
+            'course': reservation.course,
+            'subject': reservation.subject,
+        }
+        form = ReservationForm(initial=initial_data, user=request.user)
+        for item in reservation.items.all():
+            material_values[item.material_id] = str(item.quantity)
+    context = {
+        'form': form,
+        'reservation': reservation,
+        'material_inputs': [(m, material_values.get(m.id, '')) for m in materials],
+        'form_title': 'Editar reserva',
+        'submit_label': 'Actualizar reserva',
+        'cancel_url': reverse('reservation_list'),
+        'is_edit': True,
+    }
+    return _render_reservation_form(request, context, queued)
+
+
+@require_POST
+@user_passes_test(lambda u: u.is_authenticated)
+def reservation_cancel(request, pk):
+    release_overdue_reservations()
+    reservation = get_object_or_404(
+        Reservation.objects.select_related('room', 'user').prefetch_related('items__material'),
+        pk=pk
+    )
+    is_admin_user = request.user.is_staff or request.user.groups.filter(name='AdminBiblioteca').exists()
+    if reservation.user_id != request.user.id and not is_admin_user:
+        messages.error(request, "No tienes permiso para cancelar esta reserva.")
+        return redirect('reservation_list')
+
+    try:
+        BookingService(request.user).cancel(reservation)
+    except BookingConflict as exc:
+        messages.error(request, str(exc))
+        return redirect('reservation_list')
+
+    messages.success(request, "Reserva cancelada con éxito.")
+    return redirect('reservation_list')
+
+
+def reservation_list(request):
+    """List reservations - teachers see only their own, admins see all"""
+    release_overdue_reservations()
+    notifications = []
+    if request.user.is_authenticated:
+        is_admin = request.user.is_staff or request.user.groups.filter(name='AdminBiblioteca').exists()
+        if is_admin:
+            reservations = Reservation.objects.select_related('room', 'user', 'course', 'subject').prefetch_related('items__material').order_by('date', 'start_time', 'room__code')
+        else:
+            reservations = Reservation.objects.filter(user=request.user).select_related('room', 'user', 'course', 'subject').prefetch_related('items__material').order_by('date', 'start_time', 'room__code')
+        notifications = get_unread_notifications(request.user)
+    else:
+        reservations = Reservation.objects.none()
+        is_admin = False
+
+    context = {
+        'reservations': reservations,
+        'notifications': notifications,
+        'active_view': 'history',
+        'is_admin': is_admin,
+        'list_version': _list_fragment_version(request, is_admin),
+        'fragment_timeout': getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', 86400),
+    }
+    return render(request, 'reservations/list.html', context)
+
+
+def _list_fragment_version(request, is_admin):
+    """Key of the cached reservation cards: viewer, today, data generations and the CSRF secret their forms embed."""
+    get_token(request)
+    parts = (request.user.pk, is_admin, timezone.localdate(), model_generations(LIST_MODELS), request.META['CSRF_COOKIE'])
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+@conditional_on(*CALENDAR_MODELS, Notification, before=release_overdue_reservations)
+def reservation_monthly(request):
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+        display_date = date(year, month, 1)
+    except (TypeError, ValueError):
+        display_date = date(today.year, today.month, 1)
+
+    rooms = cached_rooms()
+    weeks = month_grid(display_date, today, rooms)
+
+    def shift_month(base, offset):
+        month_value = base.month + offset
+        year_value = base.year
+        while month_value < 1:
+            month_value += 12
+            year_value -= 1
+        while month_value > 12:
+            month_value -= 12
+            year_value += 1
+        return date(year_value, month_value, 1)
+
+    prev_date = shift_month(display_date, -1)
+    next_date = shift_month(display_date, 1)
+
+    month_label = f"{MONTH_NAMES[display_date.month]} {display_date.year}"
+
+    is_admin = request.user.is_authenticated and (
+        request.user.is_staff or request.user.groups.filter(name='AdminBiblioteca').exists()
+    )
+
+    notifications = []
+    if request.user.is_authenticated and not is_admin:
+        notifications = get_unread_notifications(request.user)
+
+    context = {
+        'day_cells': render_day_cells(weeks),
+        'weekday_names': WEEKDAY_NAMES,
+        'month_label': month_label,
+        'current_month': display_date.month,
+        'current_year': display_date.year,
+        'prev_month': prev_date.month,
+        'prev_year': prev_date.year,
+        'next_month': next_date.month,
+        'next_year': next_date.year,
+        'today': today,
+        'rooms': rooms,
+        'notifications': notifications,
+        'active_view': 'calendar',
+        'is_admin': is_admin,
+    }
+    return render(request, 'reservations/calendar.html', context)
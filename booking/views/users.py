@@ -0,0 +1,68 @@
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth import logout, login
+from django.contrib.auth.models import User
+from ..forms import CustomUserCreationForm, AdminUserCreationForm
+from ..caching import cached_registration_metadata
+from .common import is_library_admin
+
+
+def custom_logout(request):
+    """Custom logout view that properly clears session and forces redirect"""
+    logout(request)
+    response = redirect('/')
+    # Clear all cookies related to authentication
+    response.delete_cookie('sessionid')
+    response.delete_cookie('csrftoken')
+    # Add cache control headers to prevent caching
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    response['Pragma'] = 'no-cache'
+    response['Expires'] = '0'
+    return response
+
+
+def user_register(request):
+    """User registration view"""
+    if request.method == 'POST':
+        form = CustomUserCreationForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            login(request, user)
+            messages.success(request, f'Cuenta creada exitosamente para {user.username}!')
+            return redirect('index')
+    else:
+        form = CustomUserCreationForm()
+
+    metadata = cached_registration_metadata()
+    return render(request, 'registration/register.html', {
+        'form': form,
+        'registration_metadata': metadata,
+    })
+
+
+@user_passes_test(is_library_admin)
+def user_list(request):
+    """List all users - only accessible to admins"""
+    users = User.objects.select_related().prefetch_related('groups').order_by('username')
+    return render(request, 'users/list.html', {'users': users})
+
+
+@user_passes_test(is_library_admin)
+def user_create(request):
+    """Create new user - only accessible to admins"""
+    if request.method == 'POST':
+        form = AdminUserCreationForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            messages.success(request, f'Usuario {user.username} creado exitosamente.')
+            return redirect('user_list')
+    else:
+        form = AdminUserCreationForm()
+
+    metadata = cached_registration_metadata()
+    return render(request, 'users/form.html', {
+        'form': form,
+        'title': 'Nuevo Usuario',
+        'registration_metadata': metadata,
+    })
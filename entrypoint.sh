@@ -25,8 +25,30 @@ echo "Applying migrations..."
 python manage.py migrate
 
 echo "Seeding base data..."
-python manage.py create_sample_users || true
 python manage.py seed_data || true
 
-echo "Starting Django dev server on 0.0.0.0:8000"
-exec python manage.py runserver 0.0.0.0:8000
+echo "Warming caches..."
+python manage.py warm_caches || true
+
+case "${APP_MODE:-dev}" in
+  prod)
+    # The image builds them; only a bind-mounted checkout without a build needs collecting here.
+    if [ ! -f "${STATIC_ROOT:-/app/staticfiles}/staticfiles.json" ]; then
+      echo "Collecting static files..."
+      python manage.py collectstatic --noinput
+    fi
+
+    echo "Starting gunicorn (APP_MODE=prod)"
+    exec gunicorn -c gunicorn.conf.py
+    ;;
+  dev)
+    python manage.py create_sample_users || true
+
+    echo "Starting Django dev server on 0.0.0.0:8000"
+    exec python manage.py runserver 0.0.0.0:8000
+    ;;
+  *)
+    echo "APP_MODE must be dev or prod, got '$APP_MODE'" >&2
+    exit 1
+    ;;
+esac
@@ -0,0 +1,44 @@
+"""Gunicorn settings for APP_MODE=prod (see entrypoint.sh).
+
+Workers are sized from the CPUs the container can actually use, so the same
+image scales from a laptop to a larger host without hand-tuning. Every value
+can be overridden with the environment variable next to it.
+"""
+import multiprocessing
+import os
+
+
+def _cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(_cpus() * 2 + 1)))
+# gthread keeps blocking views off the accept loop; with uvicorn installed,
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker and GUNICORN_APP=salones_cra.asgi:application serve ASGI.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+wsgi_app = os.getenv("GUNICORN_APP", "salones_cra.wsgi:application")
+
+# Import Django once in the master and fork: faster boot and shared read-only memory.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then so a slow leak never takes a worker down under load.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # A connection opened while preloading would be shared by every worker; drop it.
+    from django.db import connections
+
+    connections.close_all()
@@ -7,7 +7,9 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-secret")
-DEBUG = os.getenv("DJANGO_DEBUG", "0") == "1"
+# "dev" runs runserver; "prod" runs gunicorn with DEBUG forced off and compressed, hashed static files
+APP_MODE = os.getenv("APP_MODE", "dev")
+DEBUG = os.getenv("DJANGO_DEBUG", "0") == "1" and APP_MODE != "prod"
 ALLOWED_HOSTS = [h for h in os.getenv("DJANGO_ALLOWED_HOSTS","").split(",") if h] or ["127.0.0.1","localhost"]
 
 INSTALLED_APPS = [
@@ -26,11 +28,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "booking.middleware.RequestMetricsMiddleware",
+    "booking.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "booking.middleware.SlidingSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "booking.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -39,8 +45,9 @@ ROOT_URLCONF = "salones_cra.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "booking.templating.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "booking" / "templates"],
+        # No explicit "loaders": Django wraps the defaults in the cached loader (reloaded on change under runserver).
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -53,16 +60,61 @@ TEMPLATES = [
     },
 ]
 
+# Engine for the monthly calendar's day cells: "django" or "jinja2" (needs Jinja2 installed).
+# Both render the same booking/templates/reservations/calendar_day.html. Calendar days and
+# reservation lists are cached as rendered HTML for TEMPLATE_FRAGMENT_TIMEOUT seconds.
+CALENDAR_TEMPLATE_ENGINE = os.getenv("CALENDAR_TEMPLATE_ENGINE", "django")
+TEMPLATE_FRAGMENT_TIMEOUT = int(os.getenv("TEMPLATE_FRAGMENT_TIMEOUT", "86400"))
+CALENDAR_JINJA2_TEMPLATES = {
+    "NAME": "jinja2",
+    "BACKEND": "booking.templating_jinja2.TimedJinja2",
+    "DIRS": [BASE_DIR / "booking" / "templates"],
+    "OPTIONS": {"keep_trailing_newline": True},
+}
+if CALENDAR_TEMPLATE_ENGINE == "jinja2":
+    TEMPLATES.append(CALENDAR_JINJA2_TEMPLATES)
+
 WSGI_APPLICATION = "salones_cra.wsgi.application"
 
+# Shared cache: file-based under APP_MODE=prod so every worker on the host sees the same
+# reference-data generations; locmem otherwise. Reference data also keeps a per-process LRU.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache" if APP_MODE == "prod"
+            else "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/salones_cra_cache" if APP_MODE == "prod" else "salones-cra"),
+        # Django's default of 300 entries is below one month of day cells per room plus the
+        # per-user list fragments, and past it every set culls a third of the cache.
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "20000")),
+            "CULL_FREQUENCY": int(os.getenv("CACHE_CULL_FREQUENCY", "10")),
+        },
+    }
+}
+REFERENCE_CACHE_TIMEOUT = int(os.getenv("REFERENCE_CACHE_TIMEOUT", "3600"))
+REFERENCE_CACHE_LRU_SIZE = int(os.getenv("REFERENCE_CACHE_LRU_SIZE", "256"))
+
+# Database connections: DB_POOL_SIZE > 0 lends connections from a bounded per-process pool
+# (threaded or ASGI servers); otherwise each thread keeps its own for DB_CONN_MAX_AGE seconds.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "0"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PING_AFTER = int(os.getenv("DB_POOL_PING_AFTER", "30"))
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "booking.db.mysql" if DB_POOL_SIZE else "django.db.backends.mysql",
         "NAME": os.getenv("DB_NAME", "salones_cra"),
         "USER": os.getenv("DB_USER", "root"),
         "PASSWORD": os.getenv("DB_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", "127.0.0.1"),
         "PORT": os.getenv("DB_PORT", "3306"),
+        "CONN_MAX_AGE": 0 if DB_POOL_SIZE else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
         "OPTIONS": {
             "charset": "utf8mb4",
         },
@@ -76,6 +128,16 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "booking" / "static"]
+STATIC_ROOT = Path(os.getenv("STATIC_ROOT", BASE_DIR / "staticfiles"))
+
+if APP_MODE == "prod":
+    # collectstatic minifies CSS/JS, adds WebP copies of the photos and writes name.<hash>.ext plus
+    # .gz/.br copies (see booking.storage); WhiteNoise serves them with a one-year max-age.
+    MIDDLEWARE.insert(MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1, "whitenoise.middleware.WhiteNoiseMiddleware")
+    STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "booking.storage.BuildStaticFilesStorage"},
+    }
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Authentication redirects
@@ -83,9 +145,39 @@ LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 
 # Session settings
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True
+# Sliding expiry: an unchanged session is saved again after this fraction of SESSION_COOKIE_AGE
+SESSION_REFRESH_FRACTION = float(os.getenv("SESSION_REFRESH_FRACTION", "0.25"))
+
+# Booking transactions: retries on MySQL deadlock / lock wait timeout
+BOOKING_TRANSACTION_ATTEMPTS = int(os.getenv("BOOKING_TRANSACTION_ATTEMPTS", "3"))
+BOOKING_RETRY_BASE_DELAY = float(os.getenv("BOOKING_RETRY_BASE_DELAY", "0.05"))
+BOOKING_RETRY_MAX_DELAY = float(os.getenv("BOOKING_RETRY_MAX_DELAY", "0.5"))
+
+# Admission control in front of booking transactions (per process)
+BOOKING_ADMISSION_ACTIVE = int(os.getenv("BOOKING_ADMISSION_ACTIVE", "4"))
+BOOKING_ADMISSION_QUEUE = int(os.getenv("BOOKING_ADMISSION_QUEUE", "50"))
+BOOKING_ADMISSION_PER_USER = int(os.getenv("BOOKING_ADMISSION_PER_USER", "1"))
+BOOKING_ADMISSION_WAIT = float(os.getenv("BOOKING_ADMISSION_WAIT", "2.0"))
+
+# Minutes a room block stays held while the reservation form is open
+RESERVATION_HOLD_MINUTES = int(os.getenv("RESERVATION_HOLD_MINUTES", "5"))
+
+# Hours a reservation Idempotency-Key (API header or form token) is remembered
+IDEMPOTENCY_KEY_HOURS = int(os.getenv("IDEMPOTENCY_KEY_HOURS", "24"))
+
+# Request metrics: slow-request log threshold, samples kept per view, Prometheus scrape token
+PERF_SLOW_REQUEST_MS = int(os.getenv("PERF_SLOW_REQUEST_MS", "500"))
+PERF_METRICS_WINDOW = int(os.getenv("PERF_METRICS_WINDOW", "500"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# On-demand profiling for library admins: signed token lifetime, hourly cap per process, report folder
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "1") == "1"
+PROFILING_TOKEN_SECONDS = int(os.getenv("PROFILING_TOKEN_SECONDS", "600"))
+PROFILING_MAX_PER_HOUR = int(os.getenv("PROFILING_MAX_PER_HOUR", "20"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (